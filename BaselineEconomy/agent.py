@@ -0,0 +1,51 @@
+# AGENTS
+
+class EconomyAgent:
+    """
+    Base of the household and firm agents
+
+    Offers the part of mesa's Agent the model uses: a unique_id,
+    the model and a position. Attributes live in fixed __slots__
+    rather than a per-instance __dict__, and subclasses declare theirs
+    the same way. Yes/no decision indicators are packed into the bits
+    of one integer, flags, and read through flag properties.
+    """
+
+    __slots__ = ("unique_id", "model", "pos", "flags")
+
+    def __init__(self, unique_id: int, model) -> None:
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+        self.flags = 0
+
+
+# FUNCTIONS
+
+def flag(bit: int, doc: str) -> property:
+    """
+    Property reading and writing one bit of an agent's flags
+    """
+    mask = 1 << bit
+
+    def getter(self) -> bool:
+        return bool(self.flags & mask)
+
+    def setter(self, value: bool) -> None:
+        if value:
+            self.flags |= mask
+        else:
+            self.flags &= ~mask
+
+    return property(getter, setter, doc=doc)
+
+
+def slot_names(cls) -> tuple:
+    """
+    Every attribute slot declared by a class and its bases
+    """
+    names = []
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get("__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return tuple(o for o in names if o not in ("__dict__", "__weakref__"))
@@ -0,0 +1,291 @@
+import math
+import numpy as np
+from .distribution import LiquidityTracker
+
+
+class AggregateMismatch(AssertionError):
+    """
+    A running total has drifted away from a full scan of the agents
+    """
+
+
+class MoneyNotConserved(AssertionError):
+    """
+    Money has been created or destroyed inside the economy
+    """
+
+
+class Aggregates:
+    """
+    Running totals behind the standard model reporters
+
+    Agents update the totals as they go, so reporting them
+    does not need a scan of every household and firm.
+
+    Variables:
+
+    employed: number of households with an employer
+    poverty: number of households planning to consume below
+        the poverty level
+    household_liquidity: money held by households
+    firm_liquidity: money held by firms
+    planned_savings: money households expect to save this month
+    current_demand: goods households plan to buy each day
+    unsatisfied_demand: demand households failed to satisfy this month
+    inventory: goods held by firms
+    money_supply: money held by households and firms together, which
+        only changes when money is added from outside the economy
+    liquidity_distribution: LiquidityTracker of household liquidity,
+        by household unique_id, given a relative_error. None otherwise.
+    """
+
+    # Totals that are exact integers can be compared exactly.
+    # The rest are sums of floats and may differ from a scan in the
+    # last few bits.
+    exact = (
+        "employed",
+        "poverty",
+        "household_liquidity",
+        "firm_liquidity",
+        "inventory",
+    )
+    approximate = (
+        "planned_savings",
+        "current_demand",
+        "unsatisfied_demand",
+    )
+
+    def __init__(self, model, relative_error=None) -> None:
+        self.model = model
+        self.rescan()
+        self.money_supply = self.household_liquidity + self.firm_liquidity
+        self.liquidity_distribution = None
+        if relative_error is not None:
+            self.liquidity_distribution = LiquidityTracker(
+                self.household_liquidities(),
+                relative_error
+            )
+
+    def rescan(self) -> None:
+        """
+        Reset every total from a full scan of the agents
+        """
+        for name, value in self.scan().items():
+            setattr(self, name, value)
+
+    def check(self) -> None:
+        """
+        Compare every total against a full scan of the agents
+        """
+        for name, value in self.scan().items():
+            total = getattr(self, name)
+            if name in self.exact:
+                matched = total == value
+            else:
+                matched = math.isclose(
+                    total, value, rel_tol=1e-9, abs_tol=1e-6
+                )
+            if not matched:
+                raise AggregateMismatch(
+                    "{0}: running total {1} but scan gives {2}"
+                    .format(name, total, value)
+                )
+        tracker = self.liquidity_distribution
+        if tracker is None:
+            return
+        tracker.flush()
+        if not np.array_equal(tracker.values, self.household_liquidities()):
+            raise AggregateMismatch(
+                "liquidity distribution: tracked values differ from a scan"
+            )
+
+    def check_money(self) -> None:
+        """
+        Check that the money held by all the agents adds up
+        to the money supply.
+        Households are counted from their running total, so this
+        only visits the firms. check() ties that total to a scan.
+        """
+        money = self.household_liquidity + sum(
+            [o.liquidity for o in self.model.firms]
+        )
+        if money != self.money_supply:
+            raise MoneyNotConserved(
+                "Agents hold {0} but the money supply is {1}"
+                .format(money, self.money_supply)
+            )
+
+    def household_liquidities(self) -> np.ndarray:
+        """
+        The liquidity of every household, by unique_id
+        """
+        households = self.model.households
+        if self.model.engine == "array":
+            return households.liquidity.astype(float)
+        values = np.zeros(len(households))
+        values[[hh.unique_id for hh in households]] = [
+            hh.liquidity for hh in households
+        ]
+        return values
+
+    def scan(self) -> dict:
+        """
+        Calculate every total by visiting every agent
+        """
+        firms = self.model.firms
+        households = self.model.households
+        totals = {
+            "firm_liquidity": sum([o.liquidity for o in firms]),
+            "inventory": sum([o.inventory for o in firms]),
+        }
+        if self.model.engine == "array":
+            totals.update({
+                "employed": np.count_nonzero(households.employer >= 0),
+                "poverty": np.count_nonzero(households.poverty),
+                "household_liquidity": households.liquidity.sum().item(),
+                "planned_savings": households.planned_savings.sum().item(),
+                "current_demand": households.current_demand.sum().item(),
+                "unsatisfied_demand": (
+                    households.unsatisfied_demand.sum().item()
+                ),
+            })
+        else:
+            totals.update({
+                "employed": sum(
+                    [hh.employer is not None for hh in households]
+                ),
+                "poverty": sum([hh.poverty for hh in households]),
+                "household_liquidity": sum(
+                    [hh.liquidity for hh in households]
+                ),
+                "planned_savings": sum(
+                    [getattr(hh, "planned_savings", 0) for hh in households]
+                ),
+                "current_demand": sum(
+                    [getattr(hh, "current_demand", 0) for hh in households]
+                ),
+                "unsatisfied_demand": sum(
+                    [hh.unsatisfied_demand for hh in households]
+                ),
+            })
+        return totals
+
+# UPDATES
+
+    def month_start(self) -> None:
+        """
+        Households reset their monthly stats and plans together
+        at the start of each month
+        """
+        self.poverty = 0
+        self.planned_savings = 0
+        self.current_demand = 0
+        self.unsatisfied_demand = 0
+
+    def add_consumption_plan(
+        self,
+        current_demand: float,
+        planned_savings: float,
+        poverty: int
+    ) -> None:
+        self.current_demand += current_demand
+        self.planned_savings += planned_savings
+        self.poverty += poverty
+
+    def record_sale(self, quantity, total_price) -> None:
+        """
+        Goods and money change hands between a household and a firm
+        """
+        self.inventory -= quantity
+        self.firm_liquidity += total_price
+        self.household_liquidity -= total_price
+
+    def transfer_to_households(self, amount, recipients=()) -> None:
+        """
+        Wages or dividends paid by a firm to the recipient households
+        """
+        self.firm_liquidity -= amount
+        self.household_liquidity += amount
+        if self.liquidity_distribution is not None:
+            for hh in recipients:
+                self.liquidity_distribution.update(
+                    hh.unique_id, hh.liquidity
+                )
+
+    def liquidity_changed(self, household) -> None:
+        """
+        A household has spent or been given money
+        """
+        if self.liquidity_distribution is not None:
+            self.liquidity_distribution.update(
+                household.unique_id, household.liquidity
+            )
+
+    def liquidities_changed(self, ids, values) -> None:
+        """
+        Households, numbered by ids, now hold the given amounts
+        """
+        if self.liquidity_distribution is not None:
+            self.liquidity_distribution.update_many(ids, values)
+
+
+# REPORTERS
+
+def count_poverty(model) -> int:
+    """
+    Number of households in poverty
+    """
+    return model.aggregates.poverty
+
+
+def count_employed(model) -> int:
+    """
+    Number of households employed
+    """
+    return model.aggregates.employed
+
+
+def percent_unsatisfied_demand(model) -> float:
+    """
+    percentage of unsatisfied demand over expected demand
+    """
+    totals = model.aggregates
+    try:
+        return (
+            totals.unsatisfied_demand * 100 /
+            (totals.current_demand * 21)
+        )
+    except ZeroDivisionError:
+        return 0
+
+
+def sum_inventory(model) -> int:
+    """
+    Total stock in hand
+    """
+    return model.aggregates.inventory
+
+
+def sum_hh_savings(model) -> float:
+    """
+    How much money households expect to save
+    """
+    return model.aggregates.planned_savings
+
+
+def sum_liquidity(model) -> int:
+    """
+    How much money is in the system
+    """
+    totals = model.aggregates
+    return totals.firm_liquidity + totals.household_liquidity
+
+
+incremental_reporters = {
+    "Employed": count_employed,
+    "Poverty Level": count_poverty,
+    "Unsatisfied Demand": percent_unsatisfied_demand,
+    "Inventory": sum_inventory,
+    "HH Savings": sum_hh_savings,
+    "Total Liquidity": sum_liquidity,
+}
@@ -0,0 +1,357 @@
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from itertools import product
+import os
+import time
+import traceback
+from tqdm import tqdm
+
+
+# CONFIG
+
+class BatchConfig:
+    """
+    Settings for the process pool batch runner
+    """
+
+    # How many times a run is retried after its own worker process
+    # dies. Runs that were only caught up in another run's crash
+    # are not counted against this.
+    max_retries = 2
+
+
+# RESULTS
+
+class RunResult:
+    """
+    The outcome of a single model run
+
+    Variables:
+
+    parameters: keyword arguments the model was built with
+    iteration: which repeat of those parameters this was
+    data: the model's RunStore, holding only the rows collected
+    steps: number of steps run
+    elapsed: seconds the run took
+    error: description of what went wrong, or None
+    scenario: name of the scenario run after a shared burn in
+    snapshot: checkpoint of the model at the end of a burn in
+    cached: whether the result came from a ResultCache
+    profile: time spent in each phase of the step, for timed models
+    """
+
+    def __init__(self, parameters: dict, iteration: int) -> None:
+        self.parameters = parameters
+        self.iteration = iteration
+        self.data = None
+        self.steps = 0
+        self.elapsed = 0
+        self.error = None
+        self.scenario = None
+        self.snapshot = None
+        self.cached = False
+        self.profile = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def dataframe(self):
+        """
+        The collected data as a DataFrame
+        """
+        return self.data.to_dataframe()
+
+
+# FUNCTIONS
+
+def parameter_combinations(
+    variable_parameters=None,
+    fixed_parameters=None
+) -> list:
+    """
+    Every combination of the variable parameter values,
+    each merged with the fixed parameters
+    """
+    variable_parameters = variable_parameters or {}
+    names = list(variable_parameters)
+    combinations = []
+    for values in product(*[variable_parameters[o] for o in names]):
+        parameters = dict(fixed_parameters or {})
+        parameters.update(zip(names, values))
+        combinations.append(parameters)
+    return combinations
+
+
+def run_model(
+    model_cls,
+    parameters: dict,
+    iteration: int,
+    max_steps: int
+) -> RunResult:
+    """
+    Build and run a single model. Called in a worker process.
+
+    Errors raised by the model are caught and returned in the
+    result, so only a crashing interpreter takes down a worker.
+    """
+    result = RunResult(parameters, iteration)
+    start = time.perf_counter()
+    try:
+        complete_run(model_cls(**parameters), max_steps, result)
+    except Exception:
+        result.error = traceback.format_exc()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def complete_run(model, max_steps: int, result: RunResult) -> None:
+    """
+    Step a model to the end of its run and record it in the result
+    """
+    while model.running and model.schedule.steps < max_steps:
+        model.step()
+    if hasattr(model, "close"):
+        model.close()
+    result.steps = model.schedule.steps
+    result.data = model.datacollector.store
+    if getattr(model, "timer", None) is not None:
+        result.profile = model.timer.profile()
+
+
+# RUNNER
+
+class ProcessBatchRunner:
+    """
+    Run every combination of parameters across a pool of
+    worker processes
+
+    Takes the same arguments as mesa's BatchRunner, plus the number
+    of worker processes (all cores by default). Each run returns
+    a compact RunResult rather than the model or its DataCollector.
+
+    If a worker process dies, the runs in flight with it are
+    resubmitted, each to a worker of its own, up to
+    BatchConfig.max_retries times. The rest go on in a new shared pool.
+
+    Given a ResultCache, runs already in the cache are not run again,
+    and new results are added to it.
+
+    Given a SweepManifest, each run's result is recorded in it as it
+    arrives, and runs the manifest already has finished are not run
+    again, so a sweep that dies part way can be restarted or extended.
+    """
+
+    def __init__(
+        self,
+        model_cls,
+        variable_parameters=None,
+        fixed_parameters=None,
+        iterations=1,
+        max_steps=1000,
+        workers=None,
+        display_progress=True,
+        cache=None,
+        manifest=None
+    ) -> None:
+        self.model_cls = model_cls
+        self.runs = [
+            (parameters, iteration)
+            for parameters in parameter_combinations(
+                variable_parameters, fixed_parameters
+            )
+            for iteration in range(iterations)
+        ]
+        self.max_steps = max_steps
+        self.workers = workers
+        self.display_progress = display_progress
+        self.cache = cache
+        self.manifest = manifest
+        self.results = []
+
+    def run_all(self, callback=None) -> list:
+        """
+        Run every model. Return the results in submission order.
+        callback, if given, is called with each result as it arrives.
+        """
+        if self.manifest is not None:
+            self.manifest.plan(self.runs, self.max_steps)
+        results = []
+        tasks = []
+        positions = []
+        for parameters, iteration in self.runs:
+            result = self._previous_result(parameters, iteration)
+            if result is not None:
+                results.append(result)
+                if callback is not None:
+                    callback(result)
+                continue
+            positions.append(len(results))
+            results.append(None)
+            tasks.append((
+                run_model,
+                (self.model_cls, parameters, iteration, self.max_steps),
+                RunResult(parameters, iteration)
+            ))
+        for position, result in zip(
+            positions,
+            self.run_tasks(tasks, partial(self._record, callback))
+        ):
+            results[position] = result
+        self.results = results
+        return results
+
+    def _previous_result(self, parameters: dict, iteration: int):
+        """
+        The result of a run already made, from the manifest
+        or the cache, or None
+        """
+        result = None
+        if self.manifest is not None:
+            result = self.manifest.load(parameters, iteration, self.max_steps)
+        if result is None and self.cache is not None:
+            result = self.cache.fetch(
+                self.model_cls, parameters, self.max_steps
+            )
+            if result is not None:
+                result.iteration = iteration
+                if self.manifest is not None:
+                    self.manifest.record(result, self.max_steps)
+        return result
+
+    def _record(self, callback, result: RunResult) -> None:
+        """
+        Keep a new result in the cache and manifest as it arrives
+        """
+        if self.cache is not None:
+            self.cache.save(self.model_cls, result, self.max_steps)
+        if self.manifest is not None:
+            self.manifest.record(result, self.max_steps)
+        if callback is not None:
+            callback(result)
+
+    def run_tasks(self, tasks: list, callback=None) -> list:
+        """
+        Run a list of (function, arguments, placeholder) tasks across
+        the pool, where each function returns a RunResult.
+        The placeholder RunResult is reported, with an error, if the
+        task fails without one.
+        Return the results in task order.
+        """
+        results = [None] * len(tasks)
+        attempts = [0] * len(tasks)
+        with tqdm(
+            total=len(tasks),
+            disable=not self.display_progress
+        ) as progress:
+            finish = partial(self._finish, results, progress, callback)
+            pending = list(range(len(tasks)))
+            while pending:
+                with ProcessPoolExecutor(self.workers) as pool:
+                    lost, pending = self._run_in(
+                        pool, tasks, pending, finish
+                    )
+                # A dead worker breaks the whole pool, taking every run
+                # in flight with it. Rerun those in pools of their own
+                # to pin the crash on the run that caused it, then go
+                # back to a shared pool for the runs not yet started.
+                while lost:
+                    retry = []
+                    for index in self._run_isolated(tasks, lost, finish):
+                        attempts[index] += 1
+                        if attempts[index] > BatchConfig.max_retries:
+                            result = tasks[index][2]
+                            result.error = "Worker process died"
+                            finish(index, result)
+                        else:
+                            retry.append(index)
+                    lost = retry
+        return results
+
+    def _width(self) -> int:
+        """
+        The number of runs to have in flight at once
+        """
+        return self.workers or os.cpu_count() or 1
+
+    def _run_in(self, pool, tasks, indices, finish) -> tuple:
+        """
+        Run the given tasks in a pool, with no more in flight than
+        it has workers, so a dead worker only takes those with it.
+        Stop submitting once the pool breaks.
+        Return the tasks lost with it, and those not yet submitted.
+        """
+        queue = deque(indices)
+        futures = {}
+        lost = []
+        while queue or futures:
+            while queue and not lost and len(futures) < self._width():
+                function, arguments, _ = tasks[queue[0]]
+                try:
+                    future = pool.submit(function, *arguments)
+                except BrokenProcessPool:
+                    break
+                futures[future] = queue.popleft()
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            lost.extend(self._collect(
+                tasks, {o: futures.pop(o) for o in done}, finish
+            ))
+        return sorted(lost), list(queue)
+
+    def _run_isolated(self, tasks, indices, finish) -> list:
+        """
+        Run each task in a single worker pool of its own,
+        up to the number of workers at a time.
+        Return the ones whose worker died.
+        """
+        lost = []
+        batch_size = self._width()
+        for start in range(0, len(indices), batch_size):
+            pools = []
+            futures = {}
+            try:
+                for index in indices[start:start + batch_size]:
+                    pools.append(ProcessPoolExecutor(1))
+                    function, arguments, _ = tasks[index]
+                    futures[pools[-1].submit(function, *arguments)] = index
+                lost.extend(self._collect(tasks, futures, finish))
+            finally:
+                for pool in pools:
+                    pool.shutdown()
+        return lost
+
+    @staticmethod
+    def _collect(tasks: list, futures: dict, finish) -> list:
+        """
+        Finish each task as it completes.
+        Return the ones lost to a dead worker.
+        """
+        lost = []
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                lost.append(index)
+                continue
+            except Exception:
+                result = tasks[index][2]
+                result.error = traceback.format_exc()
+            finish(index, result)
+        return sorted(lost)
+
+    @staticmethod
+    def _finish(results, progress, callback, index, result) -> None:
+        results[index] = result
+        progress.update()
+        if callback is not None:
+            callback(result)
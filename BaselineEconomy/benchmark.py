@@ -0,0 +1,310 @@
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import json
+import platform
+import subprocess
+import time
+import mesa
+import numpy as np
+from . import model as economy
+from .model import BaselineEconomyModel, distribution_reporters
+from .schedule import Scheduler
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# CONFIG
+
+class BenchmarkConfig:
+    """
+    Settings for the benchmark suite
+    """
+
+    # (households, firms) of each population benchmarked
+    sizes = ((1000, 100), (10000, 1000), (100000, 10000))
+
+    # Run lengths benchmarked, in months
+    months = (1, 100, 1000)
+
+    # Times each reporter is evaluated when it is timed on its own
+    reporter_repeats = 20
+
+    # Months run before reporters are timed, so the economy
+    # is no longer in its initial state
+    reporter_warm_up = 1
+
+    seed = 0
+
+    # Starting liquidity, prices and wages of every benchmarked
+    # economy. The model's defaults are all zero, which leaves
+    # nothing to trade.
+    parameters = {
+        "household_liquidity": 3100,
+        "firm_goods_price": 25,
+        "firm_wage_rate": 68,
+    }
+
+    # Phases of the month end
+    month_end_phases = (
+        "pay_wages",
+        "calculate_shareholdings",
+        "distribute_profits",
+        "households_month_end",
+    )
+
+    # Reporters in model.py that scan every agent on each call
+    scan_reporters = (
+        "count_employed",
+        "count_notice",
+        "count_poverty",
+        "percent_unsatisfied_demand",
+        "sum_expected_demand",
+        "sum_hh_savings",
+        "sum_hh_liquidity",
+        "sum_firm_liquidity",
+        "sum_liquidity",
+        "sum_inventory",
+        "average_goods_price",
+        "average_wage_rate",
+        "compute_gini",
+    )
+
+
+# BENCHMARKS
+
+def peak_memory() -> int:
+    """
+    Peak resident memory of this process in bytes, or None
+    where the platform does not report it
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def benchmark_run(
+    households: int,
+    firms: int,
+    months: int,
+    engine: str = "object"
+) -> dict:
+    """
+    Time building a model and running it for a number of months,
+    collecting the standard reporters every day.
+    Best run in a fresh process, so peak memory is the run's own.
+    """
+    memory_before = peak_memory()
+    start = time.perf_counter()
+    model = BaselineEconomyModel(
+        households,
+        firms,
+        seed=BenchmarkConfig.seed,
+        engine=engine,
+        timing=True,
+        max_steps=months * 21,
+        **BenchmarkConfig.parameters
+    )
+    init_seconds = time.perf_counter() - start
+    for _ in range(months * model.month_length):
+        model.step()
+    profile = model.timer.profile()
+    step_seconds = profile["step"]["seconds"]
+    collect = profile["collect_data"]
+    memory_after = peak_memory()
+    return {
+        "households": households,
+        "firms": firms,
+        "months": months,
+        "engine": engine,
+        "init_seconds": init_seconds,
+        "steps": model.schedule.steps,
+        "steps_per_second": model.schedule.steps / step_seconds,
+        "month_end_seconds": sum(
+            profile[name]["seconds"]
+            for name in BenchmarkConfig.month_end_phases
+        ) / months,
+        "collection_seconds": collect["seconds"] / collect["calls"],
+        "collection_share": collect["share"],
+        "peak_memory_bytes": (
+            None if memory_after is None
+            else memory_after - memory_before
+        ),
+        "phases": {
+            name: {
+                "seconds": phase["seconds"],
+                "calls": phase["calls"],
+                "mean_seconds": (
+                    phase["seconds"] / phase["calls"]
+                    if phase["calls"] else None
+                ),
+            }
+            for name, phase in profile.items()
+        },
+    }
+
+
+def time_call(function, repeats: int) -> float:
+    """
+    Mean seconds taken by a call to function
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_reporters(
+    households: int,
+    firms: int,
+    engine: str = "object",
+    repeats: int = BenchmarkConfig.reporter_repeats
+) -> dict:
+    """
+    Mean seconds to evaluate each reporter on its own,
+    and every standard reporter in one collection
+    """
+    model = BaselineEconomyModel(
+        households,
+        firms,
+        seed=BenchmarkConfig.seed,
+        engine=engine,
+        reporters=(
+            list(economy.fused_model_reporters) +
+            list(distribution_reporters())
+        ),
+        collection="on_demand",
+        **BenchmarkConfig.parameters
+    )
+    for _ in range(BenchmarkConfig.reporter_warm_up * model.month_length):
+        model.step()
+    collector = model.datacollector
+    fused = {
+        name: time_call(
+            lambda: collector.evaluate(model, [name]), repeats
+        )
+        for name in collector.fused_reporters
+    }
+    standard = list(economy.fused_model_reporters)
+    fused["All standard"] = time_call(
+        lambda: collector.evaluate(model, standard), repeats
+    )
+    scan = {
+        name: time_call(
+            lambda: getattr(economy, name)(model), repeats
+        )
+        for name in BenchmarkConfig.scan_reporters
+    }
+    return {
+        "households": households,
+        "firms": firms,
+        "engine": engine,
+        "fused": fused,
+        "scan": scan,
+    }
+
+
+# SUITE
+
+def commit() -> str:
+    """
+    The git commit being benchmarked, or None outside a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            universal_newlines=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def in_fresh_process(function, *arguments):
+    """
+    Call a function in a worker process of its own
+    """
+    with ProcessPoolExecutor(1) as pool:
+        return pool.submit(function, *arguments).result()
+
+
+def run_suite(
+    sizes=BenchmarkConfig.sizes,
+    months=BenchmarkConfig.months,
+    engines=("object",),
+    reporters=True,
+    progress=None
+) -> dict:
+    """
+    Benchmark every combination of size, run length and engine,
+    each in a fresh process, plus the reporters at each size.
+    progress, if given, is called with each result as it arrives.
+    """
+    results = {
+        "commit": commit(),
+        "created": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "mesa": mesa.__version__,
+        "machine": platform.platform(),
+        "scheduler_phases": list(Scheduler.phases),
+        "runs": [],
+        "reporters": [],
+    }
+    for engine in engines:
+        for households, firms in sizes:
+            for length in months:
+                run = in_fresh_process(
+                    benchmark_run, households, firms, length, engine
+                )
+                results["runs"].append(run)
+                if progress is not None:
+                    progress(run)
+            if reporters:
+                timings = in_fresh_process(
+                    benchmark_reporters, households, firms, engine
+                )
+                results["reporters"].append(timings)
+                if progress is not None:
+                    progress(timings)
+    return results
+
+
+def save_results(results: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """
+    Speed up of each run benchmarked in both, as
+    (households, firms, months, engine, speed up)
+    where the speed up is the ratio of steps per second
+    """
+    def by_case(results):
+        return {
+            (o["households"], o["firms"], o["months"], o["engine"]): o
+            for o in results["runs"]
+        }
+
+    before = by_case(baseline)
+    after = by_case(current)
+    return [
+        case + (
+            after[case]["steps_per_second"] /
+            before[case]["steps_per_second"],
+        )
+        for case in before
+        if case in after
+    ]
@@ -0,0 +1,217 @@
+from functools import lru_cache, partial
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import mesa
+import numpy as np
+from .batch import RunResult, run_model
+
+
+# CONFIG
+
+class CacheConfig:
+    """
+    Settings for the run result cache
+    """
+
+    directory = os.path.join(
+        os.path.expanduser("~"), ".cache", "baseline-economy"
+    )
+
+    # Least recently used results are removed once the cache
+    # grows beyond this
+    max_bytes = 1 << 30
+
+    # Parameters that do not change what a run produces
+    ignored_parameters = ("output", "checkpoint", "checkpoint_interval")
+
+
+# FUNCTIONS
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Hash of the model source code and the libraries that
+    drive its random numbers
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(package):
+        dirs[:] = sorted(o for o in dirs if o not in ("tests", "__pycache__"))
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, package).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    digest.update(mesa.__version__.encode())
+    digest.update(np.__version__.encode())
+    return digest.hexdigest()
+
+
+def run_key(model_cls, parameters: dict, max_steps: int):
+    """
+    Hash identifying what a run produces, or None if it cannot be
+    cached because it is not seeded
+    """
+    if parameters.get("seed") is None:
+        return None
+    significant = {
+        name: value for name, value in parameters.items()
+        if name not in CacheConfig.ignored_parameters
+    }
+    output = parameters.get("output")
+    description = json.dumps(
+        {
+            "model": model_cls.__module__ + "." + model_cls.__qualname__,
+            "parameters": significant,
+            "output": None if output is None else _extension(output),
+            "max_steps": max_steps,
+            "code": code_version(),
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def _extension(path: str) -> str:
+    return os.path.splitext(path)[1]
+
+
+def _dump(result: RunResult, path: str) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+
+
+# CACHE
+
+class ResultCache:
+    """
+    Run results stored on disk under a hash of the model, its
+    parameters, the run length and the model code version
+
+    Each entry is the pickled RunResult and, for runs streamed to
+    an output file, a copy of that file, which is put back in place
+    when the entry is used. The least recently used entries are
+    removed once the cache grows beyond max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory=CacheConfig.directory,
+        max_bytes=CacheConfig.max_bytes
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def fetch(self, model_cls, parameters: dict, max_steps: int):
+        """
+        The cached result of a run, or None
+        """
+        key = run_key(model_cls, parameters, max_steps)
+        if key is None:
+            return None
+        path = self._path(key, ".result")
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        output = parameters.get("output")
+        if output is not None:
+            copy = self._path(key, ".output")
+            if not os.path.exists(copy):
+                return None
+            shutil.copyfile(copy, output.format(**parameters))
+            os.utime(copy)
+        os.utime(path)
+        result.parameters = parameters
+        result.cached = True
+        return result
+
+    def save(self, model_cls, result: RunResult, max_steps: int) -> None:
+        """
+        Store a successful run's result
+        """
+        key = run_key(model_cls, result.parameters, max_steps)
+        if key is None or not result.ok:
+            return
+        output = result.parameters.get("output")
+        if output is not None:
+            self._replace(
+                self._path(key, ".output"),
+                lambda path: shutil.copyfile(
+                    output.format(**result.parameters), path
+                )
+            )
+        self._replace(self._path(key, ".result"), partial(_dump, result))
+        self.evict()
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        """
+        Write a file in one step, so a reader never sees part of it
+        """
+        partial_path = path + ".partial"
+        write(partial_path)
+        os.replace(partial_path, path)
+
+    def run(self, model_cls, parameters: dict, max_steps: int) -> RunResult:
+        """
+        The result of a run, from the cache if possible
+        """
+        result = self.fetch(model_cls, parameters, max_steps)
+        if result is None:
+            result = run_model(model_cls, parameters, 0, max_steps)
+            self.save(model_cls, result, max_steps)
+        return result
+
+    def entries(self) -> list:
+        """
+        (last used, size, key) for every entry, oldest first
+        """
+        entries = {}
+        for name in os.listdir(self.directory):
+            key, suffix = os.path.splitext(name)
+            if suffix not in (".result", ".output"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            used, size = entries.get(key, (0, 0))
+            entries[key] = (max(used, stat.st_mtime), size + stat.st_size)
+        return sorted(
+            (used, size, key) for key, (used, size) in entries.items()
+        )
+
+    def size(self) -> int:
+        return sum([size for _, size, _ in self.entries()])
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache
+        fits in max_bytes
+        """
+        entries = self.entries()
+        total = sum([size for _, size, _ in entries])
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+
+    def remove(self, key: str) -> None:
+        for suffix in (".result", ".output"):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        for _, _, key in self.entries():
+            self.remove(key)
@@ -0,0 +1,150 @@
+import io
+import os
+import pickle
+import zlib
+from functools import lru_cache
+from .agent import EconomyAgent, slot_names
+
+
+# CONFIG
+
+class CheckpointConfig:
+    """
+    Settings for model checkpoints
+    """
+
+    # zlib level. Low levels are several times faster than the
+    # default and still shrink a checkpoint to a fraction of its size.
+    compression_level = 1
+
+    # Start of every checkpoint file, with the format version
+    header = b"BASELINE-ECONOMY-CHECKPOINT 1\n"
+
+
+# FUNCTIONS
+
+def dumps(model) -> bytes:
+    """
+    The full state of a model as compressed bytes
+    """
+    agents = _agents(model)
+    buffer = io.BytesIO()
+    pickle.dump(
+        [type(o) for o in agents],
+        buffer,
+        protocol=pickle.HIGHEST_PROTOCOL
+    )
+    pickler = _AgentPickler(buffer, agents)
+    pickler.dump((model, [_state(o) for o in agents]))
+    return CheckpointConfig.header + zlib.compress(
+        buffer.getvalue(),
+        CheckpointConfig.compression_level
+    )
+
+
+def loads(data: bytes):
+    """
+    Rebuild a model from the bytes made by dumps
+    """
+    header = CheckpointConfig.header
+    if not data.startswith(header):
+        raise ValueError("Not a baseline economy checkpoint")
+    buffer = io.BytesIO(zlib.decompress(data[len(header):]))
+    agents = [cls.__new__(cls) for cls in pickle.load(buffer)]
+    model, states = _AgentUnpickler(buffer, agents).load()
+    for agent, state in zip(agents, states):
+        for name, value in state.items():
+            setattr(agent, name, value)
+    return model
+
+
+def _state(agent) -> dict:
+    """
+    The attributes an agent has set, from its slots and any __dict__
+    """
+    state = {
+        name: getattr(agent, name)
+        for name in _slots(type(agent))
+        if hasattr(agent, name)
+    }
+    state.update(getattr(agent, "__dict__", {}))
+    return state
+
+
+@lru_cache(maxsize=None)
+def _slots(cls) -> tuple:
+    return slot_names(cls)
+
+
+def _agents(model) -> list:
+    """
+    Every agent object in the model
+    """
+    agents = list(model.firms)
+    if model.engine == "object":
+        agents.extend(model.households)
+    return agents
+
+
+class _AgentPickler(pickle.Pickler):
+    """
+    Pickle agents by their position in the agent list.
+
+    Agents refer to each other through employers, workers and
+    suppliers. Pickling them in place follows those chains agent by
+    agent and soon runs out of stack, so their states are pickled
+    separately, each one referring to the others by position.
+    """
+
+    def __init__(self, file, agents: list) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.positions = {id(o): i for i, o in enumerate(agents)}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, EconomyAgent):
+            return self.positions.get(id(obj))
+        return None
+
+
+class _AgentUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, agents: list) -> None:
+        super().__init__(file)
+        self.agents = agents
+
+    def persistent_load(self, position: int):
+        return self.agents[position]
+
+
+def save_checkpoint(model, path: str) -> None:
+    """
+    Save the full state of a model to a file.
+
+    Any data waiting to be streamed to the model's output is written
+    first. The file is replaced in one step, so an interruption leaves
+    the previous checkpoint intact.
+    """
+    if model.output is not None:
+        model.output.write(model.datacollector.store)
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        f.write(dumps(model))
+    os.replace(partial, path)
+
+
+def load_checkpoint(path: str, output=None):
+    """
+    Resume a model from a checkpoint file.
+
+    Stepping the resumed model gives exactly the same results as the
+    original run would have. Data collected after the checkpoint is
+    streamed to output if given, which may name model parameters in
+    braces, and otherwise kept in memory along with the data collected
+    before it.
+    Reporters added with add_fused_reporter are not kept.
+    """
+    with open(path, "rb") as f:
+        model = loads(f.read())
+    if output is not None:
+        model.start_output(output.format(**model.parameters))
+    return model
@@ -0,0 +1,152 @@
+from functools import partial
+import numpy as np
+from .distribution import distribution
+from .reporters import Distribution, FusedReporter, ModelValue
+
+
+# INDEX
+
+class CustomerIndex:
+    """
+    The customers of each firm: the households that count it among
+    their preferred suppliers, the reverse of the "Type A" links.
+
+    Kept up to date as households take on and drop suppliers, so
+    questions about a firm's customers need no pass over the
+    households. Customers are held in the order they took the firm on.
+
+    Variables:
+
+    customers: insertion ordered dict of the customers of each firm
+    """
+
+    def __init__(self, firms: list) -> None:
+        self.customers = {firm: {} for firm in firms}
+
+    def add(self, household, firm) -> None:
+        self.customers[firm][household] = None
+
+    def remove(self, household, firm) -> None:
+        del self.customers[firm][household]
+
+    def of(self, firm) -> list:
+        """
+        The households exposed if the firm runs out of stock
+        """
+        return list(self.customers[firm])
+
+    def counts(self, firms: list) -> np.ndarray:
+        return np.array(
+            [len(self.customers[o]) for o in firms],
+            dtype=np.int64
+        )
+
+    def demand(self, firms: list) -> np.ndarray:
+        """
+        Total daily demand of the customers of each firm.
+        Households have no demand before they first plan consumption.
+        """
+        return np.array(
+            [
+                sum([
+                    getattr(hh, "current_demand", 0)
+                    for hh in self.customers[o]
+                ])
+                for o in firms
+            ],
+            dtype=float
+        )
+
+
+class ArrayCustomerIndex:
+    """
+    CustomerIndex for the HouseholdArrays population of a model,
+    read straight from its matrix of preferred suppliers
+    """
+
+    def __init__(self, model) -> None:
+        self.model = model
+
+    @property
+    def households(self):
+        return self.model.households
+
+    def of(self, firm) -> list:
+        households = self.households
+        rows = np.flatnonzero(
+            (households.preferred_suppliers ==
+             households.firm_index(firm)).any(axis=1)
+        )
+        return [households[i] for i in rows.tolist()]
+
+    def counts(self, firms: list) -> np.ndarray:
+        return np.bincount(
+            self.households.preferred_suppliers.ravel(),
+            minlength=len(firms)
+        )
+
+    def demand(self, firms: list) -> np.ndarray:
+        suppliers = self.households.preferred_suppliers
+        return np.bincount(
+            suppliers.ravel(),
+            weights=np.repeat(
+                self.households.current_demand, suppliers.shape[1]
+            ),
+            minlength=len(firms)
+        )
+
+
+# FUNCTIONS
+
+def customer_counts(model) -> np.ndarray:
+    """
+    Number of customers of each firm, from the model's customer index,
+    or from a pass over the households where it has none
+    """
+    if model.customers is not None:
+        return model.customers.counts(model.firms)
+    positions = model.firm_positions
+    return np.bincount(
+        [positions[o] for hh in model.households
+         for o in hh.preferred_suppliers],
+        minlength=len(model.firms)
+    )
+
+
+def workforce_size(firm) -> int:
+    return len(firm.workers)
+
+
+def customer_distribution(model):
+    return distribution(customer_counts(model))
+
+
+def finish_customer_quantile(q: float, model, results) -> float:
+    return results["customers"].quantile(q)
+
+
+def finish_workforce_quantile(q: float, model, results) -> float:
+    return results["workers"].quantile(q)
+
+
+# REPORTERS
+
+def firm_size_reporters() -> dict:
+    """
+    Reporters on the distribution of customers and workers across
+    the firms: "Customers P10", "P50", "P90" and "Max", and the same
+    for "Workers"
+    """
+    customers = {"customers": ModelValue(customer_distribution)}
+    workers = {"workers": Distribution(workforce_size)}
+    reporters = {}
+    for label, q in (("P10", 0.1), ("P50", 0.5), ("P90", 0.9), ("Max", 1)):
+        reporters["Customers " + label] = FusedReporter(
+            partial(finish_customer_quantile, q),
+            model=customers
+        )
+        reporters["Workers " + label] = FusedReporter(
+            partial(finish_workforce_quantile, q),
+            firms=workers
+        )
+    return reporters
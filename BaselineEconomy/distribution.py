@@ -0,0 +1,375 @@
+import math
+import numpy as np
+
+
+# CONFIG
+
+class DistributionConfig:
+    """
+    Settings for the liquidity distribution statistics
+    """
+
+    # Largest relative error of any value held in a histogram.
+    # Quantiles and top shares are then out by at most this fraction
+    # of their value, and the Gini by at most this much.
+    relative_error = 0.005
+
+
+# DISTRIBUTIONS
+
+class LiquidityHistogram:
+    """
+    Bucketed histogram of non-negative amounts of money
+
+    Zero is counted exactly. A positive value falls in the bucket of
+    exponent e, which holds values in [g**e, g**(e+1)) where
+    g = 1 + 2 * relative_error, and is taken to be
+    g**e * (1 + relative_error). That is within relative_error of the
+    true value, however small: the buckets reach below 1 as far as the
+    values do. The total is kept exactly.
+
+    With every value out by at most relative_error of itself:
+
+        quantiles are within relative_error of the exact value, as a
+        fraction of it
+        top shares are within relative_error of the exact share, as a
+        fraction of it
+        the Gini is within relative_error of the exact figure as an
+        absolute difference, not as a fraction of the Gini. The sum of
+        absolute differences between pairs is out by at most
+        relative_error times 2N times the total, and the Gini is that
+        sum over 2N times the total.
+
+    Histograms of the same relative_error can be merged, so a
+    population can be counted in parts.
+
+    Variables:
+
+    zeros: number of values that are zero
+    lowest: exponent of the first bucket in counts
+    counts: number of positive values in each bucket, from lowest up
+    """
+
+    # Bucket of the values that are zero
+    zero_bucket = np.iinfo(np.int64).min
+
+    def __init__(self, relative_error=DistributionConfig.relative_error):
+        if not 0 < relative_error < 0.5:
+            raise ValueError(
+                "relative_error must be between 0 and 0.5: {0}"
+                .format(relative_error)
+            )
+        self.relative_error = relative_error
+        self.growth = 1 + 2 * relative_error
+        self.zeros = 0
+        self.lowest = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.total = 0
+
+    @property
+    def count(self) -> int:
+        return self.zeros + self.counts.sum().item()
+
+    def bucket(self, values: np.ndarray) -> np.ndarray:
+        """
+        The exponent of the bucket each value falls in,
+        or zero_bucket for zero
+        """
+        values = np.asarray(values, dtype=float)
+        if (values < 0).any():
+            raise ValueError("Negative values cannot be bucketed")
+        buckets = np.full(values.shape, self.zero_bucket, dtype=np.int64)
+        positive = values > 0
+        buckets[positive] = np.floor(
+            np.log(values[positive]) / math.log(self.growth)
+        ).astype(np.int64)
+        return buckets
+
+    def representatives(self) -> np.ndarray:
+        """
+        The value that stands for every member of each bucket in counts
+        """
+        return (
+            self.growth ** np.arange(
+                self.lowest, self.lowest + len(self.counts)
+            ) * (1 + self.relative_error)
+        )
+
+    def add(self, values) -> None:
+        """
+        Count a batch of values
+        """
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        self._add_buckets(self.bucket(values).ravel())
+        self.total += values.sum().item()
+
+    def merge(self, other: "LiquidityHistogram") -> None:
+        """
+        Count every value in another histogram
+        """
+        if other.relative_error != self.relative_error:
+            raise ValueError("Histograms have different bucket sizes")
+        self.zeros += other.zeros
+        self._add_counts(other.lowest, other.counts)
+        self.total += other.total
+
+    def _add_buckets(self, buckets: np.ndarray, sign: int = 1) -> None:
+        """
+        Count, or with a sign of -1 uncount, a value in each bucket
+        """
+        zero = buckets == self.zero_bucket
+        self.zeros += sign * np.count_nonzero(zero)
+        exponents = buckets[~zero]
+        if exponents.size:
+            lowest = exponents.min()
+            self._add_counts(
+                lowest.item(), sign * np.bincount(exponents - lowest)
+            )
+
+    def _add_counts(self, lowest: int, counts: np.ndarray) -> None:
+        if not len(counts):
+            return
+        if not len(self.counts):
+            self.lowest = lowest
+        start = min(self.lowest, lowest)
+        end = max(self.lowest + len(self.counts), lowest + len(counts))
+        if start < self.lowest or end > self.lowest + len(self.counts):
+            grown = np.zeros(end - start, dtype=np.int64)
+            offset = self.lowest - start
+            grown[offset:offset + len(self.counts)] = self.counts
+            self.counts = grown
+            self.lowest = start
+        offset = lowest - self.lowest
+        self.counts[offset:offset + len(counts)] += counts
+
+    def _buckets(self) -> (np.ndarray, np.ndarray):
+        """
+        Counts of every bucket, zero first, with the value standing
+        for the members of each
+        """
+        return (
+            np.r_[self.zeros, self.counts],
+            np.r_[0.0, self.representatives()]
+        )
+
+    def gini(self) -> float:
+        """
+        Gini coefficient of the values counted
+        """
+        N = self.count
+        if N == 0 or self.total == 0:
+            return 0
+        counts, values = self._buckets()
+        approximate_total = (counts * values).sum()
+        if approximate_total == 0:
+            return 0
+        # Sum of (N - rank) over the ranks covered by each bucket
+        first_rank = np.cumsum(counts) - counts
+        weights = (
+            counts * N - counts * first_rank - counts * (counts - 1) / 2
+        )
+        B = (values * weights).sum() / (N * approximate_total)
+        return (
+            (1 + (1 / N) - 2 * B) * approximate_total / self.total
+        ).item()
+
+    def quantile(self, q: float) -> float:
+        """
+        Value at rank q * (N - 1) when sorted
+        """
+        N = self.count
+        if N == 0:
+            return 0
+        rank = int(q * (N - 1))
+        counts, values = self._buckets()
+        bucket = np.searchsorted(np.cumsum(counts), rank, side="right")
+        return values[bucket].item()
+
+    def top_share(self, fraction: float) -> float:
+        """
+        Share of the total held by the top fraction of values
+        """
+        N = self.count
+        if N == 0 or self.total == 0:
+            return 0
+        remaining = int(round(N * fraction))
+        counts, values = self._buckets()
+        held = 0
+        for bucket in np.flatnonzero(counts)[::-1]:
+            if remaining <= 0:
+                break
+            taken = min(remaining, counts[bucket])
+            held += taken * values[bucket]
+            remaining -= taken
+        return (held / self.total).item()
+
+
+class LiquidityTracker(LiquidityHistogram):
+    """
+    LiquidityHistogram of a fixed population, kept up to date as the
+    value of each member changes instead of being rebuilt
+
+    Members are numbered from 0. The value and bucket of each are
+    held, so a change moves at most one count between buckets and
+    needs no pass over the population. Single changes are queued and
+    applied in one vectorised batch when the queue is as long as the
+    population, or before any query.
+
+    Variables:
+
+    values: the value of each member
+    buckets: the bucket each member is counted in
+    """
+
+    def __init__(
+        self,
+        values,
+        relative_error=DistributionConfig.relative_error
+    ) -> None:
+        super().__init__(relative_error)
+        self.values = np.array(values, dtype=float)
+        self.buckets = self.bucket(self.values)
+        self._add_buckets(self.buckets)
+        self.total = self.values.sum().item()
+        self._members = []
+        self._changes = []
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    def update(self, member: int, value) -> None:
+        """
+        Count a member at its new value
+        """
+        if value < 0:
+            raise ValueError("Negative values cannot be bucketed")
+        self._members.append(member)
+        self._changes.append(value)
+        if len(self._members) >= len(self.values):
+            self.flush()
+
+    def update_many(self, members, values) -> None:
+        """
+        Count several distinct members at their new values
+        """
+        self.flush()
+        self._apply(
+            np.asarray(members, dtype=np.int64),
+            np.asarray(values, dtype=float)
+        )
+
+    def flush(self) -> None:
+        """
+        Apply the queued changes. Only the latest value of a member
+        changed more than once counts.
+        """
+        if not self._members:
+            return
+        members = np.array(self._members, dtype=np.int64)[::-1]
+        values = np.array(self._changes, dtype=float)[::-1]
+        self._members = []
+        self._changes = []
+        members, latest = np.unique(members, return_index=True)
+        self._apply(members, values[latest])
+
+    def _apply(self, members: np.ndarray, values: np.ndarray) -> None:
+        if members.size == 0:
+            return
+        buckets = self.bucket(values)
+        self.total += (values - self.values[members]).sum().item()
+        self.values[members] = values
+        moved = buckets != self.buckets[members]
+        if moved.any():
+            self._add_buckets(self.buckets[members[moved]], -1)
+            self._add_buckets(buckets[moved])
+            self.buckets[members[moved]] = buckets[moved]
+
+    def gini(self) -> float:
+        self.flush()
+        return super().gini()
+
+    def quantile(self, q: float) -> float:
+        self.flush()
+        return super().quantile(q)
+
+    def top_share(self, fraction: float) -> float:
+        self.flush()
+        return super().top_share(fraction)
+
+
+class ExactDistribution:
+    """
+    Every value kept and sorted.
+    Has the same queries as LiquidityHistogram, to validate it against.
+    """
+
+    relative_error = None
+
+    def __init__(self) -> None:
+        self.values = np.zeros(0)
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    @property
+    def total(self) -> float:
+        return self.values.sum().item()
+
+    def add(self, values) -> None:
+        self.values = np.sort(np.concatenate([
+            self.values, np.asarray(values, dtype=float).ravel()
+        ]))
+
+    def merge(self, other: "ExactDistribution") -> None:
+        self.add(other.values)
+
+    def gini(self) -> float:
+        return gini_coefficient(self.values)
+
+    def quantile(self, q: float) -> float:
+        N = self.count
+        if N == 0:
+            return 0
+        return self.values[int(q * (N - 1))].item()
+
+    def top_share(self, fraction: float) -> float:
+        N = self.count
+        total = self.total
+        if N == 0 or total == 0:
+            return 0
+        top = int(round(N * fraction))
+        if top == 0:
+            return 0
+        return (self.values[N - top:].sum() / total).item()
+
+
+# FUNCTIONS
+
+def gini_coefficient(values: np.ndarray) -> float:
+    """
+    Vectorised version of the gini calculation in compute_gini
+    """
+    x = np.sort(values)
+    N = len(x)
+    total = x.sum()
+    if N == 0 or total == 0:
+        return 0
+    B = (x * (N - np.arange(N))).sum() / (N * total)
+    return (1 + (1 / N) - 2 * B).item()
+
+
+def distribution(values, relative_error=None):
+    """
+    Distribution of the values: exact if relative_error is None,
+    otherwise a LiquidityHistogram with that error bound
+    """
+    if relative_error is None:
+        result = ExactDistribution()
+    else:
+        result = LiquidityHistogram(relative_error)
+    result.add(values)
+    return result
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+# CONFIG
+
+class DividendConfig:
+    """
+    Tuning Settings for the month end profit distribution
+    """
+
+    # Largest number of firm x holding dividends calculated at once
+    block_elements = 1 << 20
+
+
+# FUNCTIONS
+
+def pay_dividends(
+    dividend_per_share: np.ndarray,
+    holdings: np.ndarray
+) -> (np.ndarray, np.ndarray):
+    """
+    Work out every firm's dividends to every holder in one pass.
+
+    Each firm pays each holder their holding times the firm's dividend
+    per share, rounded down to the nearest integer value, exactly as
+    BaselineEconomyFirm.distribute_to_households does.
+
+    Return the total paid by each firm and the total received
+    by each holder.
+
+    Holders with the same holding receive the same dividend, so the
+    rounding is only worked out once per distinct holding. A firm
+    pays a whole unit only to holdings of at least one over its
+    dividend per share, which are the largest ones, so only those
+    firm and holding pairs are worked out. They are summed into the
+    firm and holding totals with bincount, in bounded blocks. The work
+    grows with the number of dividends paid, not with firms times
+    holders.
+    """
+    paid = np.zeros(len(dividend_per_share))
+    paying = np.flatnonzero(dividend_per_share > 0)
+    if not len(paying):
+        return paid, np.zeros(len(holdings))
+    values, inverse, counts = np.unique(
+        holdings,
+        return_inverse=True,
+        return_counts=True
+    )
+    dividends = dividend_per_share[paying]
+    first = first_paid_holding(dividends, values)
+    firms = paying[first < len(values)]
+    first = first[first < len(values)]
+    sizes = len(values) - first
+    per_value = np.zeros(len(values))
+    block = 0
+    while block < len(firms):
+        # Whole firms, up to block_elements pairs unless one is bigger
+        end = block + max(1, np.searchsorted(
+            np.cumsum(sizes[block:]), DividendConfig.block_elements,
+            side="right"
+        ))
+        pairs = sizes[block:end]
+        firm = np.repeat(np.arange(block, end), pairs)
+        value = (
+            np.arange(pairs.sum()) -
+            np.repeat(np.cumsum(pairs) - pairs, pairs) +
+            first[firm]
+        )
+        amounts = np.floor(dividend_per_share[firms[firm]] * values[value])
+        paid[firms[block:end]] = np.bincount(
+            firm - block, weights=amounts * counts[value],
+            minlength=end - block
+        )
+        per_value += np.bincount(
+            value, weights=amounts, minlength=len(values)
+        )
+        block = end
+    return paid, per_value[inverse.ravel()]
+
+
+def first_paid_holding(
+    dividend_per_share: np.ndarray,
+    values: np.ndarray
+) -> np.ndarray:
+    """
+    Index of the smallest of the sorted holding values that earns
+    at least a whole unit at each dividend per share, or the number
+    of values if none does
+    """
+    first = np.searchsorted(values, 1 / dividend_per_share)
+    # 1 / dividend_per_share can be out by a rounding error either
+    # way, so settle on the exact products
+    while True:
+        lower = first > 0
+        lower[lower] = (
+            values[first[lower] - 1] * dividend_per_share[lower] >= 1
+        )
+        higher = first < len(values)
+        higher[higher] = (
+            values[first[higher]] * dividend_per_share[higher] < 1
+        )
+        if not (lower.any() or higher.any()):
+            return first
+        first = first - lower + higher
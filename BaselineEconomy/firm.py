@@ -1,4 +1,4 @@
-from mesa import Agent
+from .agent import EconomyAgent, flag
 from random import Random
 import math
 from typing import List, Tuple
@@ -92,7 +92,66 @@ def price_adjustment(rand_generator: Random) -> float:
     return rand_generator.uniform(0, FirmConfig.upsilon)
 
 
-class BaselineEconomyFirm(Agent):
+# WORKFORCE
+
+class Workforce:
+    """
+    The workers of a firm, in the order they were hired
+
+    Held in an insertion ordered dict, so hiring, quitting and
+    membership tests take constant time while iteration and indexing
+    follow the order a list would. Indexing, as random.choice does,
+    builds that list once after each change of membership.
+
+    The total labour power of the workers is kept until the members
+    or the labour supply change.
+    """
+
+    def __init__(self, workers=()) -> None:
+        self._members = dict.fromkeys(workers)
+        self._changed()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __contains__(self, worker) -> bool:
+        return worker in self._members
+
+    def __getitem__(self, index):
+        if self._order is None:
+            self._order = list(self._members)
+        return self._order[index]
+
+    def __repr__(self) -> str:
+        return "Workforce({0!r})".format(list(self._members))
+
+    def add(self, worker) -> None:
+        self._members[worker] = None
+        self._changed()
+
+    def remove(self, worker) -> None:
+        del self._members[worker]
+        self._changed()
+
+    def labour_power(self, labour_supply) -> int:
+        """
+        Total labour power of the workers at the given labour supply
+        """
+        if self._labour_power is None or labour_supply != self._supply:
+            self._labour_power = sum([o.labour_amount for o in self])
+            self._supply = labour_supply
+        return self._labour_power
+
+    def _changed(self) -> None:
+        self._order = None
+        self._labour_power = None
+        self._supply = None
+
+
+class BaselineEconomyFirm(EconomyAgent):
     """
     Firm Agent
 
@@ -102,8 +161,36 @@ class BaselineEconomyFirm(Agent):
     goods_price: the price of each item in the inventory
     inventory: amount of goods on hand
     wage_rate: the price the firm will pay for labour power
+    workers: the Workforce of households employed by the firm
+    has_open_position: whether the firm is hiring. Firms that are
+        hiring are kept in model.vacancies, in the order they opened
+        their positions
     """
 
+    __slots__ = (
+        "liquidity",
+        "goods_price",
+        "wage_rate",
+        "inventory",
+        "current_demand",
+        "recent_demand",
+        "current_marginal_cost",
+        "worker_on_notice",
+        "_workforce",
+        "_has_open_position",
+        "months_since_hire_failure",
+        "marginal_cost_deflator",
+    )
+
+    # Decision indicators, reset at each month start
+    raised_wage = flag(0, "Raised the wage rate")
+    lowered_wage = flag(1, "Lowered the wage rate")
+    considered_price_change = flag(2, "Inventories were out of range")
+    inventories_too_low = flag(3, "Inventory was below the floor")
+    inventories_too_high = flag(4, "Inventory was above the ceiling")
+    raised_goods_price = flag(5, "Raised the goods price")
+    lowered_goods_price = flag(6, "Lowered the goods price")
+
     def __init__(
         self,
         unique_id: int,
@@ -133,6 +220,37 @@ class BaselineEconomyFirm(Agent):
         )
         self.reset_monthly_stats()
 
+    @property
+    def has_open_position(self) -> bool:
+        return self._has_open_position
+
+    @has_open_position.setter
+    def has_open_position(self, value: bool) -> None:
+        self._has_open_position = value
+        if value:
+            self.model.vacancies[self] = None
+        else:
+            self.model.vacancies.pop(self, None)
+
+    @property
+    def workers(self) -> Workforce:
+        return self._workforce
+
+    @workers.setter
+    def workers(self, workers) -> None:
+        self._workforce = Workforce(workers)
+
+    @property
+    def random(self) -> Random:
+        """
+        The model's shared generator, or this firm's own stream
+        when the model keys its random numbers by agent
+        """
+        streams = self.model.streams
+        if streams is None:
+            return self.model.random
+        return streams.stream("firm", self.unique_id)
+
     def month_start(self) -> None:
         """
         Run the month start firm procedures
@@ -141,7 +259,7 @@ class BaselineEconomyFirm(Agent):
         self.set_wage_rate()
         self.manage_workforce()
         # Is the firm confident enough to change its price?
-        if self.with_probability(FirmConfig.theta):
+        if self.with_probability(FirmConfig.theta, "theta"):
             self.set_goods_price()
         # Reset monthly accumulators
         self.current_demand = 0
@@ -169,11 +287,11 @@ class BaselineEconomyFirm(Agent):
         """
         if self.should_raise_wage():
             self.raised_wage = True
-            self.wage_rate *= (1 + wage_adjustment(self.random))
+            self.wage_rate *= (1 + self.adjustment("wage"))
             self.wage_rate = max(1, math.ceil(self.wage_rate))
         elif self.should_lower_wage():
             self.lowered_wage = True
-            self.wage_rate *= (1 - wage_adjustment(self.random))
+            self.wage_rate *= (1 - self.adjustment("wage"))
             self.wage_rate = math.floor(self.wage_rate)
 
     def manage_workforce(self) -> None:
@@ -212,13 +330,13 @@ class BaselineEconomyFirm(Agent):
         if (self.inventory < self.inventory_floor() and
                 self.goods_price <= self.goods_price_ceiling()):
             self.raised_goods_price = True
-            self.goods_price *= (1 + price_adjustment(self.random))
+            self.goods_price *= (1 + self.adjustment("price"))
             self.goods_price = math.ceil(self.goods_price)
 
         elif (self.inventory > self.inventory_ceiling() and
                 self.goods_price > self.goods_price_floor()):
             self.lowered_goods_price = True
-            self.goods_price *= (1 - price_adjustment(self.random))
+            self.goods_price *= (1 - self.adjustment("price"))
             self.goods_price = max(1, math.floor(self.goods_price))
 
 # DAILY
@@ -229,8 +347,10 @@ class BaselineEconomyFirm(Agent):
         run it through the production process.
         Accumulate output in the firms inventory
         """
-        labour_power = sum([o.labour_amount for o in self.workers])
-        self.inventory += production_amount(labour_power)
+        labour_power = self.workers.labour_power(self.model.labour_supply)
+        output = production_amount(labour_power)
+        self.inventory += output
+        self.model.aggregates.inventory += output
 
 # MONTH END
 
@@ -251,6 +371,10 @@ class BaselineEconomyFirm(Agent):
         for hh in self.workers:
             hh.liquidity += self.wage_rate
         self.liquidity -= num_workers * self.wage_rate
+        self.model.aggregates.transfer_to_households(
+            num_workers * self.wage_rate,
+            self.workers
+        )
 
     def distribute_profits(self,
                            shareholding: List[Tuple],
@@ -259,14 +383,16 @@ class BaselineEconomyFirm(Agent):
         Distribute profits less a labour cost buffer
         to households
         """
-        liquidity_buffer = self.calculate_required_buffer()
-        if self.liquidity <= liquidity_buffer:
+        profits = self.distributable_profits()
+        if not profits:
             return
-        self.liquidity -= self.distribute_to_households(
-            self.liquidity - liquidity_buffer,
+        paid, recipients = self.distribute_to_households(
+            profits,
             shareholding,
             total_shares
         )
+        self.liquidity -= paid
+        self.model.aggregates.transfer_to_households(paid, recipients)
 
     def check_for_hire_failure(self) -> None:
         """
@@ -284,13 +410,7 @@ class BaselineEconomyFirm(Agent):
         """
         Reset the monthly recording attributes
         """
-        self.raised_wage = False
-        self.lowered_wage = False
-        self.considered_price_change = False
-        self.inventories_too_low = False
-        self.inventories_too_high = False
-        self.raised_goods_price = False
-        self.lowered_goods_price = False
+        self.flags = 0
 
     def marginal_cost(self) -> float:
         """
@@ -353,12 +473,15 @@ class BaselineEconomyFirm(Agent):
             self.worker_on_notice = None
         self.workers.remove(worker)
         worker.employer = None
+        self.model.aggregates.employed -= 1
 
     def hire(self, worker) -> None:
         """
         Add worker to the list of current employees
         """
-        self.workers.append(worker)
+        if worker.employer is None:
+            self.model.aggregates.employed += 1
+        self.workers.add(worker)
         worker.employer = self
         self.has_open_position = False
 
@@ -370,6 +493,7 @@ class BaselineEconomyFirm(Agent):
         self.inventory -= quantity
         self.current_demand += quantity
         self.liquidity += total_price
+        self.model.aggregates.record_sale(quantity, total_price)
 
     def calculate_required_buffer(self) -> int:
         """
@@ -378,28 +502,41 @@ class BaselineEconomyFirm(Agent):
         """
         return math.ceil(FirmConfig.chi * self.wage_rate * len(self.workers))
 
+    def distributable_profits(self) -> int:
+        """
+        Profits available to distribute after keeping back
+        the liquidity buffer
+        """
+        liquidity_buffer = self.calculate_required_buffer()
+        if self.liquidity <= liquidity_buffer:
+            return 0
+        return self.liquidity - liquidity_buffer
+
     def distribute_to_households(self,
                                  profits: int,
                                  shareholding: List[Tuple],
-                                 total_shares: int) -> int:
+                                 total_shares: int) -> (int, list):
         """
         Distribute profits to households weighted by their current liquidity
         and rounded down to the nearest integer value
-        Return the total amount distributed
+        Return the total amount distributed and the households paid
 
         shareholding: list of tuples [(shareholder, holding), ...]
+        total_shares: sum of the holdings in the list
         """
-        total_shares = sum([holder[1] for holder in shareholding])
         try:
             dividend_per_share = profits / total_shares
         except ZeroDivisionError:
             dividend_per_share = 0
         total_paid = 0
+        recipients = []
         for shareholder in shareholding:
             dividend = math.floor(shareholder[1] * dividend_per_share)
-            shareholder[0].liquidity += dividend
-            total_paid += dividend
-        return total_paid
+            if dividend:
+                shareholder[0].liquidity += dividend
+                total_paid += dividend
+                recipients.append(shareholder[0])
+        return total_paid, recipients
 
 # QUERIES
 
@@ -417,8 +554,27 @@ class BaselineEconomyFirm(Agent):
         """
         return self.months_since_hire_failure >= FirmConfig.gamma
 
-    def with_probability(self, chance: float) -> bool:
+    def with_probability(self, chance: float, decision=None) -> bool:
         """
         Random check between 0 and 1
+
+        A named month start decision reads its number from the
+        model's block draws, when it has them
         """
+        if decision is not None:
+            block = self.model.block_draws
+            if block is not None:
+                return block.firm_uniform(self, decision) < chance
         return self.random.random() < chance
+
+    def adjustment(self, name: str) -> float:
+        """
+        Delta percentage amount to change the "wage" or "price"
+        up or down
+        """
+        block = self.model.block_draws
+        if block is not None:
+            return block.adjustment(self, name)
+        if name == "wage":
+            return wage_adjustment(self.random)
+        return price_adjustment(self.random)
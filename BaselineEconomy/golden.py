@@ -0,0 +1,366 @@
+import gzip
+import json
+import os
+import numpy as np
+import pandas as pd
+from .model import BaselineEconomyModel
+
+
+# CONFIG
+
+class GoldenConfig:
+    """
+    Settings for reference trajectories
+    """
+
+    # Where the reference trajectories recorded from the original
+    # object model are kept
+    directory = os.path.join(os.path.dirname(__file__), "references")
+
+    seeds = (1, 2, 3)
+
+    # (households, firms) of each population recorded
+    sizes = ((200, 20), (1000, 100))
+
+    # Length of each recorded run
+    months = 24
+
+    # Parameters shared by every reference run
+    parameters = {
+        "household_liquidity": 3100,
+        "firm_goods_price": 25,
+        "firm_wage_rate": 68,
+    }
+
+    # Number of households and firms whose states are sampled
+    # at the end of every month
+    sampled_agents = 10
+
+    household_states = (
+        "liquidity",
+        "reservation_wage",
+        "current_demand",
+        "planned_savings",
+        "employer",
+    )
+    firm_states = ("liquidity", "inventory", "goods_price", "wage_rate")
+
+    # Months left out of statistical comparisons while the economy
+    # settles from its initial state
+    burn_in = 6
+
+    # Relative tolerances on the mean of each series after the burn in,
+    # across every seed, for modes that draw different random numbers.
+    # Each is about twice the largest difference the array engine or
+    # block draws show at either reference size.
+    # Counts of a handful of agents, such as "On Notice", are too
+    # noisy to compare this way.
+    tolerances = {
+        "Employed": 0.01,
+        "Unsatisfied Demand": 0.03,
+        "Inventory": 0.06,
+        "Price": 0.01,
+        "Wage": 0.01,
+        "HH Savings": 0.01,
+        "Total Liquidity": 0,
+        "Gini": 0.04,
+    }
+
+
+# TRAJECTORIES
+
+class Trajectory:
+    """
+    The record of a single run: every DataCollector series, plus the
+    states of a sample of households and firms at each month end
+
+    Variables:
+
+    parameters: keyword arguments the model was built with
+    series: DataFrame of the model reporters, one row per step
+    households: DataFrame of sampled household states, indexed by
+        step and household position
+    firms: DataFrame of sampled firm states, indexed by step and
+        firm position
+    """
+
+    def __init__(self, parameters: dict, series, households, firms) -> None:
+        self.parameters = parameters
+        self.series = series
+        self.households = households
+        self.firms = firms
+
+    @property
+    def name(self) -> str:
+        return "hh{num_households}_f{num_firms}_s{seed}".format(
+            **self.parameters
+        )
+
+
+def sample(count: int, sampled: int) -> np.ndarray:
+    """
+    Positions of an evenly spread sample of agents
+    """
+    return np.unique(
+        np.linspace(0, count - 1, min(count, sampled)).astype(int)
+    )
+
+
+def household_states(model, positions) -> dict:
+    """
+    The sampled states of the households at the given positions
+    """
+    households = model.households
+    if model.engine == "array":
+        return {
+            name: getattr(households, name)[positions].tolist()
+            for name in GoldenConfig.household_states
+        }
+    firm_index = {id(o): i for i, o in enumerate(model.firms)}
+    states = {name: [] for name in GoldenConfig.household_states}
+    for position in positions:
+        hh = households[position]
+        for name in GoldenConfig.household_states:
+            value = getattr(hh, name, np.nan)
+            if name == "employer":
+                value = -1 if value is None else firm_index[id(value)]
+            states[name].append(value)
+    return states
+
+
+def firm_states(model, positions) -> dict:
+    return {
+        name: [getattr(model.firms[i], name) for i in positions]
+        for name in GoldenConfig.firm_states
+    }
+
+
+def _frame(steps: list, positions, states: list):
+    index = pd.MultiIndex.from_product(
+        [steps, positions], names=["Step", "Position"]
+    )
+    columns = {
+        name: np.concatenate([o[name] for o in states])
+        for name in states[0]
+    }
+    return pd.DataFrame(columns, index=index)
+
+
+def record_trajectory(parameters: dict, months: int) -> Trajectory:
+    """
+    Run a model to the end of the given month and record it.
+    Money conservation is checked after every step.
+    """
+    model = BaselineEconomyModel(
+        check_money=True,
+        max_steps=months * 21,
+        **parameters
+    )
+    household_positions = sample(
+        model.num_households, GoldenConfig.sampled_agents
+    )
+    firm_positions = sample(model.num_firms, GoldenConfig.sampled_agents)
+    steps = []
+    households = []
+    firms = []
+    for _ in range(months * model.month_length):
+        model.step()
+        if model.schedule.steps % model.month_length == 0:
+            steps.append(model.schedule.steps)
+            households.append(household_states(model, household_positions))
+            firms.append(firm_states(model, firm_positions))
+    return Trajectory(
+        dict(parameters),
+        model.datacollector.get_model_vars_dataframe().copy(),
+        _frame(steps, household_positions, households),
+        _frame(steps, firm_positions, firms)
+    )
+
+
+def reference_parameters(
+    seeds=GoldenConfig.seeds,
+    sizes=GoldenConfig.sizes
+) -> list:
+    """
+    Parameters of every reference run
+    """
+    return [
+        dict(
+            GoldenConfig.parameters,
+            num_households=households,
+            num_firms=firms,
+            seed=seed
+        )
+        for households, firms in sizes
+        for seed in seeds
+    ]
+
+
+# REFERENCES
+
+def save_trajectory(trajectory: Trajectory, path: str) -> None:
+    """
+    Save a trajectory as gzipped JSON, which reads back exactly
+    whatever the versions of pandas and numpy
+    """
+    data = {
+        "parameters": trajectory.parameters,
+        "series": _columns(trajectory.series),
+        "households": _columns(trajectory.households.reset_index()),
+        "firms": _columns(trajectory.firms.reset_index()),
+    }
+    with gzip.open(path, "wt") as f:
+        json.dump(data, f)
+
+
+def load_trajectory(path: str) -> Trajectory:
+    with gzip.open(path, "rt") as f:
+        data = json.load(f)
+    return Trajectory(
+        data["parameters"],
+        pd.DataFrame(data["series"]),
+        pd.DataFrame(data["households"]).set_index(["Step", "Position"]),
+        pd.DataFrame(data["firms"]).set_index(["Step", "Position"])
+    )
+
+
+def _columns(frame) -> dict:
+    return {name: frame[name].tolist() for name in frame.columns}
+
+
+def record_references(
+    directory: str,
+    seeds=GoldenConfig.seeds,
+    sizes=GoldenConfig.sizes,
+    months=GoldenConfig.months
+) -> list:
+    """
+    Record reference trajectories from the object engine
+    and save them in a directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    references = []
+    for parameters in reference_parameters(seeds, sizes):
+        trajectory = record_trajectory(parameters, months)
+        save_trajectory(
+            trajectory,
+            os.path.join(directory, trajectory.name + ".json.gz")
+        )
+        references.append(trajectory)
+    return references
+
+
+def load_references(directory: str = GoldenConfig.directory) -> list:
+    """
+    Every trajectory saved in a directory, by default
+    the references recorded from the original object model
+    """
+    return [
+        load_trajectory(os.path.join(directory, name))
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".json.gz")
+    ]
+
+
+# COMPARISONS
+
+def exact_differences(reference: Trajectory, candidate: Trajectory) -> list:
+    """
+    Everything recorded in the candidate that is not bit for bit
+    the same as the reference
+    """
+    differences = []
+    for part in ("series", "households", "firms"):
+        expected = getattr(reference, part)
+        result = getattr(candidate, part)
+        if list(result.columns) != list(expected.columns):
+            differences.append(
+                "{0} {1}: columns {2} differ from {3}".format(
+                    reference.name, part,
+                    list(result.columns), list(expected.columns)
+                )
+            )
+            continue
+        for column in expected.columns:
+            if not result[column].equals(expected[column]):
+                step = _first_difference(expected[column], result[column])
+                differences.append(
+                    "{0} {1} {2}: differs from step {3}".format(
+                        reference.name, part, column, step
+                    )
+                )
+    return differences
+
+
+def _first_difference(expected, result):
+    if len(expected) != len(result):
+        return min(len(expected), len(result))
+    same = (expected.to_numpy() == result.to_numpy()) | (
+        expected.isna().to_numpy() & result.isna().to_numpy()
+    )
+    position = np.argmin(same)
+    label = expected.index[position]
+    return label[0] if isinstance(label, tuple) else label + 1
+
+
+def statistical_differences(
+    references: list,
+    candidates: list,
+    tolerances=None,
+    burn_in=GoldenConfig.burn_in
+) -> list:
+    """
+    Series whose mean after the burn in, across every run, is further
+    from the reference than its declared relative tolerance
+    """
+    tolerances = GoldenConfig.tolerances if tolerances is None \
+        else tolerances
+    differences = []
+    for name, tolerance in tolerances.items():
+        expected = _settled_mean(references, name, burn_in)
+        result = _settled_mean(candidates, name, burn_in)
+        error = abs(result - expected)
+        if error > tolerance * abs(expected):
+            differences.append(
+                "{0}: mean {1:.6g} against {2:.6g} in the reference, "
+                "outside the tolerance of {3:.1%}".format(
+                    name, result, expected, tolerance
+                )
+            )
+    return differences
+
+
+def _settled_mean(trajectories: list, name: str, burn_in: int) -> float:
+    values = [
+        o.series[name].to_numpy(dtype=float)[burn_in * 21:]
+        for o in trajectories
+    ]
+    return float(np.nanmean(np.concatenate(values)))
+
+
+def check_mode(
+    references: list,
+    mode: dict,
+    exact=True,
+    tolerances=None
+) -> list:
+    """
+    Rerun every reference with the mode's extra model parameters,
+    e.g. {"batched_market": True}, and compare it with the reference,
+    bit for bit if exact, otherwise within the statistical tolerances.
+    Return the differences found, if any.
+    """
+    candidates = []
+    differences = []
+    for reference in references:
+        months = len(reference.series) // 21
+        parameters = dict(reference.parameters, **mode)
+        candidate = record_trajectory(parameters, months)
+        if exact:
+            differences.extend(exact_differences(reference, candidate))
+        candidates.append(candidate)
+    if not exact:
+        differences.extend(
+            statistical_differences(references, candidates, tolerances)
+        )
+    return differences
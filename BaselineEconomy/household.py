@@ -1,4 +1,7 @@
-from mesa import Agent
+from .agent import EconomyAgent, flag
+from array import array
+from random import Random
+import bisect
 import math
 
 
@@ -51,6 +54,11 @@ class HouseholdConfig:
     # Probability of dropping a firm that fails to supply
     psi_quant = 0.25
 
+    # Most open positions a job search looks through directly,
+    # when searching the vacancies. Beyond this it draws firms
+    # at random as usual.
+    vacancy_scan_limit = 25
+
 
 # FUNCTIONS
 
@@ -69,9 +77,73 @@ def planned_consumption_amount(
     return (current_liquidity / average_price) ** HouseholdConfig.alpha
 
 
+# BLACKMARKS
+
+class Blackmarks:
+    """
+    The month's record of the firms that failed to supply a household,
+    each with how far short it fell. A firm is recorded every time it
+    fails, so serial offenders appear many times.
+
+    Held as two compact arrays, of firm positions in model.firms and
+    of shortfalls, rather than a list of tuples: a household can build
+    up hundreds of records in a month. Reads as a sequence of
+    (firm, shortfall) pairs.
+    """
+
+    __slots__ = ("firms", "positions", "shortfalls")
+
+    def __init__(self, model) -> None:
+        self.firms = model.firms
+        self.positions = array("i")
+        self.shortfalls = array("d")
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self):
+        firms = self.firms
+        for position, shortfall in zip(self.positions, self.shortfalls):
+            yield (firms[position], shortfall)
+
+    def __repr__(self) -> str:
+        return "Blackmarks({0!r})".format(list(self))
+
+    def append(self, record) -> None:
+        """
+        Record a (firm, shortfall) pair
+        """
+        firm, shortfall = record
+        self.positions.append(firm.model.firm_positions[firm])
+        self.shortfalls.append(shortfall)
+
+    def extend(self, positions, shortfalls) -> None:
+        """
+        Record several firms, by position in model.firms,
+        with their shortfalls
+        """
+        self.positions.extend(positions)
+        self.shortfalls.extend(shortfalls)
+
+    def clear(self) -> None:
+        del self.positions[:]
+        del self.shortfalls[:]
+
+    def choose(self, rand_generator: Random):
+        """
+        A recorded firm, chosen with probability in proportion
+        to its shortfalls
+        """
+        position = rand_generator.choices(
+            self.positions,
+            weights=self.shortfalls
+        )[0]
+        return self.firms[position]
+
+
 # AGENT
 
-class BaselineEconomyHousehold(Agent):
+class BaselineEconomyHousehold(EconomyAgent):
     """
     Household Agent
 
@@ -80,44 +152,101 @@ class BaselineEconomyHousehold(Agent):
     reservation_wage: minimal claim on labour income
     liquidity: amount of monetary units household posseses
     preferred_suppliers: set of firms household prefers to buy from
-    blackmarked_firms: firms that have failed to supply this month
+    supplier_positions: sorted positions of the preferred suppliers in
+        model.firms, kept when the model searches for suppliers by
+        complement, None otherwise
+    blackmarked_firms: Blackmarks of the firms that have failed to
+        supply this month
     employer: The firm we're working for, None if unemployed
     current_demand: How many goods to buy each day
     """
 
+    __slots__ = (
+        "reservation_wage",
+        "liquidity",
+        "preferred_suppliers",
+        "supplier_positions",
+        "employer",
+        "blackmarked_firms",
+        "average_goods_price",
+        "planned_consumption",
+        "current_demand",
+        "planned_savings",
+        "poverty",
+        "unsatisfied_demand",
+        "demand_constraints_suffered",
+    )
+
+    # Decision indicators, reset at each month start
+    looked_for_cheaper_vendor = flag(0, "Looked for a cheaper vendor")
+    found_cheaper_vendor = flag(1, "Switched to a cheaper vendor")
+    looked_for_better_vendor = flag(2, "Looked to replace a failed vendor")
+    found_better_vendor = flag(3, "Replaced a failed vendor")
+    looked_for_new_job = flag(4, "Looked for a new job")
+    found_new_job = flag(5, "Found a new job")
+    # Set once a failed vendor had already gone. Never reset.
+    vendor_already_replaced = flag(6, "A failed vendor was already gone")
+    _kept_flags = 1 << 6
+
     def __init__(
         self,
         unique_id: int,
         model,
-        initial_liquidity: int
+        initial_liquidity: int,
+        preferred_suppliers: list = None
     ) -> None:
         """
         Customize the agent
+
+        Preferred suppliers are sampled from the model's firms
+        unless they are given
         """
         super().__init__(unique_id, model)
         self.reservation_wage = HouseholdConfig.initial_reservation_wage
         self.liquidity = initial_liquidity
-        self.preferred_suppliers = self.random.sample(
-            model.firms,
-            HouseholdConfig.num_preferred_suppliers
-        )
+        if preferred_suppliers is None:
+            preferred_suppliers = self.random.sample(
+                model.firms,
+                HouseholdConfig.num_preferred_suppliers
+            )
+        self.preferred_suppliers = preferred_suppliers
+        self.supplier_positions = None
+        if model.supplier_search == "complement":
+            positions = model.firm_positions
+            self.supplier_positions = sorted(
+                [positions[o] for o in preferred_suppliers]
+            )
+        if model.customers is not None:
+            for firm in preferred_suppliers:
+                model.customers.add(self, firm)
         self.employer = None
-        self.blackmarked_firms = []
+        self.blackmarked_firms = Blackmarks(model)
         self.reset_monthly_stats()
 
+    @property
+    def random(self) -> Random:
+        """
+        The model's shared generator, or this household's own stream
+        when the model keys its random numbers by agent
+        """
+        streams = self.model.streams
+        if streams is None:
+            return self.model.random
+        return streams.stream("household", self.unique_id)
+
     def month_start(self) -> None:
         """
         Run the month start household procedures
         """
         self.reset_monthly_stats()
         # Look for cheaper vendors if household feels like it
-        if self.with_probability(HouseholdConfig.psi_price):
+        if self.with_probability(HouseholdConfig.psi_price, "psi_price"):
             self.find_cheaper_vendor()
         # Dump a failed vendor if household feels like it
-        if self.with_probability(HouseholdConfig.psi_quant):
+        if self.with_probability(HouseholdConfig.psi_quant, "psi_quant"):
             self.find_better_vendor()
         # Clear the blackmark list
-        self.blackmarked_firms = []
+        self.blackmarked_firms.clear()
         # Look for a job if household wants to
         if self.is_unhappy_at_work():
             self.look_for_new_job()
@@ -154,7 +283,7 @@ class BaselineEconomyHousehold(Agent):
         new_firm = self.select_new_firm()
         if new_firm.goods_price < change_price:
             self.found_cheaper_vendor = True
-            self.preferred_suppliers[target_index] = new_firm
+            self.replace_supplier(target_index, new_firm)
 
     def find_better_vendor(self) -> None:
         """
@@ -169,7 +298,7 @@ class BaselineEconomyHousehold(Agent):
         # In which case 'index' will throw an error we need to catch
         try:
             target_index = self.preferred_suppliers.index(target_firm)
-            self.preferred_suppliers[target_index] = self.select_new_firm()
+            self.replace_supplier(target_index, self.select_new_firm())
             self.found_better_vendor = True
         except ValueError:
             self.vendor_already_replaced = True
@@ -183,15 +312,54 @@ class BaselineEconomyHousehold(Agent):
         # Look at more firms if household is unemployed
         self.looked_for_new_job = True
         num_searches = HouseholdConfig.beta if self.is_unemployed() else 1
+        vacancies = self.model.vacancies
+        if self.model.job_search == "vacancies":
+            if not vacancies:
+                return
+            if len(vacancies) <= HouseholdConfig.vacancy_scan_limit:
+                self.search_vacancies(num_searches)
+                return
         for _ in range(num_searches):
             potential_employer = self.select_new_employer()
-            if self.is_acceptable_job_offer(potential_employer):
-                if self.employer is not None:
-                    self.employer.quit_job(self)
-                potential_employer.hire(self)
-                self.found_new_job = True
+            # With no vacancies anywhere, only the draw matters
+            if vacancies and self.is_acceptable_job_offer(
+                potential_employer
+            ):
+                self.take_job(potential_employer)
                 return
 
+    def search_vacancies(self, num_searches: int) -> None:
+        """
+        Resolve a search of num_searches random firms in one go.
+
+        Draws with replacement among the other firms find an
+        acceptable offer with probability 1 - (1 - a / n) ** searches,
+        for a acceptable offers out of n firms, and the first they
+        find is equally likely to be any of the offers. Drawing those
+        two outcomes directly, from the firms with open positions,
+        takes at most two random numbers.
+        """
+        offers = [
+            o for o in self.model.vacancies
+            if o is not self.employer and self.is_acceptable_job_offer(o)
+        ]
+        if not offers:
+            return
+        num_firms = len(self.model.firms) - (self.employer is not None)
+        missed = (1 - len(offers) / num_firms) ** num_searches
+        if self.random.random() < missed:
+            return
+        self.take_job(self.random.choice(offers))
+
+    def take_job(self, employer) -> None:
+        """
+        Leave any current job for a new employer
+        """
+        if self.employer is not None:
+            self.employer.quit_job(self)
+        employer.hire(self)
+        self.found_new_job = True
+
     def plan_consumption(self) -> None:
         """
         Work out the daily consumption amount
@@ -217,6 +385,11 @@ class BaselineEconomyHousehold(Agent):
             self.planned_consumption = math.inf
             self.current_demand = math.inf
             self.planned_savings = self.liquidity
+        self.model.aggregates.add_consumption_plan(
+            self.current_demand,
+            self.planned_savings,
+            self.poverty
+        )
 
 # DAILY
 
@@ -225,7 +398,7 @@ class BaselineEconomyHousehold(Agent):
         Buy goods from firms
         """
         # Put the preferred suppliers in a random order
-        self.model.random.shuffle(self.preferred_suppliers)
+        self.random.shuffle(self.preferred_suppliers)
         # Obtain the required amount of goods from
         # the preferred suppliers
         required_amount = self.current_demand
@@ -250,6 +423,9 @@ class BaselineEconomyHousehold(Agent):
                 return
         # Record unsatisfied demand
         self.unsatisfied_demand += required_amount - satisfaction_amount
+        self.model.aggregates.unsatisfied_demand += (
+            required_amount - satisfaction_amount
+        )
 
 # MONTH END
 
@@ -285,12 +461,7 @@ class BaselineEconomyHousehold(Agent):
         self.unsatisfied_demand = 0
         self.demand_constraints_suffered = len(self.blackmarked_firms)
         # Reset decision flags
-        self.looked_for_cheaper_vendor = False
-        self.found_cheaper_vendor = False
-        self.looked_for_better_vendor = False
-        self.found_better_vendor = False
-        self.looked_for_new_job = False
-        self.found_new_job = False
+        self.flags &= self._kept_flags
         self.poverty = False
 
     def check_vendor_stock(self, firm, required_amount: int) -> int:
@@ -336,12 +507,15 @@ class BaselineEconomyHousehold(Agent):
         """
         firm.sell_goods(quantity, total_price)
         self.liquidity -= total_price
+        self.model.aggregates.liquidity_changed(self)
 
     def select_new_firm(self):
         """
         Select a new firm from the list of firms
         Filter out existing suppliers
         """
+        if self.model.supplier_search == "complement":
+            return self.select_unused_firm()
         firms = self.model.firms
         result = self.random.choice(firms)
         # If we've picked a current firm have another go
@@ -349,6 +523,38 @@ class BaselineEconomyHousehold(Agent):
             result = self.random.choice(firms)
         return result
 
+    def select_unused_firm(self):
+        """
+        Select a new firm with a single draw: pick its rank among
+        the firms that are not suppliers, then step the rank past
+        the positions of the suppliers, lowest first
+        """
+        firms = self.model.firms
+        rank = self.random.randrange(
+            len(firms) - len(self.supplier_positions)
+        )
+        for taken in self.supplier_positions:
+            if taken > rank:
+                break
+            rank += 1
+        return firms[rank]
+
+    def replace_supplier(self, index: int, firm) -> None:
+        """
+        Put a firm in place of the preferred supplier at index
+        """
+        old_firm = self.preferred_suppliers[index]
+        positions = self.supplier_positions
+        if positions is not None:
+            firm_positions = self.model.firm_positions
+            positions.remove(firm_positions[old_firm])
+            bisect.insort(positions, firm_positions[firm])
+        customers = self.model.customers
+        if customers is not None:
+            customers.remove(self, old_firm)
+            customers.add(self, firm)
+        self.preferred_suppliers[index] = firm
+
     def select_new_employer(self):
         """
         Select a new potential employer filter out current
@@ -364,17 +570,10 @@ class BaselineEconomyHousehold(Agent):
         """
         Select a blackmarked firm - weighted by the extent
         of their failure to supply
-        This involves unzipping the weights from the firms in the
-        blackmark list and passing the sequences to the weighted
-        random selector.
 
         Serial offenders may be on this list multiple times
         """
-        choice_zip = zip(*self.blackmarked_firms)
-        # Pull the lists off the zip
-        firm_list = next(choice_zip)
-        blackmarks = next(choice_zip)
-        return self.random.choices(firm_list, weights=blackmarks)[0]
+        return self.blackmarked_firms.choose(self.random)
 
 # QUERIES
 
@@ -385,7 +584,7 @@ class BaselineEconomyHousehold(Agent):
         return (
             self.is_unemployed() or
             self.is_paid_too_little() or
-            self.with_probability(HouseholdConfig.pi)
+            self.with_probability(HouseholdConfig.pi, "pi")
         )
 
     def is_paid_too_little(self) -> bool:
@@ -415,8 +614,15 @@ class BaselineEconomyHousehold(Agent):
         """
         return self.employer is None
 
-    def with_probability(self, chance: float) -> bool:
+    def with_probability(self, chance: float, decision=None) -> bool:
         """
         Random check between 0 and 1
+
+        A named month start decision reads its number from the
+        model's block draws, when it has them
         """
+        if decision is not None:
+            block = self.model.block_draws
+            if block is not None:
+                return block.household_uniform(self, decision) < chance
         return self.random.random() < chance
@@ -0,0 +1,631 @@
+import math
+import numpy as np
+from .household import HouseholdConfig
+from .market import clear_goods_market
+from .streams import KeyedDraws, SharedDraws
+
+
+# FUNCTIONS
+
+def sample_distinct(rand_generator, rows: int, size: int, population: int):
+    """
+    Draw 'size' distinct integers below 'population' for each row.
+    Rows containing a repeat are redrawn until every row is clean.
+
+    rand_generator: a NumPy Generator, or the draws of a
+        HouseholdArrays population, with a row for each household
+    """
+    if size > population:
+        raise ValueError("Sample larger than population")
+    draws = rand_generator
+    if not hasattr(draws, "uniforms"):
+        draws = SharedDraws(rand_generator)
+    ids, columns = np.indices((rows, size))
+    result = draws.integers(ids, 0, population, columns)
+    clash = _has_repeats(result)
+    while clash.any():
+        result[clash] = draws.integers(
+            ids[clash], 0, population, columns[clash]
+        )
+        clash[clash] = _has_repeats(result[clash])
+    return result
+
+
+def _has_repeats(matrix) -> np.ndarray:
+    ordered = np.sort(matrix, axis=1)
+    return (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+
+
+# AGENT VIEW
+
+def _column(name: str, doc: str):
+    """
+    Property reading and writing one household's entry in a column
+    """
+    def getter(self):
+        return getattr(self.households, name)[self.index].item()
+
+    def setter(self, value):
+        getattr(self.households, name)[self.index] = value
+
+    return property(getter, setter, doc=doc)
+
+
+class HouseholdView:
+    """
+    A single household within a HouseholdArrays population
+
+    Gives firms, and anything else that deals with one household
+    at a time, the same interface as BaselineEconomyHousehold.
+    Views are created on demand and compare equal if they refer to
+    the same household.
+    """
+
+    __slots__ = ("households", "index")
+
+    def __init__(self, households, index: int) -> None:
+        self.households = households
+        self.index = index
+
+    liquidity = _column("liquidity", "Money held by the household")
+    reservation_wage = _column(
+        "reservation_wage",
+        "Minimal claim on labour income"
+    )
+    current_demand = _column("current_demand", "Goods to buy each day")
+    planned_savings = _column(
+        "planned_savings",
+        "Money the household expects to save"
+    )
+    unsatisfied_demand = _column(
+        "unsatisfied_demand",
+        "Demand not met this month"
+    )
+    poverty = _column("poverty", "Demand is below the poverty level")
+
+    @property
+    def unique_id(self) -> int:
+        return self.index
+
+    @property
+    def model(self):
+        return self.households.model
+
+    @property
+    def employer(self):
+        """
+        The firm we're working for, None if unemployed
+        """
+        employer = self.households.employer[self.index]
+        return None if employer < 0 else self.households.firms[employer]
+
+    @employer.setter
+    def employer(self, firm) -> None:
+        self.households.employer[self.index] = (
+            -1 if firm is None else self.households.firm_index(firm)
+        )
+
+    @property
+    def preferred_suppliers(self) -> list:
+        firms = self.households.firms
+        return [
+            firms[o] for o in self.households.preferred_suppliers[self.index]
+        ]
+
+    @property
+    def labour_amount(self):
+        """
+        Amount of labour power available from this household
+        """
+        return self.households.model.labour_supply
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, HouseholdView) and
+            other.households is self.households and
+            other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.households), self.index))
+
+    def __repr__(self) -> str:
+        return "HouseholdView({0})".format(self.index)
+
+
+# POPULATION
+
+class HouseholdArrays:
+    """
+    Structure-of-arrays Household population
+
+    Holds the state of every household in contiguous NumPy arrays,
+    indexed by household number, and runs each household procedure
+    as one vectorised operation over the whole population.
+
+    Firms remain objects. Employers and preferred suppliers are
+    stored as indices into model.firms, with -1 meaning unemployed.
+
+    Variables:
+
+    reservation_wage: minimal claim on labour income
+    liquidity: amount of monetary units each household posseses
+    preferred_suppliers: households x suppliers matrix of firm indices
+    employer: index of the firm each household works for
+    current_demand: How many goods to buy each day
+    """
+
+    def __init__(
+        self,
+        model,
+        num_households: int,
+        initial_liquidity: int
+    ) -> None:
+        self.model = model
+        self.random = model.np_random
+        if model.streams is None:
+            self.draws = SharedDraws(model.np_random)
+        else:
+            self.draws = KeyedDraws(model.streams)
+        self.firms = model.firms
+        self._firm_index = {
+            firm.unique_id: i for i, firm in enumerate(model.firms)
+        }
+        self.reservation_wage = np.full(
+            num_households,
+            HouseholdConfig.initial_reservation_wage,
+            dtype=float
+        )
+        self.liquidity = np.full(
+            num_households,
+            initial_liquidity,
+            dtype=float
+        )
+        self.preferred_suppliers = sample_distinct(
+            self.draws,
+            num_households,
+            HouseholdConfig.num_preferred_suppliers,
+            len(model.firms)
+        )
+        self.employer = np.full(num_households, -1, dtype=np.int64)
+        self.average_goods_price = np.zeros(num_households)
+        self.planned_consumption = np.zeros(num_households)
+        self.current_demand = np.zeros(num_households)
+        self.planned_savings = np.zeros(num_households)
+        self.vendor_already_replaced = np.zeros(num_households, dtype=bool)
+        self.clear_blackmarks()
+        self.reset_monthly_stats()
+
+    def month_start(self, order: np.ndarray) -> None:
+        """
+        Run the month start household procedures
+        """
+        num_households = len(self)
+        self.reset_monthly_stats()
+        # Look for cheaper vendors if household feels like it
+        self.find_cheaper_vendors(np.flatnonzero(
+            self.with_probability(HouseholdConfig.psi_price, num_households)
+        ))
+        # Dump a failed vendor if household feels like it
+        self.find_better_vendors(np.flatnonzero(
+            self.with_probability(HouseholdConfig.psi_quant, num_households)
+        ))
+        # Clear the blackmark list
+        self.clear_blackmarks()
+        # Look for a job if household wants to
+        self.look_for_new_jobs(order[self.is_unhappy_at_work()[order]])
+        self.plan_consumption()
+
+    def day(self, order: np.ndarray) -> None:
+        """
+        Run the daily household procedures
+        """
+        self.buy_goods(order)
+
+    def month_end(self) -> None:
+        """
+        Run the month end household procedures
+        """
+        self.adjust_reservation_wages()
+
+# MONTH START
+
+    def find_cheaper_vendors(self, households: np.ndarray) -> None:
+        """
+        Look for firms offering cheaper goods
+        """
+        self.looked_for_cheaper_vendor[households] = True
+        # Pick an existing supplier to market test and calculate the
+        # price the new supplier needs to beat
+        target_index = self.draws.integers(
+            households,
+            0,
+            HouseholdConfig.num_preferred_suppliers - 1
+        )
+        prices = self.goods_prices()
+        change_price = (
+            prices[self.preferred_suppliers[households, target_index]] *
+            (1 - HouseholdConfig.zeta)
+        )
+        # Change supplier if the price is right
+        new_firms = self.select_new_firms(households)
+        cheaper = prices[new_firms] < change_price
+        self.found_cheaper_vendor[households[cheaper]] = True
+        self.preferred_suppliers[
+            households[cheaper], target_index[cheaper]
+        ] = new_firms[cheaper]
+
+    def find_better_vendors(self, households: np.ndarray) -> None:
+        """
+        If households have been let down look for new suppliers
+        """
+        # Nothing to do if all firms have delivered
+        households = households[
+            self.count_blackmarks()[households] > 0
+        ]
+        self.looked_for_better_vendor[households] = True
+        target_firms = self.select_blackmarked_firms(households)
+        # The firm may already have been replaced by price competition
+        matches = (
+            self.preferred_suppliers[households] == target_firms[:, None]
+        )
+        present = matches.any(axis=1)
+        target_index = matches.argmax(axis=1)[present]
+        replacing = households[present]
+        self.preferred_suppliers[replacing, target_index] = (
+            self.select_new_firms(replacing)
+        )
+        self.found_better_vendor[replacing] = True
+        self.vendor_already_replaced[households[~present]] = True
+
+    def look_for_new_jobs(self, searchers: np.ndarray) -> None:
+        """
+        Look for another job
+        Look harder if the household is unemployed.
+
+        Searchers must be in the order they look. Each hire closes
+        a position, so offers are resolved one household at a time,
+        but only for households that have an acceptable offer and
+        only while any firm is still hiring. With
+        job_search="vacancies", nothing is drawn when no firm is.
+        """
+        self.looked_for_new_job[searchers] = True
+        if self.model.job_search == "vacancies" and not self.model.vacancies:
+            return
+        unemployed = self.employer[searchers] < 0
+        num_searches = np.where(unemployed, HouseholdConfig.beta, 1)
+        candidates = self.select_new_employers(
+            searchers,
+            HouseholdConfig.beta
+        )
+        wages = self.wage_rates()
+        open_positions = np.array(
+            [firm.has_open_position for firm in self.firms],
+            dtype=bool
+        )
+        current_wage = np.where(
+            unemployed,
+            -math.inf,
+            wages[self.employer[searchers]]
+        )
+        offered_wage = wages[candidates]
+        acceptable = (
+            open_positions[candidates] &
+            (np.arange(HouseholdConfig.beta) < num_searches[:, None]) &
+            (
+                (offered_wage > self.reservation_wage[searchers, None]) |
+                (offered_wage > current_wage[:, None])
+            )
+        )
+        vacancies = np.count_nonzero(open_positions)
+        for row in np.flatnonzero(acceptable.any(axis=1)):
+            if not vacancies:
+                return
+            for firm_index in candidates[row][acceptable[row]]:
+                if open_positions[firm_index]:
+                    self.change_employer(searchers[row], firm_index)
+                    open_positions[firm_index] = False
+                    vacancies -= 1
+                    break
+
+    def plan_consumption(self) -> None:
+        """
+        Work out the daily consumption amount
+        Calculates an integer amount
+        """
+        self.average_goods_price = (
+            self.goods_prices()[self.preferred_suppliers].sum(axis=1) /
+            HouseholdConfig.num_preferred_suppliers
+        )
+        free = self.average_goods_price == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            planned_consumption = (
+                self.liquidity / self.average_goods_price
+            ) ** HouseholdConfig.alpha
+        self.planned_consumption = np.where(
+            free, math.inf, planned_consumption
+        )
+        self.current_demand = np.where(
+            free,
+            math.inf,
+            planned_consumption // self.model.month_length
+        )
+        self.planned_savings = np.where(
+            free,
+            self.liquidity,
+            self.liquidity - planned_consumption * self.average_goods_price
+        )
+        self.poverty = ~free & (
+            self.current_demand < self.model.poverty_level
+        )
+        self.model.aggregates.add_consumption_plan(
+            self.current_demand.sum().item(),
+            self.planned_savings.sum().item(),
+            np.count_nonzero(self.poverty)
+        )
+
+# DAILY
+
+    def buy_goods(self, order: np.ndarray) -> None:
+        """
+        Buy goods from firms
+        """
+        # Put the preferred suppliers in a random order
+        self.preferred_suppliers = np.take_along_axis(
+            self.preferred_suppliers,
+            np.argsort(
+                self.draws.uniforms(*np.indices(
+                    self.preferred_suppliers.shape
+                )),
+                axis=1
+            ),
+            axis=1
+        )
+        inventory = np.array(
+            [firm.inventory for firm in self.firms],
+            dtype=float
+        )
+        opening = self.liquidity.copy()
+        outcome = clear_goods_market(
+            order,
+            self.preferred_suppliers,
+            self.goods_prices(),
+            inventory,
+            self.liquidity,
+            self.current_demand
+        )
+        self.unsatisfied_demand += outcome.unsatisfied_demand
+        self.model.aggregates.unsatisfied_demand += (
+            outcome.unsatisfied_demand.sum().item()
+        )
+        spenders = np.flatnonzero(self.liquidity != opening)
+        self.model.aggregates.liquidities_changed(
+            spenders,
+            self.liquidity[spenders]
+        )
+        self._blackmarks.append((
+            outcome.blackmark_households,
+            outcome.blackmark_firms,
+            outcome.blackmark_shortfalls
+        ))
+        for i in np.flatnonzero(outcome.sold):
+            self.firms[i].sell_goods(
+                outcome.sold[i].item(),
+                outcome.revenue[i].item()
+            )
+
+# MONTH END
+
+    def adjust_reservation_wages(self) -> None:
+        """
+        Make a note of the reservation wage
+        which affects how intensely a household will look for a job
+        """
+        employed = self.employer >= 0
+        self.reservation_wage = np.where(
+            employed,
+            np.maximum(
+                self.reservation_wage,
+                self.wage_rates()[self.employer]
+            ),
+            self.reservation_wage * HouseholdConfig.wage_decay_rate
+        )
+
+# FIRM QUERIES
+
+    def labour_by_firm(self) -> np.ndarray:
+        """
+        Total labour power working at each firm
+        """
+        employed = self.employer[self.employer >= 0]
+        return (
+            np.bincount(employed, minlength=len(self.firms)) *
+            self.model.labour_supply
+        )
+
+# HELPERS
+
+    def reset_monthly_stats(self) -> None:
+        """
+        Reset the monthly recording attributes
+        """
+        num_households = len(self)
+        self.unsatisfied_demand = np.zeros(num_households)
+        self.demand_constraints_suffered = self.count_blackmarks()
+        # Reset decision flags
+        self.looked_for_cheaper_vendor = np.zeros(num_households, dtype=bool)
+        self.found_cheaper_vendor = np.zeros(num_households, dtype=bool)
+        self.looked_for_better_vendor = np.zeros(num_households, dtype=bool)
+        self.found_better_vendor = np.zeros(num_households, dtype=bool)
+        self.looked_for_new_job = np.zeros(num_households, dtype=bool)
+        self.found_new_job = np.zeros(num_households, dtype=bool)
+        self.poverty = np.zeros(num_households, dtype=bool)
+
+    def firm_index(self, firm) -> int:
+        """
+        Position of a firm within model.firms
+        """
+        return self._firm_index[firm.unique_id]
+
+    def goods_prices(self) -> np.ndarray:
+        return np.array(
+            [firm.goods_price for firm in self.firms],
+            dtype=float
+        )
+
+    def wage_rates(self) -> np.ndarray:
+        return np.array(
+            [firm.wage_rate for firm in self.firms],
+            dtype=float
+        )
+
+    def clear_blackmarks(self) -> None:
+        self._blackmarks = []
+
+    def blackmarks(self) -> tuple:
+        """
+        Households, firms and shortfalls of this month's blackmarks
+        in the order they were recorded
+        """
+        if not self._blackmarks:
+            return (
+                np.zeros(0, dtype=np.int64),
+                np.zeros(0, dtype=np.int64),
+                np.zeros(0)
+            )
+        return tuple(
+            np.concatenate(column) for column in zip(*self._blackmarks)
+        )
+
+    def count_blackmarks(self) -> np.ndarray:
+        """
+        Number of blackmarks recorded by each household
+        """
+        return np.bincount(self.blackmarks()[0], minlength=len(self))
+
+    def change_employer(self, household: int, firm_index: int) -> None:
+        """
+        Quit the current job, if any, and join a new firm
+        """
+        worker = self[household]
+        if self.employer[household] >= 0:
+            self.firms[self.employer[household]].quit_job(worker)
+        self.firms[firm_index].hire(worker)
+        self.found_new_job[household] = True
+
+    def select_new_firms(self, households: np.ndarray) -> np.ndarray:
+        """
+        Select a new firm for each household
+        Filter out existing suppliers
+        """
+        if self.model.supplier_search == "complement":
+            return self.select_unused_firms(households)
+        result = self.draws.integers(households, 0, len(self.firms))
+        clash = (
+            self.preferred_suppliers[households] == result[:, None]
+        ).any(axis=1)
+        # If we've picked a current firm have another go
+        while clash.any():
+            result[clash] = self.draws.integers(
+                households[clash], 0, len(self.firms)
+            )
+            clash[clash] = (
+                self.preferred_suppliers[households[clash]] ==
+                result[clash, None]
+            ).any(axis=1)
+        return result
+
+    def select_unused_firms(self, households: np.ndarray) -> np.ndarray:
+        """
+        Select a new firm for each household with a single draw,
+        as BaselineEconomyHousehold.select_unused_firm does
+        """
+        taken = np.sort(self.preferred_suppliers[households], axis=1)
+        result = self.draws.integers(
+            households, 0, len(self.firms) - taken.shape[1]
+        )
+        for column in taken.T:
+            result += column <= result
+        return result
+
+    def select_new_employers(
+        self,
+        households: np.ndarray,
+        num_searches: int
+    ) -> np.ndarray:
+        """
+        Select potential employers for each household,
+        filtering out the current employer
+        """
+        ids, columns = np.broadcast_arrays(
+            households[:, None], np.arange(num_searches)
+        )
+        result = self.draws.integers(ids, 0, len(self.firms), columns)
+        current = self.employer[households, None]
+        clash = result == current
+        while clash.any():
+            result[clash] = self.draws.integers(
+                ids[clash], 0, len(self.firms), columns[clash]
+            )
+            clash = result == current
+        return result
+
+    def select_blackmarked_firms(self, households: np.ndarray) -> np.ndarray:
+        """
+        Select a blackmarked firm for each household - weighted by
+        the extent of their failure to supply.
+
+        Serial offenders may be on the list multiple times
+        """
+        marked, firms, shortfalls = self.blackmarks()
+        by_household = np.argsort(marked, kind="stable")
+        marked = marked[by_household]
+        firms = firms[by_household]
+        cumulative = np.cumsum(shortfalls[by_household])
+        first = np.searchsorted(marked, households, side="left")
+        last = np.searchsorted(marked, households, side="right") - 1
+        base = np.where(first > 0, cumulative[first - 1], 0)
+        pick = base + (
+            self.draws.uniforms(households) *
+            (cumulative[last] - base)
+        )
+        chosen = np.minimum(
+            np.searchsorted(cumulative, pick, side="right"),
+            last
+        )
+        return firms[chosen]
+
+# QUERIES
+
+    def is_unhappy_at_work(self) -> np.ndarray:
+        """
+        Which households want to change jobs?
+        """
+        unemployed = self.employer < 0
+        paid_too_little = ~unemployed & (
+            self.wage_rates()[self.employer] < self.reservation_wage
+        )
+        return (
+            unemployed |
+            paid_too_little |
+            self.with_probability(HouseholdConfig.pi, len(self))
+        )
+
+    def with_probability(self, chance: float, size: int) -> np.ndarray:
+        """
+        Random check between 0 and 1 for 'size' households
+        """
+        return self.draws.uniforms(np.arange(size)) < chance
+
+# SEQUENCE
+
+    def __len__(self) -> int:
+        return len(self.liquidity)
+
+    def __getitem__(self, index: int) -> HouseholdView:
+        if not -len(self) <= index < len(self):
+            raise IndexError("household index out of range")
+        return HouseholdView(self, index % len(self))
+
+    def __iter__(self):
+        return (HouseholdView(self, i) for i in range(len(self)))
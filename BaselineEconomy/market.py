@@ -0,0 +1,356 @@
+import math
+import numpy as np
+from .household import HouseholdConfig
+
+
+# CONFIG
+
+class MarketConfig:
+    """
+    Tuning Settings for the batched goods market
+    """
+
+    # Largest number of households planned in one vectorised pass.
+    # A stock out the plan did not foresee forces the rest of the
+    # block to be replanned, so the block shrinks towards a few times
+    # the recent gap between them and grows again while there are
+    # none. Stock outs are only foreseen within the planned block.
+    block_size = 4096
+    min_block_size = 16
+
+
+# RESULTS
+
+class MarketOutcome:
+    """
+    The result of clearing a day's goods market
+
+    Variables:
+
+    sold: quantity sold by each firm
+    revenue: money taken by each firm
+    unsatisfied_demand: demand each household failed to satisfy
+    blackmark_households: household index of each blackmark, in shopping order
+    blackmark_firms: firm index of each blackmark
+    blackmark_shortfalls: how short the firm was on each blackmark
+    """
+
+    def __init__(self, num_households: int, num_firms: int) -> None:
+        self.sold = np.zeros(num_firms)
+        self.revenue = np.zeros(num_firms)
+        self.unsatisfied_demand = np.zeros(num_households)
+        self._blackmarks = []
+
+    def add_blackmarks(self, households, firms, shortfalls) -> None:
+        """
+        Record a batch of blackmarks in shopping order
+        """
+        if len(households):
+            self._blackmarks.append((
+                np.asarray(households, dtype=np.int64),
+                np.asarray(firms, dtype=np.int64),
+                np.asarray(shortfalls, dtype=float)
+            ))
+
+    @property
+    def blackmark_households(self) -> np.ndarray:
+        return self._blackmark_column(0, np.int64)
+
+    @property
+    def blackmark_firms(self) -> np.ndarray:
+        return self._blackmark_column(1, np.int64)
+
+    @property
+    def blackmark_shortfalls(self) -> np.ndarray:
+        return self._blackmark_column(2, float)
+
+    def _blackmark_column(self, column: int, dtype) -> np.ndarray:
+        if not self._blackmarks:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate([o[column] for o in self._blackmarks])
+
+
+# FUNCTIONS
+
+def affordable_amount(liquidity, prices):
+    """
+    Vectorised equivalent of BaselineEconomyHousehold.get_affordable_amount
+    Free goods are infinitely affordable
+    """
+    return np.floor_divide(
+        liquidity,
+        prices,
+        out=np.full(np.shape(prices), math.inf),
+        where=prices > 0
+    )
+
+
+def satisfaction_amount(demand):
+    """
+    Vectorised equivalent of the satisfaction threshold in buy_goods
+    """
+    return np.floor(demand * (1 - HouseholdConfig.satisfaction_fraction))
+
+
+def clear_goods_market(
+    order: np.ndarray,
+    suppliers: np.ndarray,
+    prices: np.ndarray,
+    inventory: np.ndarray,
+    liquidity: np.ndarray,
+    demand: np.ndarray
+) -> MarketOutcome:
+    """
+    Run a full day of household shopping as a batch.
+
+    order: household indices in the order they go shopping
+    suppliers: households x suppliers matrix of firm indices, with each
+        row already in the order that household will visit its suppliers
+    prices: goods price at each firm
+    inventory: stock at each firm, updated in place
+    liquidity: money held by each household, updated in place
+    demand: amount of goods each household wants today
+
+    Gives exactly the same result as calling buy_goods on each household
+    in turn. A firm sells to each customer in full until the one that
+    empties it, and to nobody after that, so the day is planned from
+    an estimate of where each firm runs out. The plan is then checked
+    against the stock each firm actually has at every visit, and is
+    exact up to the first household it gets wrong. That household is
+    settled one supplier at a time, the estimates are taken from the
+    plan and the rest of the day is planned again. Every stock out in
+    a round is found at once, so a round only fails where a stock out
+    moved, and each round settles at least one household.
+    """
+    num_households = len(liquidity)
+    num_firms = len(inventory)
+    outcome = MarketOutcome(num_households, num_firms)
+    # Estimated position in the order of the household that empties
+    # each firm, and how much is left for it
+    runs_out = np.full(num_firms, num_households)
+    remaining = np.zeros(num_firms)
+    start = 0
+    block_size = MarketConfig.block_size
+    while start < len(order):
+        runs_out[(runs_out < start) & (inventory > 0)] = num_households
+        runs_out[inventory <= 0] = -1
+        block = order[start:start + block_size]
+        settled = _clear_block(
+            block, start, suppliers, prices, inventory, liquidity, demand,
+            runs_out, remaining, outcome
+        )
+        if settled < len(block):
+            _clear_household(
+                block[settled], suppliers, prices, inventory,
+                liquidity, demand, outcome
+            )
+            settled += 1
+            block_size = min(
+                MarketConfig.block_size,
+                max(MarketConfig.min_block_size, 4 * settled)
+            )
+        else:
+            block_size = min(MarketConfig.block_size, 2 * block_size)
+        start += settled
+    return outcome
+
+
+def batch_buy_goods(model, households: list) -> None:
+    """
+    Run BaselineEconomyHousehold.buy_goods for a list of household
+    agents, in list order, as a single batch.
+
+    Each household shuffles its preferred suppliers from its random
+    generator exactly as buy_goods does, so for a given seed
+    liquidity, inventories, unsatisfied demand and blackmark lists
+    come out the same as shopping one household at a time.
+    """
+    firms = model.firms
+    firm_index = model.firm_positions
+    for hh in households:
+        hh.random.shuffle(hh.preferred_suppliers)
+    suppliers = np.array(
+        [[firm_index[o] for o in hh.preferred_suppliers]
+         for hh in households],
+        dtype=np.int64
+    ).reshape(len(households), -1)
+    opening = np.array([hh.liquidity for hh in households], dtype=float)
+    liquidity = opening.copy()
+    outcome = clear_goods_market(
+        np.arange(len(households)),
+        suppliers,
+        np.array([o.goods_price for o in firms], dtype=float),
+        np.array([o.inventory for o in firms], dtype=float),
+        liquidity,
+        np.array([hh.current_demand for hh in households], dtype=float)
+    )
+    spenders = np.flatnonzero(liquidity != opening)
+    for i, value in zip(spenders.tolist(), liquidity[spenders].tolist()):
+        households[i].liquidity = value
+    model.aggregates.liquidities_changed(
+        [households[i].unique_id for i in spenders.tolist()],
+        liquidity[spenders]
+    )
+    unsatisfied = np.flatnonzero(outcome.unsatisfied_demand)
+    for i, amount in zip(
+        unsatisfied.tolist(),
+        outcome.unsatisfied_demand[unsatisfied].tolist()
+    ):
+        households[i].unsatisfied_demand += amount
+    model.aggregates.unsatisfied_demand += (
+        outcome.unsatisfied_demand.sum().item()
+    )
+    # Each household's blackmarks are together, in shopping order
+    marked = outcome.blackmark_households
+    starts = np.flatnonzero(np.diff(marked, prepend=-1))
+    ends = np.r_[starts[1:], len(marked)].tolist()
+    marked_firms = outcome.blackmark_firms.tolist()
+    shortfalls = outcome.blackmark_shortfalls.tolist()
+    for i, start, end in zip(marked[starts].tolist(), starts.tolist(), ends):
+        households[i].blackmarked_firms.extend(
+            marked_firms[start:end],
+            shortfalls[start:end]
+        )
+    for i in np.flatnonzero(outcome.sold):
+        firms[i].sell_goods(
+            outcome.sold[i].item(),
+            outcome.revenue[i].item()
+        )
+
+
+def _clear_block(
+    block, start, suppliers, prices, inventory, liquidity, demand,
+    runs_out, remaining, outcome
+) -> int:
+    """
+    Plan purchases for a block of households, starting at position
+    start in the order, from the estimate of where each firm runs out.
+    Settle them up to the first household the plan gets wrong, and
+    update the estimates from the plan.
+    Return the number of households settled.
+    """
+    firms = suppliers[block]
+    num_rows, num_suppliers = firms.shape
+    position = np.arange(start, start + num_rows)
+    required = demand[block].astype(float)
+    cash = liquidity[block].astype(float)
+    satisfied_at = satisfaction_amount(required)
+    active = np.ones(num_rows, dtype=bool)
+    visited = np.zeros((num_rows, num_suppliers), dtype=bool)
+    wanted = np.zeros((num_rows, num_suppliers))
+    quantity = np.zeros((num_rows, num_suppliers))
+    shortfall = np.zeros((num_rows, num_suppliers))
+    for slot in range(num_suppliers):
+        firm = firms[:, slot]
+        price = prices[firm]
+        wants = np.minimum(required, affordable_amount(cash, price))
+        last = runs_out[firm]
+        available = np.where(
+            position < last,
+            math.inf,
+            np.where(position == last, remaining[firm], 0)
+        )
+        bought = np.where(active, np.minimum(wants, available), 0)
+        visited[:, slot] = active
+        wanted[:, slot] = wants
+        quantity[:, slot] = bought
+        shortfall[:, slot] = required - available
+        cash -= np.multiply(
+            bought, price, out=np.zeros(num_rows), where=bought > 0
+        )
+        required -= bought
+        active &= required > satisfied_at
+    # Check each visit against the stock the firm would actually have
+    visits = np.flatnonzero(visited.ravel())
+    by_firm = visits[np.argsort(firms.ravel()[visits], kind="stable")]
+    visit_firms = firms.ravel()[by_firm]
+    bought = quantity.ravel()[by_firm]
+    wants = wanted.ravel()[by_firm]
+    sold_before = np.cumsum(bought) - bought
+    group_starts = np.flatnonzero(
+        np.r_[True, visit_firms[1:] != visit_firms[:-1]]
+    )
+    sold_before -= np.repeat(
+        sold_before[group_starts],
+        np.diff(np.r_[group_starts, len(visit_firms)])
+    )
+    in_stock = inventory[visit_firms] - sold_before
+    wrong = bought != np.minimum(wants, in_stock)
+    settled = num_rows
+    if wrong.any():
+        settled = by_firm[wrong].min() // num_suppliers
+    # Each firm runs out at the first visit wanting more than is left,
+    # or not in this block if none does
+    stale = (runs_out >= start) & (runs_out < start + num_rows)
+    runs_out[stale] = len(liquidity)
+    short = np.flatnonzero(in_stock < wants)
+    short_firms, first = np.unique(visit_firms[short], return_index=True)
+    runs_out[short_firms] = position[by_firm[short[first]] // num_suppliers]
+    remaining[short_firms] = np.maximum(in_stock[short[first]], 0)
+    # Settle everything the plan got right
+    rows = slice(0, settled)
+    settled_firms = firms[rows].ravel()
+    settled_quantity = quantity[rows].ravel()
+    spend = settled_quantity * prices[settled_firms]
+    spend[settled_quantity == 0] = 0
+    sold = np.bincount(
+        settled_firms, weights=settled_quantity, minlength=len(inventory)
+    )
+    inventory -= sold
+    outcome.sold += sold
+    outcome.revenue += np.bincount(
+        settled_firms, weights=spend, minlength=len(inventory)
+    )
+    households = block[rows]
+    liquidity[households] = cash[rows]
+    unmet = required[rows] - satisfied_at[rows]
+    outcome.unsatisfied_demand[households] += np.where(
+        active[rows], unmet, 0
+    )
+    marked_rows, marked_slots = np.nonzero(
+        visited[rows] & (quantity[rows] < wanted[rows])
+    )
+    outcome.add_blackmarks(
+        households[marked_rows],
+        firms[marked_rows, marked_slots],
+        shortfall[marked_rows, marked_slots]
+    )
+    return settled
+
+
+def _clear_household(
+    household, suppliers, prices, inventory, liquidity, demand, outcome
+) -> None:
+    """
+    Settle a single household one supplier at a time,
+    following BaselineEconomyHousehold.buy_goods exactly
+    """
+    required = float(demand[household])
+    cash = float(liquidity[household])
+    satisfied_at = math.floor(
+        required * (1 - HouseholdConfig.satisfaction_fraction)
+    )
+    marks = []
+    for firm in suppliers[household]:
+        price = float(prices[firm])
+        available = float(inventory[firm])
+        affordable = cash // price if price > 0 else math.inf
+        if available < required and available < affordable:
+            marks.append((firm, required - available))
+        bought = min(required, affordable, available)
+        inventory[firm] -= bought
+        outcome.sold[firm] += bought
+        if bought > 0:
+            outcome.revenue[firm] += bought * price
+            cash -= bought * price
+        required -= bought
+        if required <= satisfied_at:
+            break
+    else:
+        outcome.unsatisfied_demand[household] += required - satisfied_at
+    liquidity[household] = cash
+    if marks:
+        firms, shortfalls = zip(*marks)
+        outcome.add_blackmarks(
+            [household] * len(marks), firms, shortfalls
+        )
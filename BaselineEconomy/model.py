@@ -1,8 +1,27 @@
 from .household import BaselineEconomyHousehold, HouseholdConfig
+from .household_arrays import HouseholdArrays, sample_distinct
 from .firm import BaselineEconomyFirm, FirmConfig
-from .schedule import Scheduler
-from mesa.datacollection import DataCollector
+from .schedule import Scheduler, ArrayScheduler
+from .aggregates import Aggregates
+from . import aggregates
+from .reporters import (
+    FusedDataCollector,
+    FusedReporter,
+    Sum,
+    Count,
+    Values,
+    Distribution
+)
+from .distribution import gini_coefficient
+from .output import RunWriter, OutputConfig
+from .checkpoint import save_checkpoint
+from .profiling import PhaseTimer, timing_reporters
+from .streams import AgentStreams, BlockDraws, KeyedDraws, SharedDraws
+from .customers import ArrayCustomerIndex, CustomerIndex, firm_size_reporters
 from mesa import Model
+from functools import partial
+import gc
+import numpy as np
 
 
 class BaselineEconomyModel(Model):
@@ -18,6 +37,109 @@ class BaselineEconomyModel(Model):
 
     This version follows the paper as closely as possible
 
+    Households are run either as individual agent objects
+    (engine="object") or as a single structure-of-arrays population
+    (engine="array"), which is much faster for large economies but
+    draws its household random numbers from a separate NumPy stream.
+
+    By default every random number comes from one shared generator,
+    so results depend on the order in which agents act. With
+    rng="keyed", each agent draws from its own counter based stream,
+    keyed by the seed, the agent, the step and the phase of the step,
+    so agents can be updated in any order with the same results.
+    Keyed runs differ draw for draw from shared ones.
+
+    With the object engine, rng="block" draws the numbers behind each
+    month's household and firm decisions, and each day's household
+    order, in NumPy batches instead of one call at a time.
+    This too changes the results draw for draw.
+
+    With initialisation="bulk", the object engine draws every
+    household's preferred suppliers in one vectorised batch, from a
+    NumPy generator (or the keyed streams), instead of a random.sample
+    per household. Large economies build many times faster, with
+    different initial suppliers. The array engine always builds its
+    households this way.
+
+    The firms with open positions are kept in self.vacancies. By
+    default job searches draw firms at random as the paper describes,
+    checking the vacancies only to skip offers when there are none.
+    With job_search="vacancies", a search is skipped outright when no
+    firm is hiring, and a search among a few vacancies is resolved
+    with at most two draws. The outcomes have the same distribution,
+    but differ draw for draw.
+
+    A household looking for a new supplier draws firms at random
+    until it finds one it does not already buy from, which takes many
+    draws when there are few firms. supplier_search="complement" draws
+    just once, from the firms that are not suppliers. The choice is
+    equally likely to be any of them either way, but the draws differ.
+
+    With customer_index=True, the object engine keeps the customers
+    of each firm in a CustomerIndex, self.customers, as households
+    change suppliers, so customers.counts, customers.demand and
+    customers.of need no pass over the households. The array engine
+    answers the same calls from its supplier matrix. The "Customers"
+    and "Workers" reporters give the spread of firm sizes.
+
+    With the object engine, batched_market=True clears each day's goods
+    market in one vectorised pass instead of calling buy_goods on every
+    household. The results are identical for a given seed, and a day
+    takes about three quarters of the time at 5,000 households and
+    half at 20,000.
+
+    The standard reporters are collected with a single pass over the
+    households and a single pass over the firms. Add further reporters
+    with datacollector.add_fused_reporter to share those passes.
+
+    Agents keep running totals of the quantities behind most of the
+    standard reporters. With incremental_reporters=True those reporters
+    read the totals instead of scanning every agent each day, and
+    check_aggregates=True cross-checks the totals against a full scan
+    before every collection. check_money=True checks that the money
+    held by the agents is unchanged after every step, counting the
+    households from their running total so only the firms are visited.
+
+    collection sets when the reporters are collected as the model
+    steps: "daily", "month_start", "month_end", every N steps
+    (an integer), or "on_demand", where nothing is collected until
+    datacollector.collect(model) is called. reporter_collection maps
+    reporter names to their own cadence, and reporters limits
+    collection to the named reporters.
+
+    The Gini is worked out exactly from sorted household liquidity.
+    The shape of the distribution can be reported too: "Top Decile
+    Share" and the percentiles "Liquidity P10", "P50", "P90" and
+    "P99". Name them in reporters to collect them. Given a
+    distribution_error, such as DistributionConfig.relative_error,
+    the model keeps a bucketed histogram of household liquidity in
+    self.aggregates.liquidity_distribution and reads the Gini and
+    the shape from it instead. Households move between its buckets
+    as they are paid and as they spend, so reporting needs no pass
+    over them and no sort. The Gini is then out by at most
+    distribution_error, and the rest by at most that fraction of
+    their value.
+
+    Collected data is held in preallocated NumPy columns. Give
+    max_steps, the length of the run, to allocate them all up front.
+
+    Given an output path, collected data is streamed to a Parquet file
+    (or an Arrow IPC stream for paths ending in .arrow) as the model
+    runs, instead of being kept in memory. The path may name model
+    parameters in braces, e.g. "run_{seed}.parquet". Data from the
+    first burn_in months is not written. The file is finished after
+    max_steps, or by calling close(). Needs pyarrow.
+
+    Given a checkpoint path, which may also name parameters, the full
+    state of the model is saved there every checkpoint_interval months.
+    checkpoint.load_checkpoint resumes the run exactly where it left
+    off.
+
+    With timing=True, the time spent in each phase of the step is
+    accumulated in a PhaseTimer, self.timer, and timer.profile()
+    reports it. timing_columns=True also collects the running total
+    for each phase as a "Seconds <phase>" reporter.
+
     """
 
     def __init__(
@@ -28,9 +150,55 @@ class BaselineEconomyModel(Model):
         firm_liquidity=FirmConfig.initial_liquidity,
         firm_goods_price=FirmConfig.initial_goods_price,
         firm_wage_rate=None,
-        seed=None
+        seed=None,
+        engine="object",
+        rng="shared",
+        initialisation="sequential",
+        job_search="draws",
+        supplier_search="draws",
+        customer_index=False,
+        batched_market=False,
+        incremental_reporters=False,
+        check_aggregates=False,
+        check_money=False,
+        collection="daily",
+        reporter_collection=None,
+        reporters=None,
+        distribution_error=None,
+        max_steps=None,
+        output=None,
+        burn_in=0,
+        checkpoint=None,
+        checkpoint_interval=12,
+        timing=False,
+        timing_columns=False
     ) -> None:
         super().__init__()
+        # Keep the parameters the model was built with
+        self.parameters = {
+            name: value for name, value in locals().items()
+            if name not in ("self", "__class__")
+        }
+        for name, (label, allowed) in self.options.items():
+            _check_option(label, self.parameters[name], allowed)
+        if rng == "block" and engine != "object":
+            raise ValueError("Block draws need the object engine")
+        self.engine = engine
+        self.streams = None
+        if rng == "keyed":
+            self.streams = AgentStreams(
+                self.random.getrandbits(64) if seed is None else seed
+            )
+        self.block_draws = None
+        self.job_search = job_search
+        self.supplier_search = supplier_search
+        # Firms with an open position, in the order they opened it
+        self.vacancies = {}
+        self.batched_market = batched_market
+        self.incremental_reporters = incremental_reporters
+        self.check_aggregates = check_aggregates
+        self.check_money = check_money
+        self.max_steps = max_steps
         self.poverty_level = 1
         self.labour_supply = 1
         self.month_length = 21
@@ -44,31 +212,187 @@ class BaselineEconomyModel(Model):
                     if firm_wage_rate is not None
                     else FirmConfig.initial_wage_rate)
             ) for i in range(num_firms)]
-        self.households = [
+        # Position of each firm in self.firms
+        self.firm_positions = {
+            firm: i for i, firm in enumerate(self.firms)
+        }
+        self.customers = self.build_customer_index()
+        # NumPy generator for the array engine and the modes that
+        # draw their numbers in batches
+        self.np_random = np.random.default_rng(seed)
+        self.households = self.build_households(
+            num_households,
+            household_liquidity
+        )
+        if rng == "block":
+            self.block_draws = BlockDraws(
+                self.np_random,
+                self.households,
+                self.firms
+            )
+        self.schedule = self.build_scheduler()
+        self.aggregates = Aggregates(self, distribution_error)
+        self.datacollector = self.build_datacollector()
+        self.output = None
+        if output is not None:
+            self.start_output(output.format(**self.parameters))
+        elif max_steps is not None:
+            self.datacollector.reserve(max_steps, self.month_length)
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.timer = None
+        if timing or timing_columns:
+            self.timer = PhaseTimer()
+            self.timer.instrument(self, self.phases)
+            self.timer.instrument(self.schedule, self.schedule.phases)
+
+    # Parameters that choose between modes: how each is described
+    # in errors, and its allowed values
+    options = {
+        "engine": ("household engine", ("object", "array")),
+        "rng": ("random number mode", ("shared", "keyed", "block")),
+        "initialisation": ("initialisation", ("sequential", "bulk")),
+        "job_search": ("job search", ("draws", "vacancies")),
+        "supplier_search": ("supplier search", ("draws", "complement")),
+    }
+
+    # Stages of the model step, other than the scheduler's
+    phases = ("step", "collect_data", "write_output", "write_checkpoint")
+
+    def build_households(self, num_households: int, household_liquidity: int):
+        """
+        The households: a HouseholdArrays population for the array
+        engine, otherwise a list of household objects, built one at a
+        time or, with bulk initialisation, in one batch
+        """
+        if self.engine == "array":
+            return HouseholdArrays(self, num_households, household_liquidity)
+        if self.parameters["initialisation"] == "bulk":
+            return self.build_bulk_households(
+                num_households,
+                household_liquidity
+            )
+        return [
             BaselineEconomyHousehold(
                 i,
                 self,
                 household_liquidity
             ) for i in range(num_households)]
 
-        # Set up the scheduler from the model
-        self.schedule = Scheduler(self)
+    def build_bulk_households(
+        self,
+        num_households: int,
+        household_liquidity: int
+    ) -> list:
+        """
+        Every household object, with preferred suppliers drawn in
+        one batch.
+
+        The cyclic garbage collector is paused meanwhile: millions of
+        new objects would otherwise set off repeated full collections
+        that take longer than building the households.
+        """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            suppliers = self.draw_preferred_suppliers(num_households)
+            return [
+                BaselineEconomyHousehold(
+                    i,
+                    self,
+                    household_liquidity,
+                    suppliers[i]
+                ) for i in range(num_households)]
+        finally:
+            if collecting:
+                gc.enable()
+
+    def build_customer_index(self):
+        """
+        The customers of each firm: read from the supplier matrix
+        by the array engine, and indexed as households change
+        suppliers given customer_index. None otherwise.
+        """
+        if self.engine == "array":
+            return ArrayCustomerIndex(self)
+        if self.parameters["customer_index"]:
+            return CustomerIndex(self.firms)
+        return None
+
+    def build_scheduler(self):
+        """
+        Set up the scheduler for the household engine
+        """
+        if self.engine == "array":
+            return ArrayScheduler(self)
+        return Scheduler(self)
+
+    def draw_preferred_suppliers(self, num_households: int) -> list:
+        """
+        The preferred suppliers of every household, sampled as one
+        matrix of firm indices
+        """
+        draws = SharedDraws(self.np_random)
+        if self.streams is not None:
+            draws = KeyedDraws(self.streams)
+        rows = sample_distinct(
+            draws,
+            num_households,
+            HouseholdConfig.num_preferred_suppliers,
+            len(self.firms)
+        )
+        firms = self.firms
+        return [[firms[i] for i in row] for row in rows.tolist()]
 
-        self.datacollector = DataCollector(
+    def build_datacollector(self) -> FusedDataCollector:
+        """
+        Set up the reporters chosen by the model parameters
+        """
+        parameters = self.parameters
+        model_reporters = fused_model_reporters.copy()
+        if parameters["incremental_reporters"]:
+            model_reporters.update(aggregates.incremental_reporters)
+        distribution_error = parameters["distribution_error"]
+        shape_reporters = distribution_reporters(distribution_error)
+        if distribution_error is None:
+            # The standard Gini is already exact
+            del shape_reporters["Gini"]
+        model_reporters.update(shape_reporters)
+        model_reporters.update(firm_size_reporters())
+        reporters = parameters["reporters"]
+        if reporters is None:
+            reporters = list(fused_model_reporters)
+        else:
+            unknown = set(reporters) - set(model_reporters)
+            if unknown:
+                raise ValueError(
+                    "Unknown reporters: {0}".format(sorted(unknown))
+                )
+        if parameters["timing_columns"]:
+            timing = timing_reporters(self.phases + self.schedule.phases)
+            model_reporters.update(timing)
+            reporters = list(reporters) + list(timing)
+        return FusedDataCollector(
             model_reporters={
-                "Employed": count_employed,
-                "On Notice": count_notice,
-                "Poverty Level": count_poverty,
-                "Unsatisfied Demand": percent_unsatisfied_demand,
-                "Inventory": sum_inventory,
-                "Price": average_goods_price,
-                "Wage": average_wage_rate,
-                "HH Savings": sum_hh_savings,
-                "Total Liquidity": sum_liquidity,
-                "Gini": compute_gini,
+                name: reporter
+                for name, reporter in model_reporters.items()
+                if name in reporters
             },
+            cadence=parameters["collection"],
+            reporter_cadence=parameters["reporter_collection"]
         )
 
+    def start_output(self, path: str) -> None:
+        """
+        Stream collected data to a file from now on
+        """
+        self.output = RunWriter(
+            path,
+            self.parameters,
+            self.parameters["burn_in"] * self.month_length
+        )
+        self.datacollector.store.reserve(OutputConfig.batch_rows)
+
     @property
     def num_firms(self) -> int:
         """
@@ -88,29 +412,104 @@ class BaselineEconomyModel(Model):
         A model step. Used for collecting data and advancing the schedule
         """
         self.schedule.step()
-        # This is essentially a check before the next step
-        # It's here to start collecting after the first
-        # month has completed
-        # if self.schedule.is_month_start():
-        #     self.datacollector.collect(self)
-        self.datacollector.collect(self)
+        self.collect_data()
+        if self.output is not None:
+            self.write_output()
+        if (
+            self.checkpoint is not None and
+            self.schedule.steps %
+            (self.checkpoint_interval * self.month_length) == 0
+        ):
+            self.write_checkpoint()
+
+    def collect_data(self) -> None:
+        if self.check_aggregates:
+            self.aggregates.check()
+        if self.check_money:
+            self.aggregates.check_money()
+        self.datacollector.collect_due(self)
+
+    def write_output(self) -> None:
+        self.output.update(self.datacollector.store)
+        if self.schedule.steps == self.max_steps:
+            self.close()
+
+    def write_checkpoint(self) -> None:
+        save_checkpoint(self, self.checkpoint.format(**self.parameters))
+
+    def close(self) -> None:
+        """
+        Finish the run, writing out any collected data still held
+        """
+        if self.output is not None:
+            self.output.close(self.datacollector.store)
+            self.output = None
+        self.running = False
+
+    def __getstate__(self) -> dict:
+        """
+        The model state for a checkpoint.
+
+        Mesa keeps the random generator on the model class, so it is
+        saved explicitly. Reporters are rebuilt from the parameters on
+        loading, so only the data collected so far is kept.
+        """
+        state = self.__dict__.copy()
+        state["random"] = self.random
+        state["datacollector"] = self.datacollector.store
+        state["output"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        store = state.pop("datacollector")
+        self.__dict__.update(state)
+        self.datacollector = self.build_datacollector()
+        self.datacollector.use_store(store)
 
 
 # FUNCTIONS
 
+def _check_option(label: str, value, allowed: tuple) -> None:
+    """
+    Raise ValueError if an option is not one of its allowed values
+    """
+    if value not in allowed:
+        raise ValueError("Unknown {0}: {1}".format(label, value))
+
+
+def household_values(model, attribute: str):
+    """
+    Values of a household attribute across the population.
+    The array engine hands back its column directly.
+    """
+    if model.engine == "array":
+        return getattr(model.households, attribute)
+    return [getattr(hh, attribute) for hh in model.households]
+
+
+def household_total(model, attribute: str):
+    """
+    Sum of a household attribute across the population
+    """
+    values = household_values(model, attribute)
+    if model.engine == "array":
+        return values.sum().item()
+    return sum(values)
+
+
 def count_poverty(model) -> int:
     """
     Number of households employed
     """
-    return sum(
-        [hh.poverty for hh in model.households]
-    )
+    return household_total(model, "poverty")
 
 
 def count_employed(model) -> int:
     """
     Number of households employed
     """
+    if model.engine == "array":
+        return np.count_nonzero(model.households.employer >= 0)
     return sum(
         [hh.employer is not None for hh in model.households]
     )
@@ -129,7 +528,7 @@ def sum_expected_demand(model) -> float:
     """
     Total expected demand over month
     """
-    return sum([hh.current_demand for hh in model.households]) * 21
+    return household_total(model, "current_demand") * 21
 
 
 def percent_unsatisfied_demand(model) -> float:
@@ -138,7 +537,7 @@ def percent_unsatisfied_demand(model) -> float:
     """
     try:
         return (
-            sum([hh.unsatisfied_demand for hh in model.households]) * 100
+            household_total(model, "unsatisfied_demand") * 100
             / sum_expected_demand(model)
         )
     except ZeroDivisionError:
@@ -149,8 +548,17 @@ def compute_gini(model) -> float:
     """
     Calculate the gini coefficient based upon household liquidity
     """
+    if model.engine == "array":
+        return gini_coefficient(model.households.liquidity)
+    return gini_from_list([hh.liquidity for hh in model.households])
+
+
+def gini_from_list(values: list) -> float:
+    """
+    Calculate the gini coefficient of a list of liquidity values
+    """
     try:
-        x = sorted([hh.liquidity for hh in model.households])
+        x = sorted(values)
         N = len(x)
         B = sum(xi * (N - i) for i, xi in enumerate(x)) / (N * sum(x))
         return 1 + (1 / N) - 2 * B
@@ -162,14 +570,14 @@ def sum_hh_savings(model) -> float:
     """
     How much money households expect to save
     """
-    return sum([hh.planned_savings for hh in model.households])
+    return household_total(model, "planned_savings")
 
 
 def sum_hh_liquidity(model) -> int:
     """
     How much money households have
     """
-    return sum([hh.liquidity for hh in model.households])
+    return household_total(model, "liquidity")
 
 
 def sum_firm_liquidity(model) -> int:
@@ -209,3 +617,132 @@ def average_wage_rate(model) -> float:
     """
     wage_rates = [f.wage_rate for f in model.firms]
     return sum(wage_rates) / len(wage_rates) / model.month_length
+
+
+# FUSED REPORTERS
+#
+# The standard reporters above, broken down into accumulators
+# that are filled during one pass over each population
+
+def employed_column(households) -> np.ndarray:
+    """
+    Which households in a HouseholdArrays population have an employer
+    """
+    return households.employer >= 0
+
+
+def finish_unsatisfied_demand(model, results) -> float:
+    try:
+        return (
+            results["unsatisfied_demand"] * 100 /
+            (results["current_demand"] * 21)
+        )
+    except ZeroDivisionError:
+        return 0
+
+
+def finish_gini(model, results) -> float:
+    if model.engine == "array":
+        return gini_coefficient(results["liquidity"])
+    return gini_from_list(results["liquidity"])
+
+
+def liquidity_distribution(model, results):
+    """
+    The distribution of household liquidity built during the
+    household pass, or else the one kept up to date by the model
+    """
+    if "liquidity" in results:
+        return results["liquidity"]
+    return model.aggregates.liquidity_distribution
+
+
+def finish_distribution_gini(model, results) -> float:
+    return liquidity_distribution(model, results).gini()
+
+
+def finish_top_decile(model, results) -> float:
+    return liquidity_distribution(model, results).top_share(0.1)
+
+
+def finish_quantile(q: float, model, results) -> float:
+    return liquidity_distribution(model, results).quantile(q)
+
+
+def finish_average_price(model, results) -> float:
+    return results["goods_price"] / len(model.firms)
+
+
+def finish_average_wage(model, results) -> float:
+    return results["wage_rate"] / len(model.firms) / model.month_length
+
+
+def finish_liquidity(model, results) -> int:
+    return results["firm_liquidity"] + results["household_liquidity"]
+
+
+fused_model_reporters = {
+    "Employed": FusedReporter(
+        households={"employed": Count("employer", employed_column)}
+    ),
+    "On Notice": FusedReporter(
+        firms={"on_notice": Count("worker_on_notice")}
+    ),
+    "Poverty Level": FusedReporter(
+        households={"poverty": Sum("poverty")}
+    ),
+    "Unsatisfied Demand": FusedReporter(
+        finish_unsatisfied_demand,
+        households={
+            "unsatisfied_demand": Sum("unsatisfied_demand"),
+            "current_demand": Sum("current_demand"),
+        }
+    ),
+    "Inventory": FusedReporter(
+        firms={"inventory": Sum("inventory")}
+    ),
+    "Price": FusedReporter(
+        finish_average_price,
+        firms={"goods_price": Sum("goods_price")}
+    ),
+    "Wage": FusedReporter(
+        finish_average_wage,
+        firms={"wage_rate": Sum("wage_rate")}
+    ),
+    "HH Savings": FusedReporter(
+        households={"planned_savings": Sum("planned_savings")}
+    ),
+    "Total Liquidity": FusedReporter(
+        finish_liquidity,
+        households={"household_liquidity": Sum("liquidity")},
+        firms={"firm_liquidity": Sum("liquidity")}
+    ),
+    "Gini": FusedReporter(
+        finish_gini,
+        households={"liquidity": Values("liquidity")}
+    ),
+}
+
+
+def distribution_reporters(relative_error=None) -> dict:
+    """
+    Reporters on the shape of the household liquidity distribution.
+    Given a relative_error, they read the model's liquidity
+    distribution. Otherwise they share one exact distribution built
+    during the household pass.
+    """
+    liquidity = None
+    if relative_error is None:
+        liquidity = {"liquidity": Distribution("liquidity")}
+    reporters = {
+        "Gini": FusedReporter(finish_distribution_gini, households=liquidity),
+        "Top Decile Share": FusedReporter(
+            finish_top_decile, households=liquidity
+        ),
+    }
+    for percentile in (10, 50, 90, 99):
+        reporters["Liquidity P{0}".format(percentile)] = FusedReporter(
+            partial(finish_quantile, percentile / 100),
+            households=liquidity
+        )
+    return reporters
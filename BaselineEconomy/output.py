@@ -0,0 +1,232 @@
+import json
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import ipc, parquet
+except ImportError:
+    pa = None
+
+
+# CONFIG
+
+class OutputConfig:
+    """
+    Settings for streaming run output
+    """
+
+    # Rows held in the run store before they are written out.
+    # Each write is one Parquet row group or one Arrow record batch.
+    batch_rows = 120
+
+    # File metadata keys
+    parameters_key = b"baseline_economy.parameters"
+    seed_key = b"baseline_economy.seed"
+
+
+# WRITER
+
+class RunWriter:
+    """
+    Stream the rows collected in a RunStore to a Parquet file,
+    or an Arrow IPC stream if the path ends in .arrow
+
+    The model parameters and seed are stored as file metadata.
+    Rows collected within the first burn_in_steps steps are dropped.
+
+    Each column's Arrow type follows its type in the store, with
+    columns that have no values yet written as float64 nulls. A column
+    the store later promotes, from bool or int to float, say, is
+    promoted in the file too: what was written is read back and
+    rewritten with the wider type, as a file has one schema.
+
+    Needs pyarrow.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        parameters: dict,
+        burn_in_steps: int = 0
+    ) -> None:
+        if pa is None:
+            raise ImportError("pyarrow is needed to write run output")
+        self.path = path
+        self.metadata = {
+            OutputConfig.parameters_key: json.dumps(
+                parameters, default=str
+            ).encode(),
+            OutputConfig.seed_key: json.dumps(
+                parameters.get("seed"), default=str
+            ).encode(),
+        }
+        self.burn_in_steps = burn_in_steps
+        self.ipc = path.endswith(".arrow")
+        self.schema = None
+        self._writer = None
+        self.rows_written = 0
+
+    def update(self, store) -> None:
+        """
+        Write the store out once it holds a full batch
+        """
+        if store.rows >= OutputConfig.batch_rows:
+            self.write(store)
+
+    def write(self, store) -> None:
+        """
+        Write every row in the store and empty it
+        """
+        keep = store.steps > self.burn_in_steps
+        if keep.any():
+            columns = {"Step": pa.array(store.steps[keep])}
+            for name in store:
+                columns[name] = pa.array(
+                    store[name][keep], type=_arrow_type(store.dtype(name))
+                )
+            self._write_table(pa.table(columns))
+        store.clear()
+
+    def _write_table(self, table) -> None:
+        if self._writer is None:
+            self._open(table.schema.with_metadata(self.metadata))
+        elif not table.schema.equals(self.schema):
+            schema = _merged_schema(self.schema, table.schema, self.path)
+            if not schema.equals(self.schema):
+                self._rewrite(schema.with_metadata(self.metadata))
+            table = _conformed(table, self.schema)
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+
+    def _open(self, schema) -> None:
+        self.schema = schema
+        if self.ipc:
+            self._writer = ipc.new_stream(self.path, schema)
+        else:
+            self._writer = parquet.ParquetWriter(self.path, schema)
+
+    def _rewrite(self, schema) -> None:
+        """
+        Start the file again with a wider schema,
+        keeping what was already written
+        """
+        self._writer.close()
+        # Read it all into memory, as the file is about to be replaced
+        with open(self.path, "rb") as f:
+            source = pa.BufferReader(f.read())
+        if self.ipc:
+            with ipc.open_stream(source) as reader:
+                written = reader.read_all()
+        else:
+            written = parquet.read_table(source)
+        self._open(schema)
+        self._writer.write_table(_conformed(written, schema))
+
+    def close(self, store=None) -> None:
+        """
+        Write anything left in the store and finish the file
+        """
+        if store is not None:
+            self.write(store)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# HELPERS
+
+def _arrow_type(dtype):
+    """
+    Arrow type of a store column: float64 while it has no values,
+    and inferred from the values for a column of objects
+    """
+    if dtype is None:
+        return pa.float64()
+    if dtype == object:
+        return None
+    return pa.from_numpy_dtype(dtype)
+
+
+def _merged_schema(written, schema, path: str):
+    """
+    The schema of the columns written and of a new batch together.
+    A numeric column of two types takes the wider one.
+    """
+    fields = []
+    for field in written:
+        if schema.get_field_index(field.name) < 0:
+            fields.append(field)
+            continue
+        new_type = schema.field(field.name).type
+        if field.type != new_type:
+            numeric = [
+                pa.types.is_boolean(o) or pa.types.is_integer(o) or
+                pa.types.is_floating(o)
+                for o in (field.type, new_type)
+            ]
+            if not all(numeric):
+                raise ValueError(
+                    "Collected data no longer matches the columns already "
+                    "written to {0}: {1} was {2}, now {3}".format(
+                        path, field.name, field.type, new_type
+                    )
+                )
+            if pa.types.is_floating(field.type) or \
+                    pa.types.is_floating(new_type):
+                field = field.with_type(pa.float64())
+            else:
+                field = field.with_type(pa.int64())
+        fields.append(field)
+    for field in schema:
+        if written.get_field_index(field.name) < 0:
+            fields.append(field)
+    return pa.schema(fields)
+
+
+def _conformed(table, schema):
+    """
+    The table cast to the schema, with nulls for any column it lacks
+    """
+    columns = []
+    for field in schema:
+        if table.schema.get_field_index(field.name) < 0:
+            columns.append(pa.nulls(table.num_rows, field.type))
+        else:
+            columns.append(table.column(field.name).cast(field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+# READER
+
+def read_run(path: str):
+    """
+    Read a run written by RunWriter.
+    Return the data as a DataFrame and the model parameters.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is needed to read run output")
+    if path.endswith(".arrow"):
+        with ipc.open_stream(path) as reader:
+            table = reader.read_all()
+    else:
+        table = parquet.read_table(path)
+    metadata = table.schema.metadata or {}
+    parameters = json.loads(
+        metadata.get(OutputConfig.parameters_key, b"{}").decode()
+    )
+    return table.to_pandas(), parameters
+
+
+def read_runs(paths) -> pd.DataFrame:
+    """
+    Read several runs into one DataFrame, with each run's
+    parameters added as columns
+    """
+    frames = []
+    for path in paths:
+        frame, parameters = read_run(path)
+        for name, value in parameters.items():
+            if value is None or isinstance(value, (str, int, float)):
+                frame[name] = value
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
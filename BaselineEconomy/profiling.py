@@ -0,0 +1,101 @@
+from functools import partial
+import time
+
+
+# TIMERS
+
+class PhaseTimer:
+    """
+    Wall clock time spent in each phase of the model step
+
+    Phases are methods of the model and its scheduler. instrument
+    replaces them on a single object with timed versions, so models
+    run without a timer pay nothing for it.
+
+    Variables:
+
+    seconds: total time spent in each phase, by phase name
+    calls: number of times each phase ran
+    """
+
+    def __init__(self) -> None:
+        self.seconds = {}
+        self.calls = {}
+
+    def instrument(self, owner, phases) -> None:
+        """
+        Time the named methods of owner from now on
+        """
+        for name in phases:
+            self.seconds.setdefault(name, 0.0)
+            self.calls.setdefault(name, 0)
+            setattr(owner, name, _TimedPhase(self, owner, name))
+
+    def add(self, name: str, seconds: float) -> None:
+        self.seconds[name] += seconds
+        self.calls[name] += 1
+
+    def profile(self) -> dict:
+        """
+        Seconds, calls and share of the model step for each phase
+        """
+        total = self.seconds.get("step", 0.0)
+        return {
+            name: {
+                "seconds": seconds,
+                "calls": self.calls[name],
+                "share": seconds / total if total else 0.0,
+            }
+            for name, seconds in self.seconds.items()
+        }
+
+
+class _TimedPhase:
+    """
+    Stands in for a method, adding the time each call takes
+    to a PhaseTimer.
+
+    Holds the method by name rather than bound, so a timed model
+    can still be checkpointed.
+    """
+
+    def __init__(self, timer: PhaseTimer, owner, name: str) -> None:
+        self.timer = timer
+        self.owner = owner
+        self.name = name
+        self.method = getattr(type(owner), name)
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.method(self.owner, *args)
+        finally:
+            self.timer.add(self.name, time.perf_counter() - start)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["method"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.method = getattr(type(self.owner), self.name)
+
+
+# REPORTERS
+
+def phase_seconds(name: str, model) -> float:
+    """
+    Total time spent in a phase so far
+    """
+    return model.timer.seconds[name]
+
+
+def timing_reporters(phases) -> dict:
+    """
+    A reporter for the time spent in each phase, named "Seconds <phase>"
+    """
+    return {
+        "Seconds " + name: partial(phase_seconds, name)
+        for name in phases
+    }
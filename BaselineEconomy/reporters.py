@@ -0,0 +1,438 @@
+from mesa.datacollection import DataCollector
+from functools import partial
+from numbers import Integral
+from operator import attrgetter
+import types
+import numpy as np
+from .distribution import distribution
+from .store import RunStore
+
+
+# CADENCE
+
+# When a reporter is collected as the model steps:
+#   "daily": after every step
+#   "month_start": after the first day of each month
+#   "month_end": after the last day of each month
+#   "on_demand": only when a consumer calls collect itself
+#   an integer N: after every Nth step
+cadences = ("daily", "month_start", "month_end", "on_demand")
+
+
+def check_cadence(cadence) -> None:
+    """
+    Raise ValueError if the cadence is not one of the known policies
+    """
+    if isinstance(cadence, Integral) and not isinstance(cadence, bool):
+        if cadence < 1:
+            raise ValueError(
+                "Collection interval must be at least 1: {0}".format(cadence)
+            )
+    elif cadence not in cadences:
+        raise ValueError("Unknown collection cadence: {0}".format(cadence))
+
+
+def is_due(cadence, steps: int, month_length: int) -> bool:
+    """
+    Is a reporter with this cadence due once the given number
+    of steps have been run?
+    """
+    if cadence == "daily":
+        return True
+    if cadence == "month_start":
+        return (steps - 1) % month_length == 0
+    if cadence == "month_end":
+        return steps % month_length == 0
+    if cadence == "on_demand":
+        return False
+    return steps % cadence == 0
+
+
+# ACCUMULATORS
+
+class Sum:
+    """
+    Total of a value taken from every agent
+
+    value: attribute name, or function of a single agent
+    columns: function of a HouseholdArrays population returning the
+        value for every household as an array. Only needed for
+        household values that are not plain attributes.
+    """
+
+    def __init__(self, value, columns=None) -> None:
+        self.value = value
+        self.columns = columns
+
+    @property
+    def key(self) -> tuple:
+        return (type(self), self.value, self.columns)
+
+    def reduce(self, values):
+        return sum(values)
+
+    def reduce_array(self, values):
+        return values.sum().item()
+
+
+class Count(Sum):
+    """
+    Number of agents whose value is not None
+    """
+
+    def reduce(self, values):
+        return len(values) - values.count(None)
+
+    def reduce_array(self, values):
+        return np.count_nonzero(values)
+
+
+class Values(Sum):
+    """
+    Every agent's value, in population order
+    """
+
+    def reduce(self, values):
+        return list(values)
+
+    def reduce_array(self, values):
+        return values
+
+
+class Distribution(Sum):
+    """
+    Distribution of a value across the agents, held exactly or,
+    given a relative_error, as a LiquidityHistogram
+    """
+
+    def __init__(self, value, relative_error=None, columns=None) -> None:
+        super().__init__(value, columns)
+        self.relative_error = relative_error
+
+    @property
+    def key(self) -> tuple:
+        return super().key + (self.relative_error,)
+
+    def reduce(self, values):
+        return distribution(values, self.relative_error)
+
+    def reduce_array(self, values):
+        return distribution(values, self.relative_error)
+
+
+class ModelValue:
+    """
+    A value worked out once for the whole model rather than
+    from a pass over the agents, such as from an index kept
+    as the model runs
+
+    value: function of the model
+    """
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    @property
+    def key(self) -> tuple:
+        return (type(self), self.value)
+
+
+# REPORTERS
+
+class FusedReporter:
+    """
+    A model reporter worked out from accumulators that are all
+    filled during one shared pass over the households and one
+    shared pass over the firms.
+
+    finish: function(model, results) returning the reported value,
+        where results maps each accumulator name to its result.
+        If not given, the result of the only accumulator is reported.
+    households: mapping of names to household accumulators
+    firms: mapping of names to firm accumulators
+    model: mapping of names to ModelValues, each worked out once
+        per collection however many reporters share it
+    """
+
+    def __init__(
+        self,
+        finish=None,
+        households=None,
+        firms=None,
+        model=None
+    ) -> None:
+        self.households = households or {}
+        self.firms = firms or {}
+        self.model = model or {}
+        self.finish = finish or self.only_result
+
+    @staticmethod
+    def only_result(model, results):
+        (result,) = results.values()
+        return result
+
+
+# FUNCTIONS
+
+def traverse(agents, accumulators: list) -> dict:
+    """
+    Visit every agent once, pulling out all the values the
+    accumulators need, and reduce each of them.
+    Return the results keyed by accumulator key.
+    """
+    extract = list({o.value: None for o in accumulators})
+    if not extract:
+        return {}
+    if all(isinstance(o, str) for o in extract):
+        getter = attrgetter(*extract)
+    else:
+        getters = [
+            attrgetter(o) if isinstance(o, str) else o for o in extract
+        ]
+
+        def getter(agent):
+            return tuple([get(agent) for get in getters])
+
+    if len(extract) == 1:
+        columns = [tuple(map(getter, agents))]
+    else:
+        columns = list(zip(*map(getter, agents))) or [()] * len(extract)
+    by_value = dict(zip(extract, columns))
+    return {o.key: o.reduce(by_value[o.value]) for o in accumulators}
+
+
+def traverse_arrays(households, accumulators: list) -> dict:
+    """
+    The HouseholdArrays equivalent of traverse.
+    Columns are read straight from the population.
+    """
+    results = {}
+    for o in accumulators:
+        if o.columns is not None:
+            values = o.columns(households)
+        elif isinstance(o.value, str):
+            values = getattr(households, o.value)
+        else:
+            values = np.array([o.value(hh) for hh in households])
+        results[o.key] = o.reduce_array(values)
+    return results
+
+
+# COLLECTOR
+
+class FusedDataCollector(DataCollector):
+    """
+    DataCollector that evaluates every FusedReporter with a single
+    pass over the households and a single pass over the firms.
+
+    Model reporters that are not FusedReporters are collected by
+    the standard DataCollector, one at a time.
+
+    cadence: when reporters are collected as the model steps
+    reporter_cadence: mapping of reporter names to their own cadence,
+        overriding the collector's
+
+    Every collection adds a row to every reporter. Reporters that
+    were not due on that step record None. The model step of each
+    row is kept in collection_steps.
+
+    Model variables are kept in a columnar RunStore, which stands in
+    for mesa's dict of lists as model_vars.
+    """
+
+    def __init__(
+        self,
+        model_reporters=None,
+        agent_reporters=None,
+        tables=None,
+        cadence="daily",
+        reporter_cadence=None
+    ) -> None:
+        model_reporters = model_reporters or {}
+        super().__init__(
+            {
+                name: reporter
+                for name, reporter in model_reporters.items()
+                if not isinstance(reporter, FusedReporter)
+            },
+            agent_reporters,
+            tables
+        )
+        self.fused_reporters = {}
+        self._household_accumulators = []
+        self._firm_accumulators = []
+        self._model_accumulators = []
+        # Keep the columns in the order they were declared
+        self.store = RunStore(model_reporters)
+        self.model_vars = self.store
+        for name, reporter in model_reporters.items():
+            if isinstance(reporter, FusedReporter):
+                self.add_fused_reporter(name, reporter)
+        check_cadence(cadence)
+        self.cadence = cadence
+        self.reporter_cadence = {}
+        for name, reporter_cadence in (reporter_cadence or {}).items():
+            self.set_cadence(name, reporter_cadence)
+
+    @property
+    def collection_steps(self) -> np.ndarray:
+        """
+        The model step each row was collected on
+        """
+        return self.store.steps
+
+    def add_fused_reporter(self, name: str, reporter: FusedReporter) -> None:
+        """
+        Register a reporter that contributes accumulators
+        to the shared passes
+        """
+        self.fused_reporters[name] = reporter
+        self.store.add_column(name)
+        self._household_accumulators = self._unique("households")
+        self._firm_accumulators = self._unique("firms")
+        self._model_accumulators = self._unique("model")
+
+    def use_store(self, store: RunStore) -> None:
+        """
+        Carry on collecting into an existing store
+        """
+        self.store = store
+        self.model_vars = store
+
+    def set_cadence(self, name: str, cadence) -> None:
+        """
+        Collect a single reporter on its own cadence
+        """
+        if name not in self.model_vars:
+            raise ValueError("Unknown reporter: {0}".format(name))
+        check_cadence(cadence)
+        self.reporter_cadence[name] = cadence
+
+    def _unique(self, agents: str, names=None) -> list:
+        unique = {}
+        for name, reporter in self.fused_reporters.items():
+            if names is not None and name not in names:
+                continue
+            for accumulator in getattr(reporter, agents).values():
+                unique.setdefault(accumulator.key, accumulator)
+        return list(unique.values())
+
+    def evaluate(self, model, names=None) -> dict:
+        """
+        Work out the fused reporters for the current model state.
+        All of them, or only those named.
+        """
+        if names is None:
+            reporters = self.fused_reporters
+            household_accumulators = self._household_accumulators
+            firm_accumulators = self._firm_accumulators
+            model_accumulators = self._model_accumulators
+        else:
+            reporters = {
+                name: reporter
+                for name, reporter in self.fused_reporters.items()
+                if name in names
+            }
+            household_accumulators = self._unique("households", names)
+            firm_accumulators = self._unique("firms", names)
+            model_accumulators = self._unique("model", names)
+        if model.engine == "array":
+            household_results = traverse_arrays(
+                model.households,
+                household_accumulators
+            )
+        else:
+            household_results = traverse(
+                model.households,
+                household_accumulators
+            )
+        firm_results = traverse(model.firms, firm_accumulators)
+        model_results = {o.key: o.value(model) for o in model_accumulators}
+        report = {}
+        for name, reporter in reporters.items():
+            named = {
+                label: household_results[accumulator.key]
+                for label, accumulator in reporter.households.items()
+            }
+            named.update({
+                label: firm_results[accumulator.key]
+                for label, accumulator in reporter.firms.items()
+            })
+            named.update({
+                label: model_results[accumulator.key]
+                for label, accumulator in reporter.model.items()
+            })
+            report[name] = reporter.finish(model, named)
+        return report
+
+    def due(self, model) -> list:
+        """
+        Names of the reporters due after the model's latest step
+        """
+        steps = model.schedule.steps
+        return [
+            name for name in self.model_vars
+            if is_due(
+                self.reporter_cadence.get(name, self.cadence),
+                steps,
+                model.month_length
+            )
+        ]
+
+    def collect_due(self, model) -> None:
+        """
+        Collect the reporters due after the model's latest step,
+        if there are any
+        """
+        names = self.due(model)
+        if names:
+            self.collect(model, names)
+
+    def collect(self, model, names=None) -> None:
+        """
+        Collect all the data for the given model object,
+        or only the named reporters
+        """
+        if names is None:
+            names = list(self.model_vars)
+        if self.fused_reporters:
+            report = self.evaluate(model, names)
+        else:
+            report = {}
+        for name in names:
+            if name in self.model_reporters:
+                report[name] = self._report(self.model_reporters[name], model)
+        self.store.append(model.schedule.steps, report)
+        if self.agent_reporters:
+            agent_records = self._record_agents(model)
+            self._agent_records[model.schedule.steps] = list(agent_records)
+
+    def reserve(self, max_steps: int, month_length: int) -> None:
+        """
+        Preallocate the store for a run of max_steps
+        """
+        steps = np.arange(1, max_steps + 1)
+        due = np.zeros(max_steps, dtype=bool)
+        policies = {
+            self.reporter_cadence.get(name, self.cadence)
+            for name in self.model_vars
+        }
+        for cadence in policies:
+            due |= is_due(cadence, steps, month_length)
+        self.store.reserve(np.count_nonzero(due))
+
+    def get_model_vars_dataframe(self):
+        """
+        The model variables collected so far, as a DataFrame
+        """
+        return self.store.to_dataframe()
+
+    def _report(self, reporter, model):
+        """
+        Call a standard reporter the way DataCollector.collect does
+        """
+        if isinstance(reporter, (types.LambdaType, partial)):
+            return reporter(model)
+        if isinstance(reporter, list):
+            return reporter[0](*reporter[1])
+        return self._reporter_decorator(reporter)
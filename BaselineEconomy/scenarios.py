@@ -0,0 +1,188 @@
+import time
+import traceback
+import numpy as np
+from .batch import ProcessBatchRunner, RunResult, complete_run
+from .checkpoint import dumps, loads
+
+
+# SCENARIOS
+
+def inject_money(model, households=0, firms=0) -> None:
+    """
+    Exogenous money: give every household and every firm
+    an extra amount
+    """
+    totals = model.aggregates
+    if model.engine == "array":
+        model.households.liquidity += households
+        totals.liquidities_changed(
+            np.arange(model.num_households),
+            model.households.liquidity
+        )
+    else:
+        for hh in model.households:
+            hh.liquidity += households
+            totals.liquidity_changed(hh)
+    for firm in model.firms:
+        firm.liquidity += firms
+    totals.household_liquidity += households * model.num_households
+    totals.firm_liquidity += firms * model.num_firms
+    totals.money_supply += (
+        households * model.num_households + firms * model.num_firms
+    )
+
+
+# FUNCTIONS
+
+def warm_up(
+    model_cls,
+    parameters: dict,
+    iteration: int,
+    burn_in_steps: int
+) -> RunResult:
+    """
+    Build a model, run its burn in and snapshot it.
+    Called in a worker process.
+
+    Data collected during the burn in is dropped from the snapshot.
+    """
+    result = RunResult(parameters, iteration)
+    start = time.perf_counter()
+    try:
+        model = model_cls(**parameters)
+        for _ in range(burn_in_steps):
+            model.step()
+        model.datacollector.store.clear()
+        result.steps = model.schedule.steps
+        result.snapshot = dumps(model)
+    except Exception:
+        result.error = traceback.format_exc()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_scenario(
+    snapshot: bytes,
+    name: str,
+    scenario,
+    parameters: dict,
+    iteration: int,
+    max_steps: int,
+    output=None
+) -> RunResult:
+    """
+    Continue a warmed up model from its snapshot under a scenario.
+    Called in a worker process.
+
+    scenario: function applied to the model before it continues,
+        or None to carry on unchanged
+    output: path to stream the scenario's data to, which may name
+        the scenario and model parameters in braces
+    """
+    result = RunResult(parameters, iteration)
+    result.scenario = name
+    start = time.perf_counter()
+    try:
+        model = loads(snapshot)
+        if scenario is not None:
+            scenario(model)
+        if output is not None:
+            model.parameters["scenario"] = name
+            model.start_output(output.format(**model.parameters))
+        complete_run(model, max_steps, result)
+    except Exception:
+        result.error = traceback.format_exc()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+# RUNNER
+
+class ScenarioRunner(ProcessBatchRunner):
+    """
+    Run the burn in of every parameter combination once, then
+    continue each warmed up economy under every scenario
+
+    scenarios: mapping of scenario names to functions applied to
+        the model at the end of the burn in, e.g.
+        functools.partial(inject_money, households=100).
+        Scenario functions must be picklable.
+    burn_in_steps: length of the shared burn in
+    output: path to stream each scenario's data to, which may name
+        the scenario and model parameters in braces
+
+    Other arguments are as ProcessBatchRunner. The burn ins run
+    across the pool first, and each scenario then starts from a
+    snapshot of its warmed up model. Results hold the data collected
+    after the burn in, one for each parameter combination and
+    scenario, in that order.
+    """
+
+    def __init__(
+        self,
+        model_cls,
+        scenarios: dict,
+        variable_parameters=None,
+        fixed_parameters=None,
+        iterations=1,
+        burn_in_steps=0,
+        max_steps=1000,
+        workers=None,
+        display_progress=True,
+        output=None
+    ) -> None:
+        super().__init__(
+            model_cls,
+            variable_parameters,
+            fixed_parameters,
+            iterations,
+            max_steps,
+            workers,
+            display_progress
+        )
+        self.scenarios = scenarios
+        self.burn_in_steps = burn_in_steps
+        self.output = output
+
+    def run_all(self, callback=None) -> list:
+        """
+        Warm up every model, then run every scenario.
+        Return the scenario results.
+        callback, if given, is called with each scenario result
+        as it arrives.
+        """
+        warmed = self.run_tasks([
+            (
+                warm_up,
+                (self.model_cls, parameters, iteration, self.burn_in_steps),
+                RunResult(parameters, iteration)
+            )
+            for parameters, iteration in self.runs
+        ])
+        results = []
+        tasks = []
+        positions = []
+        for run in warmed:
+            for name, scenario in self.scenarios.items():
+                placeholder = RunResult(run.parameters, run.iteration)
+                placeholder.scenario = name
+                if not run.ok:
+                    placeholder.error = run.error
+                    results.append(placeholder)
+                    continue
+                positions.append(len(results))
+                results.append(None)
+                tasks.append((
+                    run_scenario,
+                    (
+                        run.snapshot, name, scenario, run.parameters,
+                        run.iteration, self.max_steps, self.output
+                    ),
+                    placeholder
+                ))
+        for position, result in zip(
+            positions, self.run_tasks(tasks, callback)
+        ):
+            results[position] = result
+        self.results = results
+        return results
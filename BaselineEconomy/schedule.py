@@ -1,14 +1,32 @@
 # -*- coding: utf-8 -*-
 
 from typing import List, Tuple
+import numpy as np
+from .firm import production_amount
+from .market import batch_buy_goods
+from .dividends import pay_dividends
 
 
 class Scheduler:
     """
     Bespoke scheduler to run the Baseline Economy by Class and Step
     according to the precise ordering in the paper.
+
+    Each stage of the step is a method named in phases, so a
+    PhaseTimer can time them.
     """
 
+    phases = (
+        "shuffle_households",
+        "start_month",
+        "households_day",
+        "firms_day",
+        "pay_wages",
+        "calculate_shareholdings",
+        "distribute_profits",
+        "households_month_end",
+    )
+
     def __init__(
         self,
         model
@@ -54,36 +72,213 @@ class Scheduler:
         shareholding = [(o, o.liquidity) for o in self.households]
         return (shareholding, sum([x[1] for x in shareholding]))
 
+    def dividends_per_share(self, total_shares: int) -> np.ndarray:
+        """
+        Each firm's distributable profits spread over the total holding
+        """
+        profits = np.array(
+            [firm.distributable_profits() for firm in self.firms],
+            dtype=float
+        )
+        if not total_shares:
+            return np.zeros(len(profits))
+        return profits / total_shares
+
+    def distribute_profits(
+        self,
+        shareholding: List[Tuple],
+        total_shares: int
+    ) -> None:
+        """
+        Distribute the profits of every firm in a single pass.
+        Equivalent to calling distribute_profits on each firm in turn,
+        since every firm pays out against the same holdings.
+        """
+        paid, received = pay_dividends(
+            self.dividends_per_share(total_shares),
+            np.array([x[1] for x in shareholding], dtype=float)
+        )
+        for firm, amount in zip(self.firms, paid.tolist()):
+            if amount:
+                firm.liquidity -= int(amount)
+        recipients = []
+        for holder, amount in zip(shareholding, received.tolist()):
+            if amount:
+                holder[0].liquidity += int(amount)
+                recipients.append(holder[0])
+        self.model.aggregates.transfer_to_households(
+            int(paid.sum()),
+            recipients
+        )
+
+    def begin(self, purpose: str) -> None:
+        """
+        Start a phase of the step, for models that key their
+        random numbers by agent or draw them a month at a time
+        """
+        if self.model.streams is not None:
+            self.model.streams.begin(self.steps, purpose)
+        if self.model.block_draws is not None and purpose == "month_start":
+            self.model.block_draws.draw_month()
+
+    def shuffle_households(self) -> None:
+        """
+        Shuffle the household list once per step
+        """
+        streams = self.model.streams
+        if streams is not None:
+            streams.stream("model", 0).shuffle(self.households)
+        elif self.model.block_draws is not None:
+            self.model.block_draws.shuffle(self.households)
+        else:
+            self.model.random.shuffle(self.households)
+
+    def start_month(self) -> None:
+        """
+        Beginning of a month. Firms first
+        """
+        for firm in self.firms:
+            firm.month_start()
+        self.model.aggregates.month_start()
+        for hh in self.households:
+            hh.month_start()
+
+    def households_day(self) -> None:
+        if self.model.batched_market:
+            batch_buy_goods(self.model, self.households)
+        else:
+            for hh in self.households:
+                hh.day()
+
+    def firms_day(self) -> None:
+        for firm in self.firms:
+            firm.day()
+
+    def pay_wages(self) -> None:
+        for firm in self.firms:
+            firm.month_end()
+
+    def households_month_end(self) -> None:
+        for hh in self.households:
+            hh.month_end()
+
     def step(self) -> None:
         # Set the model day number
         self.day += 1
-        # Shuffle the household list once per step
-        self.model.random.shuffle(self.households)
+        self.begin("shuffle")
+        self.shuffle_households()
         # Beginning of a month
-        # Firms first
         if self.is_month_start():
-            for firm in self.firms:
-                firm.month_start()
-            for hh in self.households:
-                hh.month_start()
+            self.begin("month_start")
+            self.start_month()
         # Lapse of a day
         # Households first
-        for hh in self.households:
-            hh.day()
-        for firm in self.firms:
-            firm.day()
+        self.begin("day")
+        self.households_day()
+        self.firms_day()
         # End of a month
         # Firms first
         if self.is_month_end():
-            # Pay Wages
-            for firm in self.firms:
-                firm.month_end()
+            self.begin("month_end")
+            self.pay_wages()
             # Calculate householder shareholdings
             shareholder_details = self.calculate_shareholdings()
             # Distribute Profits
-            for firm in self.firms:
-                firm.distribute_profits(*shareholder_details)
-            for hh in self.households:
-                hh.month_end()
+            self.distribute_profits(*shareholder_details)
+            self.households_month_end()
             self.month += 1
         self.steps += 1
+
+
+class ArrayScheduler(Scheduler):
+    """
+    Scheduler for a model whose households are held in a
+    HouseholdArrays population.
+
+    Follows the same ordering as Scheduler, but each household stage
+    is a single vectorised call over the whole population, made in the
+    shuffled household order for the day.
+    """
+
+    def __init__(
+        self,
+        model
+    ) -> None:
+        """
+        Initialise the scheduler with a reference to the model
+
+        """
+        # Instance variables
+        self.model = model
+        self.month_length = self.model.month_length
+        self.month = 0
+        self.day = 0
+        self.steps = 0
+        self.firms = self.model.firms.copy()
+        self.households = self.model.households
+        self.order = np.arange(len(self.households))
+
+    def calculate_shareholdings(self) -> (np.ndarray, int):
+        """
+        Calculate the 'shareholding' of firms based upon the current
+        liquidty of the households.
+
+        Return an array of imputed holdings, indexed by household,
+        and a total value for the holding.
+        """
+        shareholding = self.households.liquidity.copy()
+        return (shareholding, shareholding.sum())
+
+    def distribute_profits(
+        self,
+        shareholding: np.ndarray,
+        total_shares: int
+    ) -> None:
+        """
+        Distribute the profits of every firm in a single pass
+        """
+        paid, received = pay_dividends(
+            self.dividends_per_share(total_shares),
+            shareholding
+        )
+        for i in np.flatnonzero(paid):
+            self.firms[i].liquidity -= paid[i].item()
+        self.households.liquidity += received
+        self.model.aggregates.transfer_to_households(paid.sum().item())
+        recipients = np.flatnonzero(received)
+        self.model.aggregates.liquidities_changed(
+            recipients,
+            self.households.liquidity[recipients]
+        )
+
+    def shuffle_households(self) -> None:
+        """
+        Shuffle the household order once per step
+        """
+        self.order = self.households.draws.permutation(len(self.households))
+
+    def start_month(self) -> None:
+        """
+        Beginning of a month. Firms first
+        """
+        for firm in self.firms:
+            firm.month_start()
+        self.model.aggregates.month_start()
+        self.households.month_start(self.order)
+
+    def households_day(self) -> None:
+        self.households.day(self.order)
+
+    def firms_day(self) -> None:
+        """
+        Each firm turns the labour power of its workforce into output
+        """
+        labour = self.households.labour_by_firm()
+        for firm, labour_power in zip(self.model.firms, labour.tolist()):
+            firm.inventory += production_amount(labour_power)
+        self.model.aggregates.inventory += production_amount(
+            labour.sum().item()
+        )
+
+    def households_month_end(self) -> None:
+        self.households.month_end()
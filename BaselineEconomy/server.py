@@ -8,7 +8,25 @@ from .ModularVisualization import ModularServer
 from mesa.visualization.modules import ChartModule
 from mesa.visualization.UserParam import UserSettableParameter
 
-personal_chart = ChartModule(
+
+class StoreChartModule(ChartModule):
+    """
+    ChartModule reading the latest values from the model's run store,
+    which hands back plain Python values ready for JSON
+    """
+
+    def render(self, model):
+        store = getattr(model, self.data_collector_name).store
+        values = []
+        for series in self.series:
+            value = None
+            if series["Label"] in store:
+                value = store.latest(series["Label"])
+            values.append(0 if value is None else value)
+        return values
+
+
+personal_chart = StoreChartModule(
     [
         {"Label": "Employed", "Color": "Black"},
         {"Label": "On Notice", "Color": "Red"},
@@ -16,36 +34,55 @@ personal_chart = ChartModule(
     ],
     data_collector_name='datacollector'
 )
-firm_chart = ChartModule(
+firm_chart = StoreChartModule(
     [
         {"Label": "Inventory", "Color": "Blue"}
     ]
 )
-price_chart = ChartModule(
+price_chart = StoreChartModule(
     [
         {"Label": "Price", "Color": "Green"},
         {"Label": "Wage", "Color": "Black"}
     ]
 )
 
-demand_chart = ChartModule(
+demand_chart = StoreChartModule(
     [
         {"Label": "Unsatisfied Demand", "Color": "Green"},
     ]
 )
-savings_chart = ChartModule(
+savings_chart = StoreChartModule(
     [
         {"Label": "HH Savings", "Color": "Blue"},
         {"Label": "Total Liquidity", "Color": "Black"}
     ]
 )
-gini_chart = ChartModule(
+gini_chart = StoreChartModule(
     [
         {"Label": "Gini", "Color": "Red"}
     ]
 )
+distribution_chart = StoreChartModule(
+    [
+        {"Label": "Liquidity P10", "Color": "Red"},
+        {"Label": "Liquidity P50", "Color": "Black"},
+        {"Label": "Liquidity P90", "Color": "Blue"},
+        {"Label": "Liquidity P99", "Color": "Green"},
+    ]
+)
+charts = [
+    personal_chart, firm_chart, price_chart, demand_chart,
+    savings_chart, gini_chart, distribution_chart
+]
 model_params = {
     "num_households": 1000, "num_firms": 100,
+    # The charts plot every step, so collect just what they show
+    "collection": "daily",
+    "reporters": [
+        series["Label"] for chart in charts for series in chart.series
+    ],
+    # Draw the initial suppliers in one batch, so a reset is quick
+    "initialisation": "bulk",
     "household_liquidity": UserSettableParameter(
         "slider", "Household Starting Money",
         value=3200,
@@ -78,8 +115,7 @@ model_params = {
 
 server = ModularServer(
     BaselineEconomyModel,
-    [personal_chart, firm_chart, price_chart, demand_chart,
-        savings_chart, gini_chart],
+    charts,
     "Baseline Economy",
     model_params,
 )
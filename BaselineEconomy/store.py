@@ -0,0 +1,231 @@
+from collections.abc import Mapping
+from numbers import Integral, Real
+import numpy as np
+import pandas as pd
+
+
+# CONFIG
+
+class StoreConfig:
+    """
+    Settings for the columnar run store
+    """
+
+    # Rows allocated when the run length is not known in advance.
+    # The store doubles in size whenever it fills up.
+    initial_capacity = 256
+
+
+# STORE
+
+class RunStore(Mapping):
+    """
+    Time series of model reporters held as preallocated NumPy columns
+
+    Reads like the dict of lists that mesa's DataCollector keeps in
+    model_vars: store[name] is the column for a reporter, as an array
+    view of the rows collected so far.
+
+    Each column takes its type from the first value it receives:
+    bool, int64, float64, or object for anything else. It is promoted
+    to float64 if it later receives a float, or a None, which is
+    stored as NaN, and to object if it receives something
+    non-numeric.
+
+    Pickling only copies the rows collected, so a store is cheap to
+    send back from a worker process.
+    """
+
+    def __init__(self, names=(), capacity=None) -> None:
+        self.capacity = max(1, capacity or StoreConfig.initial_capacity)
+        self.rows = 0
+        self._steps = np.zeros(self.capacity, dtype=np.int64)
+        self._columns = {}
+        for name in names:
+            self.add_column(name)
+
+# MAPPING
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        column = self._columns[name]
+        if column is None:
+            return np.full(self.rows, None, dtype=object)
+        return column[:self.rows]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+# QUERIES
+
+    @property
+    def steps(self) -> np.ndarray:
+        """
+        The model step each row was collected on
+        """
+        return self._steps[:self.rows]
+
+    def dtype(self, name: str):
+        """
+        The type of a column, or None if it has no values yet
+        """
+        column = self._columns[name]
+        return None if column is None else column.dtype
+
+    def latest(self, name: str):
+        """
+        The most recent value of a column as a plain Python value,
+        or None if nothing has been collected
+        """
+        if self.rows == 0:
+            return None
+        value = self[name][-1]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        The collected rows as a DataFrame.
+        pandas may copy the columns into blocks of its own.
+        """
+        return pd.DataFrame(
+            {name: self[name] for name in self._columns},
+            index=pd.RangeIndex(self.rows)
+        )
+
+# UPDATES
+
+    def add_column(self, name: str) -> None:
+        """
+        Start a new column. Rows already collected have no value.
+        """
+        self._columns.setdefault(name, None)
+
+    def clear(self) -> None:
+        """
+        Drop every row, keeping the columns and their types
+        """
+        self.rows = 0
+
+    def reserve(self, capacity: int) -> None:
+        """
+        Make room for at least this many rows.
+        An empty store is sized to exactly this many.
+        """
+        if capacity > self.capacity or self.rows == 0:
+            self._resize(max(1, capacity))
+
+    def append(self, step: int, row: dict) -> None:
+        """
+        Add a row of values collected at a model step.
+        Columns missing from the row get no value.
+        """
+        if self.rows == self.capacity:
+            self._resize(2 * self.capacity)
+        i = self.rows
+        self._steps[i] = step
+        for name, column in self._columns.items():
+            value = row.get(name)
+            if column is None:
+                if value is None:
+                    continue
+                column = self._new_column(name, value)
+            elif not _fits(column.dtype, value):
+                column = self._promote(name, value)
+            column[i] = np.nan if value is None else value
+        self.rows += 1
+
+    def _new_column(self, name: str, value) -> np.ndarray:
+        dtype = _dtype_of(value)
+        column = np.empty(self.capacity, dtype=dtype)
+        if self.rows:
+            # Earlier rows have no value
+            if dtype != object:
+                column = column.astype(float)
+            column[:self.rows] = None if dtype == object else np.nan
+        self._columns[name] = column
+        return column
+
+    def _promote(self, name: str, value) -> np.ndarray:
+        column = self._columns[name]
+        dtype = _dtype_of(value)
+        if dtype == object or column.dtype == object:
+            dtype = np.dtype(object)
+        elif value is None or dtype == float or column.dtype == float:
+            dtype = np.dtype(float)
+        else:
+            dtype = np.dtype(np.int64)
+        column = column.astype(dtype)
+        self._columns[name] = column
+        return column
+
+    def _resize(self, capacity: int) -> None:
+        self._steps = _resized(self._steps, capacity)
+        for name, column in self._columns.items():
+            if column is not None:
+                self._columns[name] = _resized(column, capacity)
+        self.capacity = capacity
+
+# PICKLING
+
+    def __getstate__(self) -> dict:
+        return {
+            "rows": self.rows,
+            "steps": self.steps.copy(),
+            "columns": {
+                name: None if column is None else column[:self.rows].copy()
+                for name, column in self._columns.items()
+            },
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.rows = state["rows"]
+        self.capacity = max(1, self.rows)
+        self._steps = _resized(state["steps"], self.capacity)
+        self._columns = {
+            name: None if column is None else _resized(column, self.capacity)
+            for name, column in state["columns"].items()
+        }
+
+
+# HELPERS
+
+def _dtype_of(value) -> np.dtype:
+    """
+    Column type for a reporter value
+    """
+    if value is None:
+        return np.dtype(float)
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(bool)
+    if isinstance(value, Integral):
+        return np.dtype(np.int64)
+    if isinstance(value, Real):
+        return np.dtype(float)
+    return np.dtype(object)
+
+
+def _fits(dtype: np.dtype, value) -> bool:
+    """
+    Can the value be stored in a column of this type unchanged?
+    """
+    if dtype == object:
+        return True
+    if value is None:
+        return dtype == float
+    if dtype == bool:
+        return isinstance(value, (bool, np.bool_))
+    if dtype == np.int64:
+        return isinstance(value, Integral)
+    return isinstance(value, Real)
+
+
+def _resized(column: np.ndarray, capacity: int) -> np.ndarray:
+    """
+    A copy of the column with room for the given number of rows
+    """
+    resized = np.empty(capacity, dtype=column.dtype)
+    rows = min(len(column), capacity)
+    resized[:rows] = column[:rows]
+    return resized
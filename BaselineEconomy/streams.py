@@ -0,0 +1,308 @@
+from random import Random
+from .firm import FirmConfig
+import numpy as np
+
+
+# CONFIG
+
+class StreamConfig:
+    """
+    Settings for keyed random number streams
+    """
+
+    # What is drawing the numbers
+    kinds = {"model": 0, "household": 1, "firm": 2}
+
+    # What the numbers are drawn for. Each step has a phase for
+    # shuffling the households, then the month start, the day and
+    # the month end. Initial conditions are drawn at step 0.
+    purposes = {
+        "init": 0,
+        "shuffle": 1,
+        "month_start": 2,
+        "day": 3,
+        "month_end": 4,
+    }
+
+
+# FUNCTIONS
+
+_mask = (1 << 64) - 1
+_gamma = 0x9E3779B97F4A7C15
+
+
+def mix(value: int) -> int:
+    """
+    The SplitMix64 finaliser: scramble 64 bits so that every input
+    bit affects every output bit
+    """
+    value &= _mask
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _mask
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _mask
+    return value ^ (value >> 31)
+
+
+def stream_key(seed: int, *parts) -> int:
+    """
+    Key of the stream identified by a seed and a sequence of integers
+    """
+    key = mix(seed)
+    for part in parts:
+        key = mix(key ^ (part & _mask))
+    return key
+
+
+def mix_array(values: np.ndarray) -> np.ndarray:
+    """
+    mix applied to every element of an array of uint64
+    """
+    # Multiplication wraps around, as it does in mix
+    with np.errstate(over="ignore"):
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xBF58476D1CE4E5B9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def stream_keys(seed: int, *parts) -> np.ndarray:
+    """
+    stream_key for arrays of parts, broadcast together
+    """
+    key = np.uint64(mix(seed))
+    for part in parts:
+        key = mix_array(key ^ np.asarray(part).astype(np.uint64))
+    return key
+
+
+def keyed_uniforms(keys: np.ndarray, draws) -> np.ndarray:
+    """
+    The numbered uniform draws from each keyed stream, in [0, 1).
+    Draw n of a stream is the same as the (n+1)th call to random()
+    on a KeyedRandom with that key.
+    """
+    counters = np.asarray(draws).astype(np.uint64) + np.uint64(1)
+    with np.errstate(over="ignore"):
+        bits = mix_array(keys + counters * np.uint64(_gamma))
+    return (bits >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+# STREAMS
+
+class KeyedRandom(Random):
+    """
+    A counter based random number generator. Its nth draw is a hash
+    of its key and n, so it needs no state beyond the two of them.
+
+    Offers the whole random.Random interface. Draws of up to 64 bits
+    take the top bits of a single hash.
+    """
+
+    def seed(self, key=None, version=2) -> None:
+        self.key = 0 if key is None else key & _mask
+        self.counter = 0
+
+    def _next(self) -> int:
+        self.counter += 1
+        return mix(self.key + self.counter * _gamma)
+
+    def random(self) -> float:
+        return (self._next() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k: int) -> int:
+        if k <= 64:
+            # mix, inlined for the small draws behind choice and shuffle
+            self.counter += 1
+            value = (self.key + self.counter * _gamma) & _mask
+            value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _mask
+            value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _mask
+            return (value ^ (value >> 31)) >> (64 - k)
+        bits = 0
+        filled = 0
+        while filled < k:
+            bits |= self._next() << filled
+            filled += 64
+        return bits & ((1 << k) - 1)
+
+    def getstate(self) -> tuple:
+        return (self.key, self.counter)
+
+    def setstate(self, state: tuple) -> None:
+        self.key, self.counter = state
+
+
+class AgentStreams:
+    """
+    Random numbers for each agent, keyed by the seed, the agent,
+    the model step and the purpose of the draw
+
+    An agent's draws do not depend on what any other agent has drawn,
+    so agents can be updated in any order, or in parallel, with the
+    same results. The scheduler calls begin at each phase of the step.
+
+    Variables:
+
+    seed: the model seed
+    step: the model step being run
+    purpose: what the current phase draws numbers for
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.step = 0
+        self.purpose = StreamConfig.purposes["init"]
+        self._streams = {}
+        self._calls = 0
+
+    def begin(self, step: int, purpose: str) -> None:
+        """
+        Start drawing for a new phase of the step
+        """
+        self.step = step
+        self.purpose = StreamConfig.purposes[purpose]
+        self._streams = {}
+        self._calls = 0
+
+    def stream(self, kind: str, unique_id: int) -> KeyedRandom:
+        """
+        The stream of one agent for the current phase
+        """
+        key = (kind, unique_id)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = KeyedRandom(stream_key(
+                self.seed,
+                StreamConfig.kinds[kind],
+                unique_id,
+                self.step,
+                self.purpose
+            ))
+            self._streams[key] = stream
+        return stream
+
+    def uniforms(self, kind: str, ids, columns=0) -> np.ndarray:
+        """
+        A uniform draw for each of an array of agents, in [0, 1).
+
+        Each call in a phase draws from fresh streams, keyed by the
+        number of calls before it in the phase as well as the agent.
+        columns numbers the draws for an agent within a single call.
+        """
+        keys = stream_keys(
+            self.seed,
+            StreamConfig.kinds[kind],
+            ids,
+            self.step,
+            self.purpose,
+            self._calls
+        )
+        self._calls += 1
+        return keyed_uniforms(keys, columns)
+
+
+class SharedDraws:
+    """
+    Draws for a HouseholdArrays population from a single NumPy
+    generator, in population order
+    """
+
+    def __init__(self, generator) -> None:
+        self.generator = generator
+
+    def uniforms(self, ids, columns=0) -> np.ndarray:
+        return self.generator.random(np.shape(ids))
+
+    def integers(self, ids, low: int, high: int, columns=0) -> np.ndarray:
+        return self.generator.integers(low, high, size=np.shape(ids))
+
+    def permutation(self, size: int) -> np.ndarray:
+        return self.generator.permutation(size)
+
+
+class KeyedDraws:
+    """
+    Draws for a HouseholdArrays population from AgentStreams,
+    keyed by household
+
+    ids gives the household each draw is for, and columns numbers
+    the draws for the same household within a call.
+    """
+
+    def __init__(self, streams: AgentStreams) -> None:
+        self.streams = streams
+
+    def uniforms(self, ids, columns=0) -> np.ndarray:
+        return self.streams.uniforms("household", ids, columns)
+
+    def integers(self, ids, low: int, high: int, columns=0) -> np.ndarray:
+        draws = self.uniforms(ids, columns)
+        return low + (draws * (high - low)).astype(np.int64)
+
+    def permutation(self, size: int) -> np.ndarray:
+        return np.argsort(
+            self.streams.uniforms("model", np.arange(size)),
+            kind="stable"
+        )
+
+
+class BlockDraws:
+    """
+    The random numbers behind a month of decisions, drawn in one go
+    from a NumPy generator at each month start and handed out to
+    the agents by index
+
+    Households get a uniform draw for each of the psi_price, psi_quant
+    and pi decisions, and firms one for theta plus their wage and price
+    adjustments. The household order for each day is a NumPy
+    permutation rather than a shuffle of the list.
+    """
+
+    household_decisions = ("psi_price", "psi_quant", "pi")
+    firm_decisions = ("theta",)
+
+    def __init__(self, generator, households: list, firms: list) -> None:
+        self.generator = generator
+        self.household_rows = {
+            o.unique_id: i for i, o in enumerate(households)
+        }
+        self.firm_rows = {o.unique_id: i for i, o in enumerate(firms)}
+        self.uniforms = {}
+        self.adjustments = {}
+
+    def draw_month(self) -> None:
+        """
+        Draw the numbers for the month ahead
+        """
+        generator = self.generator
+        households = len(self.household_rows)
+        firms = len(self.firm_rows)
+        for name in self.household_decisions:
+            self.uniforms[name] = generator.random(households).tolist()
+        for name in self.firm_decisions:
+            self.uniforms[name] = generator.random(firms).tolist()
+        self.adjustments["wage"] = generator.uniform(
+            0, FirmConfig.delta, firms
+        ).tolist()
+        self.adjustments["price"] = generator.uniform(
+            0, FirmConfig.upsilon, firms
+        ).tolist()
+
+    def household_uniform(self, household, decision: str) -> float:
+        row = self.household_rows[household.unique_id]
+        return self.uniforms[decision][row]
+
+    def firm_uniform(self, firm, decision: str) -> float:
+        return self.uniforms[decision][self.firm_rows[firm.unique_id]]
+
+    def adjustment(self, firm, name: str) -> float:
+        """
+        The firm's wage or price adjustment for the month
+        """
+        return self.adjustments[name][self.firm_rows[firm.unique_id]]
+
+    def shuffle(self, agents: list) -> None:
+        """
+        Shuffle a list in place by a NumPy permutation
+        """
+        order = self.generator.permutation(len(agents)).tolist()
+        agents[:] = [agents[i] for i in order]
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import pickle
+
+
+# CONFIG
+
+class SweepConfig:
+    """
+    Settings for sweep manifests
+    """
+
+    # File in the sweep directory recording the status of every run
+    manifest_name = "manifest.jsonl"
+
+    # Run statuses
+    pending = "pending"
+    done = "done"
+    failed = "failed"
+
+
+# FUNCTIONS
+
+def run_id(parameters: dict, iteration: int, max_steps: int) -> str:
+    """
+    Hash identifying a planned run within a sweep
+    """
+    description = json.dumps(
+        {
+            "parameters": parameters,
+            "iteration": iteration,
+            "max_steps": max_steps,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+# MANIFEST
+
+class SweepManifest:
+    """
+    A record on disk of every run planned in a sweep and how far
+    each one got
+
+    The manifest is a log of JSON lines, one appended whenever a run
+    is planned, finishes or fails, so a sweep that dies part way
+    leaves it intact. The results of finished runs are kept beside it.
+    A restarted sweep only runs what is missing or failed, and
+    adding parameter values or iterations only runs the new points.
+
+    Variables:
+
+    directory: where the manifest and run results are kept
+    runs: the latest record of each run, by run id
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, SweepConfig.manifest_name)
+        self.runs = {}
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            self._read()
+
+    def _read(self) -> None:
+        with open(self.path) as f:
+            lines = f.readlines()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Cut short by the sweep dying mid write
+                continue
+            self.runs[record["id"]] = record
+        if lines and not lines[-1].endswith("\n"):
+            with open(self.path, "a") as f:
+                f.write("\n")
+
+    def _append(self, record: dict) -> None:
+        self.runs[record["id"]] = record
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _result_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".result")
+
+    def plan(self, runs: list, max_steps: int) -> None:
+        """
+        Add any (parameters, iteration) runs not already in the sweep
+        """
+        for parameters, iteration in runs:
+            key = run_id(parameters, iteration, max_steps)
+            if key not in self.runs:
+                self._append({
+                    "id": key,
+                    "parameters": parameters,
+                    "iteration": iteration,
+                    "max_steps": max_steps,
+                    "status": SweepConfig.pending,
+                })
+
+    def status(self, parameters: dict, iteration: int, max_steps: int):
+        """
+        Status of a run, or None if it is not in the sweep
+        """
+        record = self.runs.get(run_id(parameters, iteration, max_steps))
+        return None if record is None else record["status"]
+
+    def load(self, parameters: dict, iteration: int, max_steps: int):
+        """
+        The result of a finished run, or None if it has still to run
+        """
+        key = run_id(parameters, iteration, max_steps)
+        record = self.runs.get(key)
+        if record is None or record["status"] != SweepConfig.done:
+            return None
+        try:
+            with open(self._result_path(key), "rb") as f:
+                result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        result.parameters = parameters
+        result.iteration = iteration
+        return result
+
+    def record(self, result, max_steps: int) -> None:
+        """
+        Store a run's result and mark it done or failed
+        """
+        key = run_id(result.parameters, result.iteration, max_steps)
+        if result.ok:
+            path = self._result_path(key)
+            partial = path + ".partial"
+            with open(partial, "wb") as f:
+                pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(partial, path)
+        self._append({
+            "id": key,
+            "parameters": result.parameters,
+            "iteration": result.iteration,
+            "max_steps": max_steps,
+            "status": SweepConfig.done if result.ok else SweepConfig.failed,
+            "elapsed": result.elapsed,
+            "error": result.error,
+        })
+
+    def summary(self) -> dict:
+        """
+        Number of runs with each status
+        """
+        counts = {
+            SweepConfig.pending: 0,
+            SweepConfig.done: 0,
+            SweepConfig.failed: 0,
+        }
+        for record in self.runs.values():
+            counts[record["status"]] += 1
+        return counts
@@ -0,0 +1,43 @@
+from BaselineEconomy.model import BaselineEconomyModel
+import pytest
+
+
+@pytest.fixture
+def economy() -> dict:
+    """
+    Model parameters of the small economy most tests run.
+    Tests add a seed and whatever else they vary.
+    """
+    return {
+        "num_households": 50,
+        "num_firms": 10,
+        "household_liquidity": 3000,
+        "firm_goods_price": 25,
+        "firm_wage_rate": 68,
+    }
+
+
+@pytest.fixture
+def batch_economy(economy) -> dict:
+    """
+    The economy for batch runs, collecting at each month start only
+    """
+    return dict(economy, collection="month_start")
+
+
+@pytest.fixture
+def run_economy(economy):
+    """
+    Run the economy for a number of steps and return the model.
+    Keyword arguments override its parameters, and scheduler
+    replaces the model's scheduler class.
+    """
+    def run(steps, scheduler=None, **kwargs):
+        model = BaselineEconomyModel(**dict(economy, **kwargs))
+        if scheduler is not None:
+            model.schedule = scheduler(model)
+        for _ in range(steps):
+            model.step()
+        return model
+
+    return run
@@ -0,0 +1,49 @@
+from BaselineEconomy.agent import EconomyAgent, flag, slot_names
+from BaselineEconomy.model import BaselineEconomyModel
+import pytest
+
+
+class FlaggedAgent(EconomyAgent):
+    __slots__ = ("wealth",)
+
+    first = flag(0, "First flag")
+    second = flag(3, "Second flag")
+
+
+def test_flags_pack_into_bits():
+    agent = FlaggedAgent(1, None)
+    assert not agent.first and not agent.second
+    agent.second = True
+    assert agent.flags == 8
+    agent.first = 1
+    assert agent.first is True
+    assert agent.flags == 9
+    agent.second = False
+    assert agent.flags == 1
+
+
+def test_agents_have_no_dict():
+    model = BaselineEconomyModel(10, 10)
+    for agent in (model.households[0], model.firms[0]):
+        assert not hasattr(agent, "__dict__")
+        with pytest.raises(AttributeError):
+            agent.misspelt_liquidity = 1
+    assert slot_names(FlaggedAgent) == (
+        "unique_id", "model", "pos", "flags", "wealth"
+    )
+
+
+def test_monthly_reset_keeps_replaced_vendor():
+    model = BaselineEconomyModel(10, 10)
+    hh = model.households[0]
+    hh.looked_for_new_job = True
+    hh.found_cheaper_vendor = True
+    hh.vendor_already_replaced = True
+    hh.reset_monthly_stats()
+    assert not hh.looked_for_new_job
+    assert not hh.found_cheaper_vendor
+    assert hh.vendor_already_replaced
+    firm = model.firms[0]
+    firm.raised_wage = True
+    firm.reset_monthly_stats()
+    assert not firm.raised_wage
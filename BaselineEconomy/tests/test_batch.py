@@ -0,0 +1,108 @@
+from BaselineEconomy.batch import (
+    ProcessBatchRunner,
+    RunResult,
+    parameter_combinations,
+    run_model
+)
+from BaselineEconomy.model import BaselineEconomyModel
+import os
+import pytest
+
+
+class CrashingModel(BaselineEconomyModel):
+    """
+    Kills its worker process part way through when given seed 0
+    """
+
+    def step(self) -> None:
+        if self.parameters["seed"] == 0 and self.schedule.steps == 5:
+            os._exit(1)
+        super().step()
+
+
+class FailingModel(BaselineEconomyModel):
+
+    def step(self) -> None:
+        raise RuntimeError("broken")
+
+
+def worker_process(crash: bool) -> RunResult:
+    """
+    Die if asked, or report which process ran the task
+    """
+    if crash:
+        os._exit(1)
+    result = RunResult({}, 0)
+    result.steps = os.getpid()
+    return result
+
+
+def test_parameter_combinations():
+    combinations = parameter_combinations(
+        {"seed": [1, 2], "num_firms": [10, 20]},
+        {"num_households": 100}
+    )
+    assert combinations == [
+        {"num_households": 100, "seed": 1, "num_firms": 10},
+        {"num_households": 100, "seed": 1, "num_firms": 20},
+        {"num_households": 100, "seed": 2, "num_firms": 10},
+        {"num_households": 100, "seed": 2, "num_firms": 20},
+    ]
+
+
+def test_results_match_serial_runs(batch_economy):
+    runner = ProcessBatchRunner(
+        BaselineEconomyModel,
+        {"seed": [3, 4, 5]},
+        batch_economy,
+        max_steps=21 * 3,
+        workers=2,
+        display_progress=False
+    )
+    seen = []
+    results = runner.run_all(seen.append)
+    assert len(seen) == 3
+    assert [o.parameters["seed"] for o in results] == [3, 4, 5]
+    for result in results:
+        assert result.ok
+        assert result.steps == 21 * 3
+        expected = run_model(
+            BaselineEconomyModel, result.parameters, 0, 21 * 3
+        )
+        assert result.dataframe().equals(expected.dataframe())
+
+
+def test_model_errors_are_reported(batch_economy):
+    result = run_model(FailingModel, batch_economy, 0, 10)
+    assert not result.ok
+    assert "broken" in result.error
+
+
+@pytest.mark.skipif(os.name != "posix", reason="needs fork")
+def test_worker_crash(batch_economy):
+    runner = ProcessBatchRunner(
+        CrashingModel,
+        {"seed": [0, 1, 2]},
+        batch_economy,
+        max_steps=21,
+        workers=1,
+        display_progress=False
+    )
+    results = runner.run_all()
+    assert not results[0].ok
+    assert "died" in results[0].error
+    assert all(o.ok for o in results[1:])
+    assert all(o.steps == 21 for o in results[1:])
+
+
+@pytest.mark.skipif(os.name != "posix", reason="needs fork")
+def test_runs_after_a_crash_share_a_pool():
+    runner = ProcessBatchRunner(
+        BaselineEconomyModel, workers=1, display_progress=False
+    )
+    results = runner.run_tasks([
+        (worker_process, (o == 0,), RunResult({}, 0)) for o in range(5)
+    ])
+    assert "died" in results[0].error
+    assert all(o.ok for o in results[1:])
+    assert len(set(o.steps for o in results[1:])) == 1
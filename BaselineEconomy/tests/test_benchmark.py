@@ -0,0 +1,38 @@
+from BaselineEconomy.benchmark import (
+    BenchmarkConfig,
+    benchmark_reporters,
+    benchmark_run,
+    compare,
+    load_results,
+    run_suite,
+    save_results
+)
+from BaselineEconomy.model import fused_model_reporters
+from BaselineEconomy.schedule import Scheduler
+
+
+def test_benchmark_run():
+    result = benchmark_run(50, 10, 2)
+    assert result["steps"] == 42
+    assert result["steps_per_second"] > 0
+    assert result["month_end_seconds"] > 0
+    assert result["phases"]["pay_wages"]["calls"] == 2
+    assert set(Scheduler.phases) <= set(result["phases"])
+
+
+def test_benchmark_reporters():
+    result = benchmark_reporters(50, 10, repeats=2)
+    assert set(fused_model_reporters) <= set(result["fused"])
+    assert "Liquidity P50" in result["fused"]
+    assert set(result["scan"]) == set(BenchmarkConfig.scan_reporters)
+
+
+def test_suite_results_compare(tmp_path):
+    results = run_suite(((50, 10),), (1,), reporters=False)
+    assert len(results["runs"]) == 1
+    path = str(tmp_path / "results.json")
+    save_results(results, path)
+    baseline = load_results(path)
+    (case, ) = compare(baseline, results)
+    assert case[:4] == (50, 10, 1, "object")
+    assert case[4] == 1
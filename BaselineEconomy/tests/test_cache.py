@@ -0,0 +1,100 @@
+from BaselineEconomy.batch import ProcessBatchRunner, run_model
+from BaselineEconomy.cache import ResultCache, run_key
+from BaselineEconomy.model import BaselineEconomyModel
+import BaselineEconomy.cache as cache_module
+import os
+import pytest
+
+
+@pytest.fixture
+def runner(batch_economy):
+    """
+    Batch runner for a list of seeds, using a cache
+    """
+    def build(cache, seeds, **kwargs):
+        return ProcessBatchRunner(
+            BaselineEconomyModel,
+            {"seed": seeds},
+            dict(batch_economy, **kwargs),
+            max_steps=21 * 2,
+            workers=1,
+            display_progress=False,
+            cache=cache
+        )
+
+    return build
+
+
+def test_cached_runs_are_not_repeated(tmp_path, runner):
+    cache = ResultCache(str(tmp_path))
+    first = runner(cache, [1, 2]).run_all()
+    assert not any(o.cached for o in first)
+    second = runner(cache, [1, 2, 3]).run_all()
+    assert [o.cached for o in second] == [True, True, False]
+    for a, b in zip(first, second):
+        assert a.dataframe().equals(b.dataframe())
+    assert len(cache.entries()) == 3
+
+
+def test_unseeded_runs_are_not_cached(tmp_path, runner):
+    cache = ResultCache(str(tmp_path))
+    runner(cache, [None]).run_all()
+    assert cache.entries() == []
+
+
+def test_failed_runs_are_not_cached(tmp_path, batch_economy):
+    cache = ResultCache(str(tmp_path))
+    parameters = dict(batch_economy, seed=1, reporters=["Unknown"])
+    result = cache.run(BaselineEconomyModel, parameters, 21)
+    assert not result.ok
+    assert cache.entries() == []
+
+
+def test_key_depends_on_parameters_and_code(monkeypatch, batch_economy):
+    parameters = dict(batch_economy, seed=1)
+    key = run_key(BaselineEconomyModel, parameters, 21)
+    assert key == run_key(BaselineEconomyModel, dict(parameters), 21)
+    assert key != run_key(BaselineEconomyModel, parameters, 42)
+    assert key != run_key(
+        BaselineEconomyModel, dict(parameters, seed=2), 21
+    )
+    assert key == run_key(
+        BaselineEconomyModel, dict(parameters, checkpoint_interval=6), 21
+    )
+    monkeypatch.setattr(cache_module, "code_version", lambda: "changed")
+    assert key != run_key(BaselineEconomyModel, parameters, 21)
+
+
+def test_least_recently_used_are_evicted(tmp_path, batch_economy):
+    cache = ResultCache(str(tmp_path))
+    results = [
+        run_model(BaselineEconomyModel, dict(batch_economy, seed=seed), 0, 21)
+        for seed in (1, 2, 3)
+    ]
+    for age, result in enumerate(results):
+        cache.save(BaselineEconomyModel, result, 21)
+        key = run_key(BaselineEconomyModel, result.parameters, 21)
+        path = os.path.join(str(tmp_path), key + ".result")
+        os.utime(path, (age, age))
+    # Using the oldest entry makes it the most recent
+    assert cache.fetch(BaselineEconomyModel, results[0].parameters, 21)
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert cache.fetch(BaselineEconomyModel, results[1].parameters, 21) \
+        is None
+    assert cache.fetch(BaselineEconomyModel, results[0].parameters, 21)
+    assert cache.fetch(BaselineEconomyModel, results[2].parameters, 21)
+
+
+def test_output_is_restored(tmp_path, runner):
+    pytest.importorskip("pyarrow")
+    from BaselineEconomy.output import read_run
+    cache = ResultCache(str(tmp_path / "cache"))
+    output = str(tmp_path / "run_s{seed}.parquet")
+    runner(cache, [1], output=output).run_all()
+    path = output.format(seed=1)
+    expected, _ = read_run(path)
+    os.remove(path)
+    result, = runner(cache, [1], output=output).run_all()
+    assert result.cached
+    assert read_run(path)[0].equals(expected)
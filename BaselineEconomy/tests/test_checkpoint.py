@@ -0,0 +1,82 @@
+from BaselineEconomy.checkpoint import (
+    dumps,
+    loads,
+    save_checkpoint,
+    load_checkpoint
+)
+import pytest
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, num_households=100, seed=12)
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+@pytest.mark.parametrize("split", [1, 21, 30])
+def test_resume_is_exact(engine, split, run_economy):
+    straight = run_economy(21 * 3, engine=engine)
+    expected = straight.datacollector.get_model_vars_dataframe()
+    expected_liquidity = [hh.liquidity for hh in straight.households]
+    # Run the models one at a time, as mesa shares one generator
+    # between every model
+    resumed = loads(dumps(run_economy(split, engine=engine)))
+    for _ in range(21 * 3 - split):
+        resumed.step()
+    assert resumed.schedule.steps == 21 * 3
+    assert resumed.datacollector.get_model_vars_dataframe().equals(expected)
+    assert [hh.liquidity for hh in resumed.households] == expected_liquidity
+
+
+def test_periodic_checkpoints(tmp_path, run_economy):
+    path = str(tmp_path / "run_{seed}.checkpoint")
+    straight = run_economy(21 * 3, collection="month_end")
+    expected = straight.datacollector.get_model_vars_dataframe()
+    run_economy(
+        21 * 3,
+        collection="month_end",
+        checkpoint=path,
+        checkpoint_interval=2
+    )
+    # The checkpoint is from the end of month two
+    resumed = load_checkpoint(str(tmp_path / "run_12.checkpoint"))
+    assert resumed.schedule.steps == 21 * 2
+    for _ in range(21):
+        resumed.step()
+    assert resumed.datacollector.get_model_vars_dataframe().equals(expected)
+
+
+def test_not_a_checkpoint(tmp_path):
+    path = tmp_path / "nonsense"
+    path.write_bytes(b"nonsense")
+    with pytest.raises(ValueError):
+        load_checkpoint(str(path))
+
+
+def test_save_replaces_previous(tmp_path, run_economy):
+    path = str(tmp_path / "model.checkpoint")
+    model = run_economy(0, engine="array")
+    save_checkpoint(model, path)
+    for _ in range(5):
+        model.step()
+    save_checkpoint(model, path)
+    assert load_checkpoint(path).schedule.steps == 5
+    assert [o.name for o in tmp_path.iterdir()] == ["model.checkpoint"]
+
+
+def test_large_population(run_economy):
+    # Long chains of employers, workers and suppliers
+    model = run_economy(22, num_households=3000, num_firms=100, seed=2)
+    resumed = loads(dumps(model))
+    employers = [
+        resumed.firms.index(hh.employer) if hh.employer else None
+        for hh in resumed.households
+    ]
+    assert employers == [
+        model.firms.index(hh.employer) if hh.employer else None
+        for hh in model.households
+    ]
+    assert all(
+        hh.employer is None or hh in hh.employer.workers
+        for hh in resumed.households
+    )
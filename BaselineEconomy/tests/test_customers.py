@@ -0,0 +1,85 @@
+from BaselineEconomy.checkpoint import dumps, loads
+from BaselineEconomy import customers
+from BaselineEconomy.customers import ArrayCustomerIndex, CustomerIndex
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, num_households=100, seed=6)
+
+
+def scanned_customers(model, firm) -> list:
+    return [hh for hh in model.households if firm in hh.preferred_suppliers]
+
+
+def check_index(model) -> None:
+    counts = model.customers.counts(model.firms)
+    demand = model.customers.demand(model.firms)
+    for i, firm in enumerate(model.firms):
+        expected = scanned_customers(model, firm)
+        assert set(model.customers.of(firm)) == set(expected)
+        assert counts[i] == len(expected)
+        assert demand[i] == pytest.approx(
+            sum([getattr(hh, "current_demand", 0) for hh in expected])
+        )
+
+
+@pytest.mark.parametrize("supplier_search", ["draws", "complement"])
+def test_index_follows_supplier_changes(supplier_search, run_economy):
+    model = run_economy(
+        0,
+        customer_index=True,
+        supplier_search=supplier_search
+    )
+    assert isinstance(model.customers, CustomerIndex)
+    check_index(model)
+    for _ in range(21 * 3):
+        model.step()
+    check_index(model)
+    assert model.customers.counts(model.firms).sum() == 700
+
+
+def test_index_does_not_change_results(run_economy):
+    expected = run_economy(42).datacollector.get_model_vars_dataframe()
+    indexed = run_economy(42, customer_index=True)
+    assert indexed.datacollector.get_model_vars_dataframe().equals(expected)
+
+
+def test_array_index(run_economy):
+    model = run_economy(21, engine="array")
+    assert isinstance(model.customers, ArrayCustomerIndex)
+    check_index(model)
+
+
+def test_index_survives_checkpoint(run_economy):
+    model = run_economy(21, customer_index=True)
+    resumed = loads(dumps(model))
+    check_index(resumed)
+
+
+@pytest.mark.parametrize("customer_index", [False, True])
+def test_firm_size_reporters(customer_index, run_economy):
+    names = ["Customers P50", "Customers Max", "Workers Max"]
+    model = run_economy(21, reporters=names, customer_index=customer_index)
+    data = model.datacollector.get_model_vars_dataframe()
+    counts = [len(scanned_customers(model, o)) for o in model.firms]
+    assert data["Customers Max"].iloc[-1] == max(counts)
+    assert data["Customers P50"].iloc[-1] == np.sort(counts)[4]
+    assert data["Workers Max"].iloc[-1] == max(
+        len(o.workers) for o in model.firms
+    )
+
+
+def test_customers_counted_once_per_collection(run_economy, monkeypatch):
+    calls = []
+
+    def counted(model):
+        calls.append(model.schedule.steps)
+        return model.customers.counts(model.firms)
+
+    monkeypatch.setattr(customers, "customer_counts", counted)
+    names = ["Customers P10", "Customers P50", "Customers Max"]
+    run_economy(5, reporters=names, customer_index=True)
+    assert calls == [1, 2, 3, 4, 5]
@@ -0,0 +1,149 @@
+from BaselineEconomy.distribution import (
+    LiquidityHistogram,
+    LiquidityTracker,
+    ExactDistribution,
+    distribution,
+    gini_coefficient
+)
+import numpy as np
+import pytest
+
+
+def sample_liquidity(seed, size=5000):
+    rng = np.random.default_rng(seed)
+    values = np.floor(rng.lognormal(8, 1.5, size))
+    values[rng.random(size) < 0.05] = 0
+    return values
+
+
+def bucket_counts(histogram) -> tuple:
+    """
+    The zeros and the non-empty buckets of a histogram, by exponent
+    """
+    exponents = range(
+        histogram.lowest, histogram.lowest + len(histogram.counts)
+    )
+    return histogram.zeros, {
+        e: c for e, c in zip(exponents, histogram.counts.tolist()) if c
+    }
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("relative_error", [0.001, 0.005, 0.05])
+def test_histogram_error_bound(seed, relative_error):
+    values = sample_liquidity(seed)
+    exact = distribution(values)
+    approx = distribution(values, relative_error)
+    assert approx.count == exact.count
+    assert approx.total == exact.total
+    assert abs(approx.gini() - exact.gini()) <= relative_error
+    for fraction in (0.01, 0.1, 0.5):
+        assert (
+            abs(approx.top_share(fraction) - exact.top_share(fraction))
+            <= relative_error
+        )
+    for q in (0, 0.1, 0.5, 0.9, 0.99, 1):
+        assert approx.quantile(q) == pytest.approx(
+            exact.quantile(q), rel=relative_error * 1.000001
+        )
+
+
+def test_small_values_keep_the_bound():
+    values = np.r_[0, 1e-9, 0.003, 0.25, 0.9, 1, 40, 7000]
+    exact = distribution(values)
+    approx = distribution(values, 0.01)
+    assert approx.zeros == 1
+    assert approx.lowest < 0
+    for q in np.linspace(0, 1, 8):
+        assert approx.quantile(q) == pytest.approx(
+            exact.quantile(q), rel=0.01 * 1.000001
+        )
+    assert abs(approx.gini() - exact.gini()) <= 0.01
+
+
+def test_exact_gini():
+    values = sample_liquidity(4)
+    assert distribution(values).gini() == gini_coefficient(values)
+
+
+def test_merge():
+    values = sample_liquidity(5)
+    whole = distribution(values, 0.01)
+    parts = LiquidityHistogram(0.01)
+    for part in np.array_split(values, 7):
+        parts.merge(distribution(part, 0.01))
+    assert bucket_counts(parts) == bucket_counts(whole)
+    assert parts.gini() == pytest.approx(whole.gini())
+    exact = ExactDistribution()
+    for part in np.array_split(values, 7):
+        exact.merge(distribution(part))
+    assert exact.gini() == pytest.approx(gini_coefficient(values))
+    with pytest.raises(ValueError):
+        whole.merge(LiquidityHistogram(0.02))
+
+
+@pytest.mark.parametrize("relative_error", [None, 0.01])
+def test_empty_and_equal(relative_error):
+    empty = distribution([], relative_error)
+    assert empty.gini() == 0
+    assert empty.quantile(0.5) == 0
+    assert empty.top_share(0.1) == 0
+    equal = distribution([500] * 100, relative_error)
+    assert equal.gini() == pytest.approx(0, abs=1e-12)
+    assert equal.top_share(0.1) == pytest.approx(0.1, rel=0.01)
+
+
+def test_negative_values_rejected():
+    with pytest.raises(ValueError):
+        distribution([-1, 2], 0.01)
+    with pytest.raises(ValueError):
+        LiquidityTracker([1, 2], 0.01).update(0, -1)
+
+
+def test_tracker_follows_changes():
+    values = sample_liquidity(6, 1000)
+    tracker = LiquidityTracker(values, 0.01)
+    rng = np.random.default_rng(7)
+    for member in rng.integers(0, 1000, 500).tolist():
+        values[member] = np.floor(values[member] * rng.uniform(0, 3))
+        tracker.update(member, values[member].item())
+    members = rng.choice(1000, 300, replace=False)
+    values[members] = np.floor(rng.lognormal(12, 1, 300))
+    tracker.update_many(members, values[members])
+    tracker.flush()
+    rebuilt = distribution(values, 0.01)
+    assert bucket_counts(tracker) == bucket_counts(rebuilt)
+    assert tracker.total == rebuilt.total
+    assert tracker.gini() == pytest.approx(rebuilt.gini())
+
+
+@pytest.mark.parametrize("mode", [
+    {"engine": "object"},
+    {"engine": "object", "batched_market": True},
+    {"engine": "array"},
+])
+def test_distribution_reporters(mode, run_economy):
+    shape = [
+        "Gini", "Top Decile Share",
+        "Liquidity P10", "Liquidity P50", "Liquidity P90", "Liquidity P99"
+    ]
+    results = {}
+    for relative_error in (None, 0.005):
+        model = run_economy(
+            21 * 2,
+            num_households=200,
+            seed=8,
+            reporters=shape,
+            distribution_error=relative_error,
+            check_aggregates=True,
+            **mode
+        )
+        results[relative_error] = (
+            model.datacollector.get_model_vars_dataframe().iloc[-1]
+        )
+    exact, approx = results[None], results[0.005]
+    assert list(exact.index) == shape
+    assert abs(exact["Gini"] - approx["Gini"]) <= 0.005
+    assert abs(exact["Top Decile Share"] - approx["Top Decile Share"]) <= 0.005
+    for label in shape[2:]:
+        assert approx[label] == pytest.approx(exact[label], rel=0.005)
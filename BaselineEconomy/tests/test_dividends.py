@@ -0,0 +1,69 @@
+from BaselineEconomy.dividends import (
+    first_paid_holding,
+    pay_dividends,
+    DividendConfig
+)
+from BaselineEconomy.model import BaselineEconomyModel
+import copy
+import math
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("block_elements", [1, 50, 1 << 20])
+def test_pay_dividends(block_elements, monkeypatch):
+    monkeypatch.setattr(DividendConfig, "block_elements", block_elements)
+    rng = np.random.default_rng(5)
+    holdings = rng.integers(0, 50, size=200).astype(float)
+    dividend_per_share = rng.random(30) * 3
+    dividend_per_share[::4] = 0
+    paid, received = pay_dividends(dividend_per_share, holdings)
+    for f, dps in enumerate(dividend_per_share):
+        assert paid[f] == sum(math.floor(h * dps) for h in holdings)
+    for h, holding in enumerate(holdings):
+        assert received[h] == sum(
+            math.floor(holding * dps) for dps in dividend_per_share
+        )
+
+
+def test_first_paid_holding():
+    rng = np.random.default_rng(8)
+    dividend_per_share = np.r_[rng.random(50) * 0.2, 1 / 3, 0.1, 0.7, 5]
+    values = np.unique(np.r_[
+        rng.integers(0, 100, size=60), 3, 10, 1
+    ]).astype(float)
+    first = first_paid_holding(dividend_per_share, values)
+    for dps, index in zip(dividend_per_share, first):
+        paid = [i for i, o in enumerate(values) if math.floor(o * dps)]
+        assert index == (paid[0] if paid else len(values))
+
+
+def test_nothing_to_pay():
+    paid, received = pay_dividends(np.zeros(3), np.ones(4))
+    assert not paid.any()
+    assert not received.any()
+
+
+def test_fused_distribution_matches_firms():
+    model = BaselineEconomyModel(50, 10, seed=1)
+    for i, hh in enumerate(model.households):
+        hh.liquidity = i * 7
+    for i, firm in enumerate(model.firms):
+        firm.liquidity = i * 1000
+        firm.wage_rate = 50
+        firm.workers = model.households[i:i + 3]
+    fused = copy.deepcopy(model)
+    fused.schedule.distribute_profits(
+        *fused.schedule.calculate_shareholdings()
+    )
+    details = model.schedule.calculate_shareholdings()
+    for firm in model.firms:
+        firm.distribute_profits(*details)
+    assert (
+        [o.liquidity for o in model.households] ==
+        [o.liquidity for o in fused.households]
+    )
+    assert (
+        [o.liquidity for o in model.firms] ==
+        [o.liquidity for o in fused.firms]
+    )
@@ -1,6 +1,7 @@
 from BaselineEconomy.model import BaselineEconomyModel
 from BaselineEconomy.firm import (
     FirmConfig,
+    Workforce,
     production_amount
 )
 
@@ -296,3 +297,33 @@ def test_marginal_cost():
         firm.marginal_cost() ==
         firm.wage_rate / FirmConfig.lambda_val / firm.model.month_length
     )
+
+
+def test_workforce_keeps_hiring_order():
+    firm = initial_firm()
+    hh = households(firm)
+    for worker in hh:
+        firm.hire(worker)
+    assert isinstance(firm.workers, Workforce)
+    assert firm.workers[2] is hh[2]
+    firm.quit_job(hh[1])
+    assert list(firm.workers) == [hh[0], hh[2]]
+    assert firm.workers[1] is hh[2]
+    assert hh[1] not in firm.workers
+    firm.hire(hh[1])
+    assert list(firm.workers) == [hh[0], hh[2], hh[1]]
+
+
+def test_workforce_labour_power():
+    firm = initial_firm()
+    hh = households(firm)
+    firm.workers = hh
+    assert firm.workers.labour_power(1) == 3
+    firm.produce_output()
+    assert firm.inventory == production_amount(3)
+    firm.quit_job(hh[0])
+    assert firm.workers.labour_power(1) == 2
+    firm.model.labour_supply = 2
+    assert firm.workers.labour_power(2) == 4
+    firm.produce_output()
+    assert firm.inventory == production_amount(3) + production_amount(4)
@@ -0,0 +1,84 @@
+from BaselineEconomy.aggregates import MoneyNotConserved
+from BaselineEconomy.golden import (
+    GoldenConfig,
+    check_mode,
+    exact_differences,
+    load_references,
+    record_references,
+    reference_parameters
+)
+from BaselineEconomy.model import BaselineEconomyModel
+from BaselineEconomy.scenarios import inject_money
+import pytest
+
+
+# The smaller of the reference populations, to keep the tests quick
+sizes = ((200, 20),)
+
+
+@pytest.fixture(scope="module")
+def references():
+    return [
+        o for o in load_references()
+        if (o.parameters["num_households"], o.parameters["num_firms"])
+        in sizes
+    ]
+
+
+def test_references(references):
+    assert len(references) == len(GoldenConfig.seeds)
+    reference = references[0]
+    assert len(reference.series) == GoldenConfig.months * 21
+    assert list(reference.households.columns) == list(
+        GoldenConfig.household_states
+    )
+    steps = reference.firms.index.get_level_values("Step").unique()
+    assert list(steps) == [21 * (i + 1) for i in range(GoldenConfig.months)]
+
+
+def test_saved_references_load_exactly(tmp_path):
+    recorded = record_references(
+        str(tmp_path), seeds=(1,), sizes=((100, 10),), months=2
+    )
+    loaded = load_references(str(tmp_path))
+    assert [o.name for o in loaded] == ["hh100_f10_s1"]
+    assert exact_differences(recorded[0], loaded[0]) == []
+
+
+def test_object_engine_is_exact(references):
+    assert check_mode(references, {}) == []
+
+
+def test_batched_market_is_exact(references):
+    assert check_mode(references, {"batched_market": True}) == []
+
+
+def test_array_engine_within_tolerances(references):
+    assert check_mode(references, {"engine": "array"}, exact=False) == []
+
+
+def test_block_draws_within_tolerances(references):
+    assert check_mode(references, {"rng": "block"}, exact=False) == []
+
+
+def test_changed_economics_detected(references):
+    mode = {"firm_liquidity": 1000}
+    assert any(
+        "Total Liquidity" in o
+        for o in check_mode(references[:1], mode)
+    )
+    assert any(
+        "Total Liquidity" in o
+        for o in check_mode(references[:1], mode, exact=False)
+    )
+
+
+def test_money_conservation_checked():
+    parameters = reference_parameters((1,), sizes)[0]
+    model = BaselineEconomyModel(check_money=True, **parameters)
+    model.step()
+    inject_money(model, households=10, firms=5)
+    model.step()
+    model.firms[0].liquidity += 1
+    with pytest.raises(MoneyNotConserved):
+        model.step()
@@ -3,6 +3,7 @@ from BaselineEconomy.household import (
     HouseholdConfig,
     planned_consumption_amount
 )
+from random import Random
 import pytest
 
 
@@ -48,12 +49,51 @@ def test_blackmarking():
     assert bm_firm == firm
 
 
+def test_blackmark_choice_matches_list():
+    hh = initial_household()
+    records = [
+        (hh.model.firms[i % 3], shortfall)
+        for i, shortfall in enumerate([5, 1, 30, 2, 2, 12, 7])
+    ]
+    for record in records:
+        hh.blackmarked_firms.append(record)
+    assert list(hh.blackmarked_firms) == records
+    firms, shortfalls = zip(*records)
+    for seed in range(20):
+        assert (
+            hh.blackmarked_firms.choose(Random(seed)) ==
+            Random(seed).choices(firms, weights=shortfalls)[0]
+        )
+    hh.blackmarked_firms.clear()
+    assert not hh.blackmarked_firms
+
+
 def test_select_new_firm():
     hh = initial_household()
     new_firm = hh.select_new_firm()
     assert new_firm not in hh.preferred_suppliers
 
 
+def test_select_unused_firm():
+    model = BaselineEconomyModel(1, 10, supplier_search="complement")
+    hh = model.households[0]
+    picked = {hh.select_new_firm() for _ in range(200)}
+    assert picked == set(model.firms) - set(hh.preferred_suppliers)
+
+
+def test_supplier_positions_follow_suppliers(run_economy):
+    model = run_economy(21 * 3, seed=2, supplier_search="complement")
+    for hh in model.households:
+        assert hh.supplier_positions == sorted(
+            model.firm_positions[o] for o in hh.preferred_suppliers
+        )
+
+
+def test_unknown_supplier_search():
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(1, 10, supplier_search="other")
+
+
 def test_select_new_employer():
     hh = initial_household()
     first_employer = hh.select_new_employer()
@@ -110,6 +150,50 @@ def test_find_work():
         assert not f.workers
 
 
+def test_vacancies_follow_open_positions():
+    model = BaselineEconomyModel(1, 10)
+    assert not model.vacancies
+    first, second = model.firms[3], model.firms[1]
+    first.has_open_position = True
+    second.has_open_position = True
+    first.has_open_position = True
+    assert list(model.vacancies) == [first, second]
+    first.hire(model.households[0])
+    assert list(model.vacancies) == [second]
+
+
+def test_search_vacancies():
+    model = BaselineEconomyModel(1, 10, job_search="vacancies")
+    hh = model.households[0]
+    state = model.random.getstate()
+    # Nothing to find, so nothing is drawn
+    hh.look_for_new_job()
+    assert hh.is_unemployed()
+    assert model.random.getstate() == state
+    firm = model.firms[4]
+    firm.wage_rate = 1
+    firm.has_open_position = True
+    # An unemployed household finds a single vacancy among ten firms
+    # with probability 1 - 0.9 ** 5, so search until it does
+    while hh.is_unemployed():
+        hh.look_for_new_job()
+    assert hh.employer is firm
+    assert not model.vacancies
+    # Every other firm pays more, so a single search moves
+    for f in model.firms:
+        f.wage_rate = 2
+        f.has_open_position = f is not firm
+    firm.wage_rate = 1
+    hh.look_for_new_job()
+    assert hh.employer is not firm
+    assert hh in hh.employer.workers
+
+
+def test_unknown_job_search():
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(1, 10, job_search="other")
+
+
 def test_work_status():
     hh = initial_household()
     assert hh.is_unemployed()
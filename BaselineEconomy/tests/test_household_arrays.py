@@ -0,0 +1,117 @@
+from BaselineEconomy.model import (
+    BaselineEconomyModel,
+    sum_liquidity,
+    count_employed,
+    compute_gini
+)
+from BaselineEconomy.household import HouseholdConfig
+from BaselineEconomy.household_arrays import HouseholdView, sample_distinct
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, engine="array", seed=3)
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(10, 10, engine="fortran")
+
+
+def test_initial_households(economy, run_economy):
+    model = run_economy(0)
+    hh = model.households
+    assert len(hh) == model.num_households == 50
+    assert hh.preferred_suppliers.shape == (
+        50, HouseholdConfig.num_preferred_suppliers
+    )
+    assert (hh.employer == -1).all()
+    assert (hh.liquidity == economy["household_liquidity"]).all()
+    assert hh.is_unhappy_at_work().all()
+
+
+def test_sample_distinct():
+    rng = np.random.default_rng(1)
+    sample = sample_distinct(rng, 200, 7, 8)
+    assert all(len(set(row)) == 7 for row in sample.tolist())
+    with pytest.raises(ValueError):
+        sample_distinct(rng, 1, 7, 6)
+
+
+def test_household_view(run_economy):
+    model = run_economy(0)
+    view = model.households[4]
+    assert isinstance(view, HouseholdView)
+    assert view == model.households[4]
+    assert view != model.households[5]
+    view.liquidity = 20
+    assert model.households.liquidity[4] == 20
+    assert view.employer is None
+    firm = view.preferred_suppliers[0]
+    firm.hire(view)
+    assert view.employer is firm
+    assert count_employed(model) == 1
+    firm.quit_job(model.households[4])
+    assert view.employer is None
+    assert not firm.workers
+
+
+def test_select_new_firms(run_economy):
+    model = run_economy(0)
+    hh = model.households
+    rows = np.arange(len(hh))
+    new_firms = hh.select_new_firms(rows)
+    assert not (hh.preferred_suppliers == new_firms[:, None]).any()
+
+
+def test_select_unused_firms(run_economy):
+    model = run_economy(
+        0, num_households=2000, supplier_search="complement"
+    )
+    hh = model.households
+    rows = np.zeros(2000, dtype=np.int64)
+    new_firms = hh.select_new_firms(rows)
+    unused = np.setdiff1d(np.arange(10), hh.preferred_suppliers[0])
+    assert (np.unique(new_firms) == unused).all()
+
+
+def test_find_work(run_economy):
+    model = run_economy(0)
+    hh = model.households
+    for f in model.firms:
+        f.has_open_position = True
+        f.wage_rate = 1
+    hh.look_for_new_jobs(np.arange(len(hh)))
+    # Every firm fills exactly one position
+    assert count_employed(model) == model.num_firms
+    assert all(len(f.workers) == 1 for f in model.firms)
+    assert not any(f.has_open_position for f in model.firms)
+    assert hh.found_new_job.sum() == model.num_firms
+
+
+def test_blackmarked_firm_selection(run_economy):
+    model = run_economy(0)
+    hh = model.households
+    hh._blackmarks.append((
+        np.array([0, 1, 1]),
+        np.array([3, 4, 5]),
+        np.array([2.0, 0.0, 5.0])
+    ))
+    assert list(hh.count_blackmarks()[:3]) == [1, 2, 0]
+    for _ in range(20):
+        assert list(hh.select_blackmarked_firms(np.array([0, 1]))) == [3, 5]
+
+
+def test_array_model_runs(run_economy):
+    model = run_economy(0)
+    money = sum_liquidity(model)
+    for _ in range(model.month_length * 6):
+        model.step()
+        assert sum_liquidity(model) == money
+    assert count_employed(model) > 0
+    assert 0 <= compute_gini(model) < 1
+    data = model.datacollector.get_model_vars_dataframe()
+    assert len(data) == model.month_length * 6
+    assert not data.isnull().values.any()
@@ -0,0 +1,130 @@
+from BaselineEconomy.market import (
+    clear_goods_market,
+    affordable_amount,
+    satisfaction_amount,
+    MarketConfig,
+    MarketOutcome,
+    _clear_household
+)
+from BaselineEconomy.household import HouseholdConfig
+import numpy as np
+import pytest
+
+
+def random_market(seed, num_households=300, num_firms=20, stock=40):
+    rng = np.random.default_rng(seed)
+    suppliers = np.stack([
+        rng.choice(num_firms, HouseholdConfig.num_preferred_suppliers,
+                   replace=False)
+        for _ in range(num_households)
+    ])
+    prices = rng.integers(1, 30, size=num_firms).astype(float)
+    inventory = rng.integers(0, stock, size=num_firms).astype(float)
+    liquidity = rng.integers(0, 200, size=num_households).astype(float)
+    demand = rng.integers(0, 10, size=num_households).astype(float)
+    order = rng.permutation(num_households)
+    return order, suppliers, prices, inventory, liquidity, demand
+
+
+def sequential_market(order, suppliers, prices, inventory, liquidity, demand):
+    """
+    Reference result: settle every household one supplier at a time
+    """
+    outcome = MarketOutcome(len(liquidity), len(inventory))
+    for household in order:
+        _clear_household(
+            household, suppliers, prices, inventory,
+            liquidity, demand, outcome
+        )
+    return outcome
+
+
+def test_affordable_amount():
+    assert list(affordable_amount(
+        np.array([10.0, 10.0, 0.0]),
+        np.array([3.0, 0.0, 5.0])
+    )) == [3, np.inf, 0]
+
+
+def test_satisfaction_amount():
+    assert list(satisfaction_amount(np.array([0.0, 19.0, 20.0, 41.0]))) == (
+        [0, 0, 1, 2]
+    )
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("block_size", [16, 64, 4096])
+def test_matches_sequential_market(seed, block_size, monkeypatch):
+    monkeypatch.setattr(MarketConfig, "block_size", block_size)
+    batch = random_market(seed)
+    reference = random_market(seed)
+    outcome = clear_goods_market(*batch)
+    expected = sequential_market(*reference)
+    # inventory and liquidity are updated in place
+    assert np.array_equal(batch[3], reference[3])
+    assert np.array_equal(batch[4], reference[4])
+    assert np.array_equal(outcome.sold, expected.sold)
+    assert np.array_equal(outcome.revenue, expected.revenue)
+    assert np.array_equal(
+        outcome.unsatisfied_demand,
+        expected.unsatisfied_demand
+    )
+    assert np.array_equal(
+        outcome.blackmark_households,
+        expected.blackmark_households
+    )
+    assert np.array_equal(outcome.blackmark_firms, expected.blackmark_firms)
+    assert np.array_equal(
+        outcome.blackmark_shortfalls,
+        expected.blackmark_shortfalls
+    )
+    # Make sure the test actually exercises stock outs
+    assert len(outcome.blackmark_households) > 0
+
+
+def test_market_conserves_money():
+    order, suppliers, prices, inventory, liquidity, demand = random_market(7)
+    opening = liquidity.sum()
+    outcome = clear_goods_market(
+        order, suppliers, prices, inventory, liquidity, demand
+    )
+    assert liquidity.sum() + outcome.revenue.sum() == opening
+    assert (inventory >= 0).all()
+    assert (liquidity >= 0).all()
+
+
+def test_batched_market_matches_object_path(run_economy):
+    # Models share mesa's class level random generator,
+    # so each one has to run to completion before the next starts
+    sequential, batched = [
+        run_economy(
+            21 * 4 - 5,
+            num_households=100,
+            seed=42,
+            batched_market=batched_market
+        )
+        for batched_market in (False, True)
+    ]
+    for hh, other in zip(sequential.households, batched.households):
+        assert hh.liquidity == other.liquidity
+        assert hh.unsatisfied_demand == other.unsatisfied_demand
+        assert (
+            [(f.unique_id, s) for f, s in hh.blackmarked_firms] ==
+            [(f.unique_id, s) for f, s in other.blackmarked_firms]
+        )
+    for firm, other in zip(sequential.firms, batched.firms):
+        assert firm.inventory == other.inventory
+        assert firm.liquidity == other.liquidity
+    assert any(hh.blackmarked_firms for hh in batched.households)
+    assert sequential.datacollector.get_model_vars_dataframe().equals(
+        batched.datacollector.get_model_vars_dataframe()
+    )
+
+
+def test_batched_market_without_stockouts(run_economy):
+    model = run_economy(1, batched_market=True)
+    for firm in model.firms:
+        firm.inventory = 10 ** 6
+    unsatisfied = [hh.unsatisfied_demand for hh in model.households]
+    model.step()
+    assert [hh.unsatisfied_demand for hh in model.households] == unsatisfied
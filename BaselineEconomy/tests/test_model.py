@@ -1,4 +1,6 @@
 from BaselineEconomy.model import BaselineEconomyModel
+from BaselineEconomy.aggregates import AggregateMismatch
+import gc
 import pytest
 
 
@@ -55,3 +57,55 @@ def test_model_step():
     assert old_hh[0].model.schedule.is_month_start()
     assert not old_firms[0].model.schedule.is_month_end()
     assert not old_hh[0].model.schedule.is_month_end()
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_incremental_reporters(engine, run_economy):
+    parameters = dict(num_households=100, seed=8, engine=engine)
+    scanned = run_economy(21 * 6, **parameters)
+    tracked = run_economy(
+        21 * 6,
+        incremental_reporters=True,
+        check_aggregates=True,
+        **parameters
+    )
+    expected = scanned.datacollector.get_model_vars_dataframe()
+    result = tracked.datacollector.get_model_vars_dataframe()
+    assert (result.columns == expected.columns).all()
+    for column in expected.columns:
+        assert result[column].to_numpy() == pytest.approx(
+            expected[column].to_numpy(), rel=1e-9
+        )
+
+
+def test_aggregate_mismatch_detected():
+    model = BaselineEconomyModel(10, 10, check_aggregates=True)
+    model.firms[0].inventory = 5
+    with pytest.raises(AggregateMismatch):
+        model.step()
+
+
+@pytest.mark.parametrize("rng", ["shared", "keyed", "block"])
+def test_bulk_initialisation(rng):
+    model = BaselineEconomyModel(
+        200, 20, seed=3, rng=rng, initialisation="bulk"
+    )
+    assert gc.isenabled()
+    suppliers = [hh.preferred_suppliers for hh in model.households]
+    for row in suppliers:
+        assert len(set(row)) == len(row) == 7
+        assert all(firm in model.firms for firm in row)
+    rebuilt = BaselineEconomyModel(
+        200, 20, seed=3, rng=rng, initialisation="bulk"
+    )
+    assert [
+        [firm.unique_id for firm in hh.preferred_suppliers]
+        for hh in rebuilt.households
+    ] == [[firm.unique_id for firm in row] for row in suppliers]
+    for _ in range(21):
+        rebuilt.step()
+
+
+def test_unknown_initialisation():
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(10, 10, initialisation="other")
@@ -0,0 +1,91 @@
+from BaselineEconomy.output import (
+    OutputConfig,
+    RunWriter,
+    read_run,
+    read_runs
+)
+from BaselineEconomy.store import RunStore
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, num_households=100, collection="month_start")
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow"])
+def test_streamed_output_matches_memory(
+    tmp_path, monkeypatch, suffix, run_economy
+):
+    monkeypatch.setattr(OutputConfig, "batch_rows", 4)
+    expected = run_economy(21 * 10, seed=6).datacollector
+    path = str(tmp_path / ("run_{seed}." + suffix))
+    # The output is closed at the end of max_steps
+    model = run_economy(
+        21 * 10, seed=6, output=path, burn_in=3, max_steps=21 * 10
+    )
+    assert not model.running
+    # Only a batch is ever held in memory
+    assert model.datacollector.store.capacity == 4
+    data, parameters = read_run(str(tmp_path / ("run_6." + suffix)))
+    assert parameters["seed"] == 6
+    assert parameters["burn_in"] == 3
+    assert data["Step"].tolist() == [64, 85, 106, 127, 148, 169, 190]
+    assert data.drop(columns="Step").equals(
+        expected.get_model_vars_dataframe().iloc[3:].reset_index(drop=True)
+    )
+
+
+def test_read_runs(tmp_path, run_economy):
+    paths = []
+    for seed in (1, 2):
+        path = str(tmp_path / "run_{0}.parquet".format(seed))
+        run_economy(21 * 2, seed=seed, output=path, max_steps=21 * 2)
+        paths.append(path)
+    data = read_runs(paths)
+    assert len(data) == 4
+    assert data["seed"].tolist() == [1, 1, 2, 2]
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow"])
+def test_sparse_reporter_output(tmp_path, monkeypatch, suffix, run_economy):
+    monkeypatch.setattr(OutputConfig, "batch_rows", 2)
+    # The first batches have no Gini at all
+    sparse = {"reporter_collection": {"Gini": 21 * 5}, "seed": 3}
+    expected = run_economy(21 * 12, **sparse).datacollector
+    path = str(tmp_path / ("run." + suffix))
+    run_economy(21 * 12, output=path, max_steps=21 * 12, **sparse)
+    data, _ = read_run(path)
+    assert data["Gini"].notna().sum() == 2
+    assert data.drop(columns="Step").equals(
+        expected.get_model_vars_dataframe()
+    )
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow"])
+def test_promoted_column_output(tmp_path, suffix):
+    path = str(tmp_path / ("run." + suffix))
+    writer = RunWriter(path, {"seed": 1})
+    store = RunStore(["level", "late"])
+    for step in range(3):
+        store.append(step + 1, {"level": step})
+    writer.write(store)
+    store.append(4, {"level": 2.5, "late": True})
+    writer.close(store)
+    data, parameters = read_run(path)
+    assert parameters == {"seed": 1}
+    assert data["Step"].tolist() == [1, 2, 3, 4]
+    assert data["level"].dtype == float
+    assert data["level"].tolist() == [0, 1, 2, 2.5]
+    assert data["late"].tolist()[3] == 1
+    assert np.isnan(data["late"].tolist()[:3]).all()
+    # Numbers cannot become words
+    writer = RunWriter(str(tmp_path / ("words." + suffix)), {})
+    store.append(5, {"level": 1.5})
+    writer.write(store)
+    store.append(6, {"level": "high"})
+    with pytest.raises(ValueError):
+        writer.write(store)
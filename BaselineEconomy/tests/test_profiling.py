@@ -0,0 +1,72 @@
+from BaselineEconomy.batch import run_model
+from BaselineEconomy.checkpoint import dumps, loads
+from BaselineEconomy.model import BaselineEconomyModel
+from BaselineEconomy.schedule import Scheduler
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, seed=7)
+
+
+def test_untimed_model_has_no_timer(run_economy):
+    model = run_economy(1)
+    assert model.timer is None
+    assert "step" not in vars(model)
+    assert "households_day" not in vars(model.schedule)
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_timing_does_not_change_results(engine, run_economy):
+    untimed = run_economy(42, engine=engine)
+    timed = run_economy(42, engine=engine, timing=True)
+    assert timed.datacollector.get_model_vars_dataframe().equals(
+        untimed.datacollector.get_model_vars_dataframe()
+    )
+
+
+def test_profile(run_economy):
+    model = run_economy(42, timing=True)
+    profile = model.timer.profile()
+    assert set(profile) == set(
+        BaselineEconomyModel.phases + Scheduler.phases
+    )
+    assert profile["step"]["calls"] == 42
+    assert profile["households_day"]["calls"] == 42
+    assert profile["start_month"]["calls"] == 2
+    assert profile["distribute_profits"]["calls"] == 2
+    assert profile["write_output"]["calls"] == 0
+    assert profile["step"]["share"] == 1
+    assert sum(
+        profile[name]["seconds"] for name in Scheduler.phases
+    ) <= profile["step"]["seconds"]
+
+
+def test_profile_in_run_result(economy):
+    result = run_model(
+        BaselineEconomyModel, dict(economy, timing=True), 0, 21
+    )
+    assert result.profile["step"]["calls"] == 21
+    result = run_model(BaselineEconomyModel, economy, 0, 21)
+    assert result.profile is None
+
+
+def test_timing_columns(run_economy):
+    model = run_economy(21, timing_columns=True, collection="month_end")
+    df = model.datacollector.get_model_vars_dataframe()
+    seconds = df["Seconds households_day"].to_numpy()
+    assert len(seconds) == 1 and seconds[0] > 0
+    assert "Employed" in df
+    model = run_economy(63, timing_columns=True, reporters=["Employed"])
+    df = model.datacollector.get_model_vars_dataframe()
+    assert np.all(np.diff(df["Seconds step"].to_numpy()) > 0)
+
+
+def test_timed_model_checkpoints(run_economy):
+    model = run_economy(21, timing=True)
+    resumed = loads(dumps(model))
+    resumed.step()
+    assert resumed.timer.calls["step"] == 22
+    assert model.timer.calls["step"] == 21
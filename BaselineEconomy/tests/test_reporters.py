@@ -0,0 +1,156 @@
+from BaselineEconomy.model import (
+    BaselineEconomyModel,
+    count_employed,
+    count_notice,
+    count_poverty,
+    percent_unsatisfied_demand,
+    sum_inventory,
+    average_goods_price,
+    average_wage_rate,
+    sum_hh_savings,
+    sum_liquidity,
+    compute_gini
+)
+from BaselineEconomy.reporters import (
+    FusedDataCollector,
+    FusedReporter,
+    Sum,
+    Count,
+    Values,
+    is_due
+)
+import pytest
+
+scanned_reporters = {
+    "Employed": count_employed,
+    "On Notice": count_notice,
+    "Poverty Level": count_poverty,
+    "Unsatisfied Demand": percent_unsatisfied_demand,
+    "Inventory": sum_inventory,
+    "Price": average_goods_price,
+    "Wage": average_wage_rate,
+    "HH Savings": sum_hh_savings,
+    "Total Liquidity": sum_liquidity,
+    "Gini": compute_gini,
+}
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, num_households=100, seed=4)
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_fused_matches_scanned(engine, run_economy):
+    model = run_economy(21 * 3 + 4, engine=engine)
+    report = model.datacollector.evaluate(model)
+    assert list(report) == list(scanned_reporters)
+    for name, reporter in scanned_reporters.items():
+        assert report[name] == reporter(model)
+
+
+def test_declared_column_order():
+    collector = FusedDataCollector({
+        "First": lambda m: 1,
+        "Second": FusedReporter(households={"n": Count("employer")}),
+        "Third": lambda m: 3,
+    })
+    assert list(collector.model_vars) == ["First", "Second", "Third"]
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_user_defined_reporter(engine, run_economy):
+    model = run_economy(0, engine=engine)
+    model.datacollector.add_fused_reporter(
+        "Richest",
+        FusedReporter(
+            lambda m, r: max(r["liquidity"]),
+            households={"liquidity": Values("liquidity")}
+        )
+    )
+    model.datacollector.add_fused_reporter(
+        "Wage Bill",
+        FusedReporter(
+            firms={"bill": Sum(lambda f: f.wage_rate * len(f.workers))}
+        )
+    )
+    for _ in range(model.month_length * 2):
+        model.step()
+    data = model.datacollector.get_model_vars_dataframe()
+    assert data["Richest"].iloc[-1] == max(
+        hh.liquidity for hh in model.households
+    )
+    assert data["Wage Bill"].iloc[-1] == sum(
+        f.wage_rate * len(f.workers) for f in model.firms
+    )
+
+
+def test_empty_population():
+    model = BaselineEconomyModel(0, 10)
+    report = model.datacollector.evaluate(model)
+    assert report["Employed"] == 0
+    assert report["Gini"] == 0
+
+
+@pytest.mark.parametrize(
+    "cadence,steps",
+    [
+        ("daily", list(range(1, 64))),
+        ("month_start", [1, 22, 43]),
+        ("month_end", [21, 42, 63]),
+        (10, [10, 20, 30, 40, 50, 60]),
+        ("on_demand", []),
+    ])
+def test_collection_cadence(cadence, steps):
+    assert [
+        step for step in range(1, 64) if is_due(cadence, step, 21)
+    ] == steps
+
+
+@pytest.mark.parametrize("cadence", ["weekly", 0, True])
+def test_unknown_cadence(cadence):
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(10, 2, collection=cadence)
+
+
+def test_monthly_matches_daily_rows(run_economy):
+    daily = run_economy(21 * 3 + 4).datacollector
+    model = run_economy(21 * 3 + 4, collection="month_start")
+    monthly = model.datacollector
+    assert monthly.collection_steps.tolist() == [1, 22, 43, 64]
+    assert monthly.get_model_vars_dataframe().equals(
+        daily.get_model_vars_dataframe()
+        .iloc[::model.month_length]
+        .reset_index(drop=True)
+    )
+
+
+def test_reporter_cadence(run_economy):
+    model = run_economy(
+        21 * 2,
+        collection="month_end",
+        reporter_collection={"Employed": "daily"},
+        reporters=["Employed", "Gini"]
+    )
+    data = model.datacollector.get_model_vars_dataframe()
+    assert list(data.columns) == ["Employed", "Gini"]
+    assert len(data) == model.month_length * 2
+    assert data["Employed"].notna().all()
+    assert list(data["Gini"].dropna().index) == [20, 41]
+
+
+def test_on_demand_collection():
+    model = BaselineEconomyModel(100, 10, collection="on_demand")
+    for _ in range(5):
+        model.step()
+    assert model.datacollector.get_model_vars_dataframe().empty
+    model.datacollector.collect(model)
+    assert model.datacollector.collection_steps.tolist() == [5]
+    assert len(model.datacollector.get_model_vars_dataframe()) == 1
+
+
+def test_unknown_reporter():
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(10, 2, reporters=["Nonsense"])
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(10, 2, reporter_collection={"Nonsense": 1})
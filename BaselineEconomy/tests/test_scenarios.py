@@ -0,0 +1,93 @@
+from BaselineEconomy.batch import run_model
+from BaselineEconomy.model import BaselineEconomyModel
+from BaselineEconomy.scenarios import (
+    ScenarioRunner,
+    inject_money,
+    run_scenario,
+    warm_up
+)
+from functools import partial
+import pytest
+
+
+@pytest.fixture
+def batch_economy(batch_economy):
+    return dict(batch_economy, check_aggregates=True)
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_unchanged_scenario_matches_straight_run(engine, batch_economy):
+    parameters = dict(batch_economy, seed=9, engine=engine)
+    straight = run_model(BaselineEconomyModel, parameters, 0, 21 * 4)
+    warm = warm_up(BaselineEconomyModel, parameters, 0, 21 * 2)
+    assert warm.ok
+    assert warm.steps == 21 * 2
+    forked = run_scenario(
+        warm.snapshot, "base", None, parameters, 0, 21 * 4
+    )
+    assert forked.ok
+    assert forked.scenario == "base"
+    assert forked.dataframe().equals(
+        straight.dataframe().iloc[2:].reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_inject_money(engine, batch_economy):
+    model = BaselineEconomyModel(engine=engine, **batch_economy)
+    for _ in range(5):
+        model.step()
+    before = model.aggregates.household_liquidity
+    inject_money(model, households=100, firms=1000)
+    model.aggregates.check()
+    assert model.aggregates.household_liquidity == before + 50 * 100
+    model.step()
+
+
+def test_scenario_runner(batch_economy):
+    runner = ScenarioRunner(
+        BaselineEconomyModel,
+        {
+            "base": None,
+            "households": partial(inject_money, households=1000),
+            "firms": partial(inject_money, firms=5000),
+        },
+        {"seed": [1, 2]},
+        batch_economy,
+        burn_in_steps=21 * 2,
+        max_steps=21 * 3,
+        workers=2,
+        display_progress=False
+    )
+    results = runner.run_all()
+    assert [(o.parameters["seed"], o.scenario) for o in results] == [
+        (1, "base"), (1, "households"), (1, "firms"),
+        (2, "base"), (2, "households"), (2, "firms"),
+    ]
+    assert all(o.ok for o in results)
+    assert all(len(o.dataframe()) == 1 for o in results)
+    base, households, firms = results[:3]
+    assert (
+        households.dataframe()["Total Liquidity"][0] ==
+        base.dataframe()["Total Liquidity"][0] + 50 * 1000
+    )
+    assert (
+        firms.dataframe()["Total Liquidity"][0] ==
+        base.dataframe()["Total Liquidity"][0] + 10 * 5000
+    )
+
+
+def test_failed_burn_in(batch_economy):
+    runner = ScenarioRunner(
+        BaselineEconomyModel,
+        {"base": None, "more": partial(inject_money, households=1)},
+        {"engine": ["nonsense"]},
+        batch_economy,
+        burn_in_steps=21,
+        max_steps=42,
+        workers=1,
+        display_progress=False
+    )
+    results = runner.run_all()
+    assert [o.scenario for o in results] == ["base", "more"]
+    assert all("Unknown household engine" in o.error for o in results)
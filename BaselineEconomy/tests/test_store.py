@@ -0,0 +1,59 @@
+from BaselineEconomy.store import RunStore
+from BaselineEconomy.model import BaselineEconomyModel
+import numpy as np
+import pickle
+
+
+def test_typed_columns():
+    store = RunStore(["count", "level", "flag", "late"], capacity=2)
+    for step in range(1, 6):
+        store.append(step, {"count": step, "level": step / 2, "flag": True})
+    assert store.rows == 5
+    assert store.capacity == 8
+    assert store.steps.tolist() == [1, 2, 3, 4, 5]
+    assert store["count"].dtype == np.int64
+    assert store["level"].dtype == float
+    assert store["flag"].dtype == bool
+    assert store["late"].tolist() == [None] * 5
+    store.append(6, {"count": 6.5, "late": 1})
+    assert store["count"].dtype == float
+    assert store["count"].tolist() == [1, 2, 3, 4, 5, 6.5]
+    assert np.isnan(store["level"][-1])
+    assert np.isnan(store["late"][:5]).all()
+    assert store.latest("late") == 1
+    assert isinstance(store.latest("late"), float)
+
+
+def test_dataframe():
+    store = RunStore(["a", "b"])
+    for step in range(10):
+        store.append(step, {"a": step, "b": step * 1.5})
+    frame = store.to_dataframe()
+    assert list(frame.columns) == ["a", "b"]
+    assert frame["a"].tolist() == list(range(10))
+    assert frame["b"].tolist() == [o * 1.5 for o in range(10)]
+    assert frame.index.tolist() == list(range(10))
+
+
+def test_pickle_keeps_rows_only():
+    store = RunStore(["a"], capacity=100000)
+    for step in range(10):
+        store.append(step, {"a": step})
+    data = pickle.dumps(store)
+    assert len(data) < 2000
+    copy = pickle.loads(data)
+    assert copy.to_dataframe().equals(store.to_dataframe())
+    assert copy.steps.tolist() == store.steps.tolist()
+    copy.append(10, {"a": 10})
+    assert copy["a"].tolist() == list(range(11))
+
+
+def test_model_reserves_store():
+    model = BaselineEconomyModel(
+        10, 10, collection="month_start", max_steps=21 * 5
+    )
+    assert model.datacollector.store.capacity == 5
+    for _ in range(21 * 5):
+        model.step()
+    assert model.datacollector.store.capacity == 5
+    assert model.datacollector.store.rows == 5
@@ -0,0 +1,159 @@
+from BaselineEconomy.checkpoint import dumps, loads
+from BaselineEconomy.model import BaselineEconomyModel
+from BaselineEconomy.schedule import Scheduler
+from BaselineEconomy.streams import (
+    AgentStreams,
+    KeyedDraws,
+    KeyedRandom,
+    keyed_uniforms,
+    stream_key,
+    stream_keys
+)
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def economy(economy):
+    return dict(economy, num_households=100, seed=4)
+
+
+class ReversedFirmsScheduler(Scheduler):
+    """
+    Runs the firm month start in the opposite order
+    """
+
+    def start_month(self) -> None:
+        self.firms.reverse()
+        super().start_month()
+        self.firms.reverse()
+
+
+@pytest.fixture
+def run(run_economy):
+    """
+    Run the economy and return its collected model variables
+    """
+    def dataframe(steps, scheduler=None, **kwargs):
+        model = run_economy(steps, scheduler, **kwargs)
+        return model.datacollector.get_model_vars_dataframe()
+
+    return dataframe
+
+
+def test_keyed_random_is_counter_based():
+    key = stream_key(1, 2, 3)
+    a = KeyedRandom(key)
+    draws = [a.random() for _ in range(5)]
+    b = KeyedRandom(key)
+    assert [b.random() for _ in range(5)] == draws
+    assert all(0 <= o < 1 for o in draws)
+    assert len(set(draws)) == 5
+    b.setstate(a.getstate())
+    assert b.random() == a.random()
+    assert sorted(KeyedRandom(key).sample(range(10), 10)) == list(range(10))
+
+
+def test_vectorised_draws_match_scalar_streams():
+    ids = np.array([0, 5, 3, 1000])
+    keys = stream_keys(9, 1, ids, 7, 2)
+    for column in range(3):
+        expected = []
+        for unique_id in ids.tolist():
+            stream = KeyedRandom(stream_key(9, 1, unique_id, 7, 2))
+            expected.append([stream.random() for _ in range(3)][column])
+        assert keyed_uniforms(keys, column).tolist() == expected
+
+
+def test_agent_draws_do_not_depend_on_other_agents():
+    streams = AgentStreams(3)
+    streams.begin(5, "month_start")
+    first = streams.stream("household", 7).random()
+    streams.begin(5, "month_start")
+    for unique_id in range(10):
+        streams.stream("firm", unique_id).random()
+    assert streams.stream("household", 7).random() == first
+    streams.begin(5, "day")
+    assert streams.stream("household", 7).random() != first
+    assert streams.stream("firm", 7).random() != first
+
+
+def test_array_draws_keyed_by_household():
+    streams = AgentStreams(3)
+    draws = KeyedDraws(streams)
+    ids = np.arange(50)
+    order = np.random.default_rng(0).permutation(50)
+    streams.begin(2, "day")
+    in_order = draws.uniforms(ids)
+    streams.begin(2, "day")
+    assert (draws.uniforms(ids[order]) == in_order[order]).all()
+    integers = draws.integers(ids, 3, 9)
+    assert integers.min() >= 3 and integers.max() < 9
+
+
+def test_keyed_firms_independent_of_order(run):
+    keyed = run(63, rng="keyed")
+    assert run(63, ReversedFirmsScheduler, rng="keyed").equals(keyed)
+    shared = run(63)
+    assert not run(63, ReversedFirmsScheduler).equals(shared)
+
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_keyed_runs_are_reproducible(engine, run):
+    first = run(42, rng="keyed", engine=engine)
+    assert run(42, rng="keyed", engine=engine).equals(first)
+    assert not run(42, engine=engine).equals(first)
+
+
+def test_keyed_checkpoint_resumes_exactly(economy):
+    model = BaselineEconomyModel(rng="keyed", **economy)
+    for _ in range(30):
+        model.step()
+    resumed = loads(dumps(model))
+    for _ in range(30):
+        model.step()
+    for _ in range(30):
+        resumed.step()
+    assert resumed.datacollector.get_model_vars_dataframe().equals(
+        model.datacollector.get_model_vars_dataframe()
+    )
+
+
+def test_block_draws_cover_the_month(economy):
+    model = BaselineEconomyModel(rng="block", **economy)
+    block = model.block_draws
+    block.draw_month()
+    household = model.households[3]
+    firm = model.firms[2]
+    assert block.household_uniform(household, "pi") == \
+        block.uniforms["pi"][3]
+    assert 0 <= block.adjustment(firm, "wage") < 0.019
+    agents = list(model.households)
+    block.shuffle(agents)
+    assert sorted(o.unique_id for o in agents) == list(range(100))
+
+
+def test_block_runs_are_reproducible(run):
+    first = run(63, rng="block", check_money=True)
+    assert run(63, rng="block", check_money=True).equals(first)
+    assert not run(63).equals(first)
+
+
+def test_block_checkpoint_resumes_exactly(run, economy):
+    expected = run(60, rng="block")
+    # Run the models one at a time, as mesa shares one generator
+    # between every model
+    model = BaselineEconomyModel(rng="block", **economy)
+    for _ in range(30):
+        model.step()
+    resumed = loads(dumps(model))
+    for _ in range(30):
+        resumed.step()
+    assert resumed.datacollector.get_model_vars_dataframe().equals(expected)
+
+
+def test_unknown_rng(economy):
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(rng="other", **economy)
+    with pytest.raises(ValueError):
+        BaselineEconomyModel(rng="block", engine="array", **economy)
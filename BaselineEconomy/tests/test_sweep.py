@@ -0,0 +1,92 @@
+from BaselineEconomy.batch import ProcessBatchRunner, RunResult, run_model
+from BaselineEconomy.model import BaselineEconomyModel
+from BaselineEconomy.sweep import SweepManifest, run_id
+import json
+import pytest
+
+
+max_steps = 21 * 2
+
+
+@pytest.fixture
+def runner(batch_economy):
+    """
+    Build a single worker sweep of the seeds, recorded in the directory
+    """
+    def build(directory, seeds, iterations=1):
+        return ProcessBatchRunner(
+            BaselineEconomyModel,
+            {"seed": seeds},
+            batch_economy,
+            iterations=iterations,
+            max_steps=max_steps,
+            workers=1,
+            display_progress=False,
+            manifest=SweepManifest(directory)
+        )
+
+    return build
+
+
+def finished(directory) -> list:
+    """
+    Ids of the runs recorded as finished, once for each time they ran
+    """
+    with open(directory + "/manifest.jsonl") as f:
+        records = [json.loads(o) for o in f]
+    return [o["id"] for o in records if o["status"] == "done"]
+
+
+def test_restart_only_runs_missing_and_failed(tmp_path, runner):
+    directory = str(tmp_path)
+    runs = runner(directory, [1, 2, 3]).runs
+    manifest = SweepManifest(directory)
+    manifest.plan(runs, max_steps)
+    # The sweep died after finishing one run and failing another
+    manifest.record(run_model(BaselineEconomyModel, *runs[0], max_steps),
+                    max_steps)
+    failed = RunResult(*runs[1])
+    failed.error = "Worker process died"
+    manifest.record(failed, max_steps)
+    assert SweepManifest(directory).summary() == {
+        "pending": 1, "done": 1, "failed": 1
+    }
+    results = runner(directory, [1, 2, 3]).run_all()
+    assert all(o.ok for o in results)
+    assert [o.parameters["seed"] for o in results] == [1, 2, 3]
+    assert sorted(finished(directory)) == sorted(
+        run_id(parameters, iteration, max_steps)
+        for parameters, iteration in runs
+    )
+    assert SweepManifest(directory).summary() == {
+        "pending": 0, "done": 3, "failed": 0
+    }
+
+
+def test_extended_sweep_keeps_finished_runs(tmp_path, runner):
+    directory = str(tmp_path)
+    first = runner(directory, [1, 2]).run_all()
+    second = runner(directory, [1, 2, 3], iterations=2).run_all()
+    assert len(second) == 6
+    assert len(finished(directory)) == 6
+    for a, b in zip(first, second[0::2]):
+        assert a.dataframe().equals(b.dataframe())
+        assert a.elapsed == b.elapsed
+
+
+def test_status_survives_a_cut_short_manifest(tmp_path, batch_economy):
+    directory = str(tmp_path)
+    parameters = dict(batch_economy, seed=1)
+    manifest = SweepManifest(directory)
+    assert manifest.status(parameters, 0, max_steps) is None
+    manifest.plan([(parameters, 0)], max_steps)
+    with open(manifest.path, "a") as f:
+        f.write('{"id": "')
+    manifest = SweepManifest(directory)
+    assert manifest.status(parameters, 0, max_steps) == "pending"
+    assert manifest.load(parameters, 0, max_steps) is None
+    failed = RunResult(parameters, 0)
+    failed.error = "broken"
+    manifest.record(failed, max_steps)
+    manifest = SweepManifest(directory)
+    assert manifest.status(parameters, 0, max_steps) == "failed"
@@ -1,6 +1,8 @@
 from BaselineEconomy.model import BaselineEconomyModel
-from mesa.batchrunner import BatchRunner
-from mesa.datacollection import DataCollector
+from BaselineEconomy.output import read_run
+from BaselineEconomy.batch import ProcessBatchRunner
+from BaselineEconomy.cache import ResultCache
+from BaselineEconomy.sweep import SweepManifest
 import matplotlib.pyplot as plt
 import random
 
@@ -54,6 +56,8 @@ br_params = {
     "firm_liquidity": [0],
     "firm_goods_price": [25],
     "firm_wage_rate": [68],
+    # Only the first day of each month is kept
+    "collection": ["month_start"],
 }
 
 # Run for 6000 months plus 1000 months burn in
@@ -62,43 +66,47 @@ br_params = {
 burn_in = 0
 run_length = 1500
 total_steps = (run_length + burn_in) * 21
+# Each run streams its monthly data to its own Parquet file,
+# dropping the burn in period as it goes
+output = "/tmp/BaselineEconomyModel_Step_Data_s{seed}.parquet"
+br_params["max_steps"] = [total_steps]
+br_params["output"] = [output]
+br_params["burn_in"] = [burn_in]
 
 
-br = BatchRunner(
-    BaselineEconomyModel,
-    br_params,
-    iterations=1,
-    max_steps=total_steps,
-    model_reporters={"Data Collector": lambda m: m.datacollector},
-)
-
-# Drop the burn in period from the data collection
 if __name__ == "__main__":
-    br.run_all()
-    br_df = br.get_model_vars_dataframe()
-    for i in range(len(br_df["Data Collector"])):
-        hh_liquidity = br_df["household_liquidity"][i]
-        firm_liquidity = br_df["firm_liquidity"][i]
-        marker = "_hh{0}_f{1}_i{2}".format(hh_liquidity, firm_liquidity, i)
-        if isinstance(br_df["Data Collector"][i], DataCollector):
-            i_run_data = (
-                br_df["Data Collector"][i]
-                .get_model_vars_dataframe()
-                .drop(list(range(burn_in*21)))
-                .iloc[::21]
-                .reset_index(drop=True)
-            )
-            i_run_data["Year"] = (i_run_data.index.to_series() / 12)
-            i_run_data.to_csv(
-                "/tmp/BaselineEconomyModel_Step_Data"
-                + marker + ".csv"
-            )
-            plt.close('all')
-            # excess_demand_figure(
-            #     i_run_data,
-            #     "/tmp/excess_demand" + marker + ".png"
-            # )
-            employment_figure(
-                i_run_data,
-                "/tmp/employment" + marker + ".png"
-            )
+    # Built here rather than at import, as worker processes started
+    # by spawn import this script again
+    br = ProcessBatchRunner(
+        BaselineEconomyModel,
+        br_params,
+        iterations=1,
+        max_steps=total_steps,
+        # Runs already made with the same parameters and code are
+        # read back rather than run again
+        cache=ResultCache(),
+        # Restarting an interrupted sweep picks up where it left off
+        manifest=SweepManifest("/tmp/BaselineEconomyModel_Sweep"),
+    )
+    for i, result in enumerate(br.run_all()):
+        if not result.ok:
+            print(result.error)
+            continue
+        i_run_data, parameters = read_run(
+            output.format(**result.parameters)
+        )
+        marker = "_hh{0}_f{1}_i{2}".format(
+            parameters["household_liquidity"],
+            parameters["firm_liquidity"],
+            i
+        )
+        i_run_data["Year"] = (i_run_data.index.to_series() / 12)
+        plt.close('all')
+        # excess_demand_figure(
+        #     i_run_data,
+        #     "/tmp/excess_demand" + marker + ".png"
+        # )
+        employment_figure(
+            i_run_data,
+            "/tmp/employment" + marker + ".png"
+        )
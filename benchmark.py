@@ -0,0 +1,80 @@
+from BaselineEconomy.benchmark import (
+    BenchmarkConfig,
+    compare,
+    load_results,
+    run_suite,
+    save_results
+)
+import argparse
+
+
+def parse_size(text: str) -> tuple:
+    households, firms = text.split(":")
+    return (int(households), int(firms))
+
+
+def report(result: dict) -> None:
+    if "steps_per_second" in result:
+        print(
+            "{households}/{firms} {engine} {months} months: "
+            "{steps_per_second:.1f} steps/s, "
+            "month end {month_end_seconds:.4f}s, "
+            "collection {collection_seconds:.5f}s".format(**result)
+        )
+    else:
+        print(
+            "{households}/{firms} {engine} reporters: "
+            "all standard {0:.5f}s".format(
+                result["fused"]["All standard"], **result
+            )
+        )
+
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the Baseline Economy model"
+)
+parser.add_argument(
+    "--sizes",
+    nargs="+",
+    type=parse_size,
+    default=BenchmarkConfig.sizes,
+    help="populations as households:firms"
+)
+parser.add_argument(
+    "--months",
+    nargs="+",
+    type=int,
+    default=BenchmarkConfig.months
+)
+parser.add_argument("--engines", nargs="+", default=["object"])
+parser.add_argument("--no-reporters", action="store_true")
+parser.add_argument(
+    "--output",
+    default="/tmp/BaselineEconomy_benchmark_{commit}.json"
+)
+parser.add_argument(
+    "--compare",
+    help="earlier results to compare the speed against"
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    results = run_suite(
+        args.sizes,
+        args.months,
+        args.engines,
+        not args.no_reporters,
+        report
+    )
+    path = args.output.format(commit=results["commit"])
+    save_results(results, path)
+    print("Results saved to", path)
+    if args.compare:
+        for households, firms, months, engine, speed_up in compare(
+            load_results(args.compare), results
+        ):
+            print(
+                "{0}/{1} {2} {3} months: {4:.2f}x".format(
+                    households, firms, engine, months, speed_up
+                )
+            )